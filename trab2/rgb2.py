@@ -1,3 +1,4 @@
+import atexit
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
@@ -115,8 +116,32 @@ class Button:
 sliders = []
 current_slider = None
 reset_button = None
+pending_x = None        # última posição x do arrasto, aplicada no próximo display
+motion_events = 0       # eventos de movimento recebidos
+motion_applied = 0      # posições efetivamente aplicadas (uma por quadro)
+
+def apply_motion():
+    """Aplica ao slider só a posição mais recente do arrasto"""
+    global pending_x, motion_applied
+    if pending_x is not None and current_slider:
+        mx = pending_x * (window.right - window.left) / window.w + window.left
+        current_slider.update_value(mx)
+        motion_applied += 1
+    pending_x = None
+
+def motion_summary():
+    return {
+        'events': motion_events,
+        'applied': motion_applied,
+        'coalesced': motion_events - motion_applied - (pending_x is not None),
+    }
+
+def print_motion_summary():
+    # glutMainLoop não retorna: o resumo sai quando o processo termina
+    print('Movimentos do mouse:', motion_summary())
 
 def display():
+    apply_motion()
     glClear(GL_COLOR_BUFFER_BIT)
 
     # desenha botão
@@ -172,14 +197,18 @@ def mouse(button, state, x, y):
                 break
 
     if button == GLUT_LEFT_BUTTON and state == GLUT_UP:
+        apply_motion()  # última posição do arrasto antes de soltar
         current_slider = None
+        glutPostRedisplay()
 
 def motion(x, y):
-    global current_slider
+    # Só guarda a posição; vários eventos entre dois quadros viram uma atualização
+    global pending_x, motion_events
     if current_slider:
-        mx = x * (window.right - window.left) / window.w + window.left
-        current_slider.update_value(mx)
-        glutPostRedisplay()
+        motion_events += 1
+        if pending_x is None:
+            glutPostRedisplay()
+        pending_x = x
 
 
 if __name__ == "__main__":
@@ -196,4 +225,5 @@ if __name__ == "__main__":
     glutDisplayFunc(display)
     glutMouseFunc(mouse)
     glutMotionFunc(motion)
+    atexit.register(print_motion_summary)
     glutMainLoop()
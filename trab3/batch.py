@@ -0,0 +1,466 @@
+# batch.py
+# Renderizador retido: os contornos de todas as formas ficam num único VBO
+# (posição + cor por vértice) e a cena inteira sai em um glMultiDrawArrays.
+# Só os trechos das formas que mudaram são reenviados para a GPU.
+
+import bisect
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+import state
+import scene
+import shapes
+import culling
+import coords
+
+FLOATS_PER_VERTEX = 5  # x, y, r, g, b
+STRIDE = FLOATS_PER_VERTEX * 4
+
+
+def _shift(arr, old, new):
+    """Leva arr[old] para a posição new, deslocando o que fica entre as duas"""
+    item = arr[old].copy()
+    if old < new:
+        arr[old:new] = arr[old + 1:new + 1]
+    else:
+        arr[new + 1:old + 1] = arr[new:old]
+    arr[new] = item
+
+
+class ShapeBatch:
+    def __init__(self, capacity=4096):
+        self.data = np.zeros((capacity, FLOATS_PER_VERTEX), dtype=np.float32)  # cópia na CPU
+        self.used = 0            # vértices alocados (topo do alocador)
+        self.free = {}           # nº de vértices -> offsets livres para reaproveitar
+        self.slots = {}          # forma -> (first, count)
+        self.dirty = set()       # formas cujo trecho precisa ser reenviado
+        self.moved = set()       # formas transformadas em lote (reescritas juntas)
+        self.written = []        # trechos (first, count) já escritos na CPU, a reenviar
+        # Arrays da ordem de desenho (first, count e AABB de mundo de cada
+        # forma) com folga: só os order_len primeiros valem; a capacidade
+        # dobra quando falta espaço (ver firsts/counts/bounds)
+        self._firsts = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._bounds = np.zeros((0, 4))
+        self.order_len = 0
+        self.order_pos = {}             # forma -> posição na ordem de desenho
+        self.order_shapes = []          # formas na ordem de desenho
+        self.order_version = -1
+        self.rebuilds = 0               # estatística: reconstruções completas da ordem
+        self.vbo = None
+        self.gpu_capacity = 0    # tamanho (em vértices) do buffer na GPU
+        self.full_upload = True
+        self.available = None    # None = ainda não testado
+        self.uploaded_vertices = 0  # estatística: vértices enviados no último quadro
+        self.adaptive = []       # formas cujo contorno depende do zoom (círculos, polígonos grandes)
+        self.lod_ppu = None      # pixels por unidade usados no contorno dessas formas
+        self.filled = []         # formas com malha (polígonos), na ordem de desenho
+        self.drawn_vertices = 0  # estatística: vértices desenhados no último quadro
+        self.fill_indices = None # índices dos triângulos de todas elas no VBO (cache)
+        shapes.transform_listeners.append(self._on_transform)
+        shapes.transform_listeners_many.append(self._on_transform_many)
+
+    @property
+    def firsts(self):
+        return self._firsts[:self.order_len]
+
+    @property
+    def counts(self):
+        return self._counts[:self.order_len]
+
+    @property
+    def bounds(self):
+        return self._bounds[:self.order_len]
+
+    def _reserve(self, n):
+        # Garante espaço para n formas nos arrays da ordem (dobrando a capacidade)
+        cap = len(self._firsts)
+        if n <= cap:
+            return
+        cap = max(cap, 1024)
+        while cap < n:
+            cap *= 2
+        used = self.order_len
+        for name in ('_firsts', '_counts', '_bounds'):
+            old = getattr(self, name)
+            grown = np.empty((cap,) + old.shape[1:], dtype=old.dtype)
+            grown[:used] = old[:used]
+            setattr(self, name, grown)
+
+    def _open(self, pos, k):
+        # Abre k posições a partir de pos nos arrays da ordem
+        used = self.order_len
+        self._reserve(used + k)
+        for arr in (self._firsts, self._counts, self._bounds):
+            arr[pos + k:used + k] = arr[pos:used]
+        self.order_len = used + k
+
+    def _close(self, pos):
+        # Tira a posição pos dos arrays da ordem
+        used = self.order_len
+        for arr in (self._firsts, self._counts, self._bounds):
+            arr[pos:used - 1] = arr[pos + 1:used]
+        self.order_len = used - 1
+
+    def _on_transform(self, s):
+        if s in self.slots:
+            self.dirty.add(s)
+
+    def _on_transform_many(self, st, group):
+        self.moved.update(self.slots.keys() & group)
+
+    # --- alocação de trechos no buffer ---
+    def _alloc(self, count, reuse=True):
+        bucket = self.free.get(count) if reuse else None
+        if bucket:
+            return bucket.pop()
+        first = self.used
+        self.used += count
+        if self.used > len(self.data):
+            cap = len(self.data)
+            while cap < self.used:
+                cap *= 2
+            grown = np.zeros((cap, FLOATS_PER_VERTEX), dtype=np.float32)
+            grown[:first] = self.data[:first]
+            self.data = grown
+        return first
+
+    def _release(self, s):
+        first, count = self.slots.pop(s)
+        self.free.setdefault(count, []).append(first)
+        self.dirty.discard(s)
+        self.moved.discard(s)
+
+    def _write(self, s):
+        verts = s.outline_vertices(self.lod_ppu)
+        first, count = self.slots[s]
+        if len(verts) != count:
+            # A geometria base mudou de tamanho: realoca o trecho
+            self._release(s)
+            count = len(verts)
+            first = self._alloc(count)
+            self.slots[s] = (first, count)
+            self.order_version = -1
+        block = self.data[first:first + count]
+        block[:, 0:2] = verts
+        block[:, 2:5] = s.color
+        if self.fill_indices is not None and hasattr(s, 'mesh'):
+            self.fill_indices = None  # malha ou posição no buffer podem ter mudado
+        pos = self.order_pos.get(s)
+        if pos is not None:
+            self.bounds[pos] = s.bounding_box_world()
+        return first, count
+
+    def _write_many(self, group):
+        # Formas movidas em lote: as de contorno fixo têm os vértices de mundo
+        # calculados de uma vez pelo store e espalhados nos seus trechos; as
+        # adaptativas (e as que mudaram de tamanho) passam por _write
+        adaptive = set(self.adaptive)
+        fixed = [s for s in group if s not in adaptive]
+        ranges = [self._write(s) for s in group if s in adaptive]
+        if not fixed:
+            return ranges
+        st = state.shapes
+        rows = st.rows_of(fixed)
+        firsts, counts = np.array([self.slots[s] for s in fixed], dtype=np.int64).reshape(-1, 2).T
+        verts, starts, n = st.world_vertices(rows)
+        same = n == counts
+        if not same.all():
+            ranges += [self._write(fixed[i]) for i in np.flatnonzero(~same).tolist()]
+            keep = np.repeat(same, n)
+            verts, n = verts[keep], n[same]
+            firsts, rows = firsts[same], rows[same]
+            fixed = [s for s, ok in zip(fixed, same.tolist()) if ok]
+        dest = np.repeat(firsts - (np.cumsum(n) - n), n) + np.arange(len(verts))
+        self.data[dest, 0:2] = verts
+        pos = np.fromiter((self.order_pos.get(s, -1) for s in fixed), dtype=np.int64, count=len(fixed))
+        inside = pos >= 0
+        self.bounds[pos[inside]] = st.world_bounds(rows[inside])
+        return ranges + list(zip(firsts.tolist(), n.tolist()))
+
+    def sync(self):
+        """Acompanha mudanças estruturais da cena (formas novas, removidas ou reordenadas)"""
+        if self.order_version == scene.order_version:
+            return
+        if self.order_version >= scene.edit_base:
+            # Só mudanças pontuais (clique, z, acréscimos da carga em partes):
+            # aplica cada uma nos arrays sem refazer tudo
+            for version, op, *args in scene.edits:
+                if version > self.order_version:
+                    getattr(self, '_' + op)(*args)
+            self.order_version = scene.order_version
+            return
+        current = set(state.shapes)
+        for s in [s for s in self.slots if s not in current]:
+            self._release(s)
+        for s in state.shapes:
+            if s not in self.slots:
+                count = len(s.outline_vertices(self.lod_ppu))
+                self.slots[s] = (self._alloc(count), count)
+                self.dirty.add(s)
+        # Ordem de desenho = ordem de state.shapes (de trás para frente)
+        slots = self.slots
+        n = len(state.shapes)
+        self.order_len = 0
+        self._reserve(n)
+        self.order_len = n
+        self.firsts[:] = np.fromiter((slots[s][0] for s in state.shapes), dtype=np.int32, count=n)
+        self.counts[:] = np.fromiter((slots[s][1] for s in state.shapes), dtype=np.int32, count=n)
+        self.order_pos = {s: i for i, s in enumerate(state.shapes)}
+        self.order_shapes = list(state.shapes)
+        self.bounds[:] = state.shapes.world_bounds(state.shapes.rows())
+        self.adaptive = [s for s in state.shapes if s.adaptive]
+        self.filled = [s for s in state.shapes if hasattr(s, 'mesh')]
+        self.fill_indices = None
+        self.order_version = scene.order_version
+        self.rebuilds += 1
+
+    # --- mudanças pontuais da ordem (scene.edits) ---
+    def _renumber(self, lo, hi):
+        self.order_pos.update(zip(self.order_shapes[lo:hi], range(lo, hi)))
+
+    def _refile(self, *moved):
+        # Recoloca polígonos em self.filled segundo a nova posição de desenho
+        moved = [s for s in moved if hasattr(s, 'mesh')]
+        if not moved:
+            return
+        for s in moved:
+            if s in self.filled:
+                self.filled.remove(s)
+        for s in moved:
+            bisect.insort(self.filled, s, key=self.order_pos.__getitem__)
+        self.fill_indices = None
+
+    def _insert(self, pos, s):
+        count = len(s.outline_vertices(self.lod_ppu))
+        first = self._alloc(count)
+        self.slots[s] = (first, count)
+        self.dirty.add(s)
+        self._open(pos, 1)
+        self._firsts[pos], self._counts[pos] = first, count
+        self._bounds[pos] = s.bounding_box_world()
+        self.order_shapes.insert(pos, s)
+        self._renumber(pos, len(self.order_shapes))
+        if s.adaptive:
+            self.adaptive.append(s)
+        self._refile(s)
+
+    def _remove(self, pos):
+        s = self.order_shapes.pop(pos)
+        self._release(s)
+        self._close(pos)
+        del self.order_pos[s]
+        self._renumber(pos, len(self.order_shapes))
+        if s.adaptive:
+            self.adaptive.remove(s)
+        if hasattr(s, 'mesh'):
+            self.filled.remove(s)
+            self.fill_indices = None
+
+    def _move(self, old, new):
+        if old == new:
+            return
+        for arr in (self.firsts, self.counts, self.bounds):
+            _shift(arr, old, new)
+        s = self.order_shapes.pop(old)
+        self.order_shapes.insert(new, s)
+        self._renumber(min(old, new), max(old, new) + 1)
+        self._refile(s)
+
+    def _swap(self, i, j):
+        for arr in (self.firsts, self.counts, self.bounds):
+            arr[[i, j]] = arr[[j, i]]
+        order = self.order_shapes
+        order[i], order[j] = order[j], order[i]
+        self.order_pos[order[i]], self.order_pos[order[j]] = i, j
+        self._refile(order[i], order[j])
+
+    def _append(self, rows):
+        # Formas acrescentadas no topo (carga em partes): as de contorno fixo
+        # vão de uma vez para um trecho contíguo novo (vértices de mundo do
+        # store); só as adaptativas passam pelo caminho por forma (_write)
+        st = state.shapes
+        new = [st.handle(r) for r in rows.tolist()]
+        adaptive = np.fromiter((s.adaptive for s in new), dtype=bool, count=len(new))
+        firsts = np.empty(len(new), dtype=np.int32)
+        counts = np.empty(len(new), dtype=np.int32)
+        fixed = np.flatnonzero(~adaptive)
+        if len(fixed):
+            verts, starts, n = st.world_vertices(rows[fixed])
+            base = self._alloc(len(verts), reuse=False)
+            block = self.data[base:base + len(verts)]
+            block[:, 0:2] = verts
+            block[:, 2:5] = np.repeat(st.color[rows[fixed]], n, axis=0)
+            firsts[fixed] = base + starts
+            counts[fixed] = n
+            self.slots.update(zip([new[i] for i in fixed.tolist()],
+                                  zip(firsts[fixed].tolist(), n.tolist())))
+            self.written.append((base, len(verts)))
+        for i in np.flatnonzero(adaptive).tolist():
+            s = new[i]
+            count = len(s.outline_vertices(self.lod_ppu))
+            first = self._alloc(count)
+            self.slots[s] = (first, count)
+            firsts[i], counts[i] = first, count
+            self.dirty.add(s)
+            self.adaptive.append(s)
+        pos = self.order_len
+        self._open(pos, len(new))
+        self.firsts[pos:] = firsts
+        self.counts[pos:] = counts
+        self.order_pos.update(zip(new, range(pos, pos + len(new))))
+        self.order_shapes.extend(new)
+        self.bounds[pos:] = st.world_bounds(rows)
+        filled = [s for s in new if hasattr(s, 'mesh')]
+        if filled:
+            self.filled.extend(filled)
+            self.fill_indices = None
+
+    def _update_lod(self):
+        # Refaz o contorno das formas adaptativas quando o zoom muda mais que
+        # um fator de sqrt(2) (meio nível de detalhe); cada uma escolhe o seu
+        ppu = coords.pixels_per_unit() if state.use_lod else None
+        if ppu == self.lod_ppu or (ppu is not None and self.lod_ppu is not None
+                                   and 0.7 < ppu / self.lod_ppu < 1.42):
+            return
+        self.lod_ppu = ppu
+        self.dirty.update(self.adaptive)
+
+    def _upload(self):
+        self.uploaded_vertices = 0
+        ranges = []
+        if self.moved:
+            moved = [s for s in self.moved if s not in self.dirty]
+            self.moved = set()
+            ranges = self._write_many(moved)
+        if self.dirty:
+            dirty = list(self.dirty)
+            self.dirty.clear()  # _write pode realocar (e tirar do conjunto) trechos
+            ranges += [self._write(s) for s in dirty]
+        ranges = sorted(ranges + self.written)
+        self.written = []
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self.gpu_capacity < len(self.data):
+            glBufferData(GL_ARRAY_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+            self.gpu_capacity = len(self.data)
+            self.full_upload = True
+
+        if self.full_upload:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, self.used * STRIDE, self.data[:self.used])
+            self.uploaded_vertices = self.used
+            self.full_upload = False
+            return
+
+        # Junta trechos contíguos para reduzir o número de glBufferSubData
+        start = end = None
+        for first, count in ranges + [(None, 0)]:
+            if first is not None and end == first:
+                end = first + count
+                continue
+            if start is not None:
+                glBufferSubData(GL_ARRAY_BUFFER, start * STRIDE, (end - start) * STRIDE,
+                                self.data[start:end])
+                self.uploaded_vertices += end - start
+            if first is not None:
+                start, end = first, first + count
+
+    def _fill_indices(self, shapes=None):
+        # Triângulos de cada polígono deslocados para o seu trecho no VBO,
+        # concatenados de trás para frente (um único glDrawElements).
+        # Só o conjunto completo fica em cache; subconjuntos (layers.py) são raros
+        if shapes is None and self.fill_indices is not None:
+            return self.fill_indices
+        ppu = self.lod_ppu
+        parts = [s.fill_triangles(ppu).ravel() + np.uint32(self.slots[s][0])
+                 for s in (self.filled if shapes is None else shapes)]
+        indices = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+        if shapes is None:
+            self.fill_indices = indices
+        return indices
+
+    def _subset(self, exclude, only):
+        if only is not None:
+            return [s for s in self.filled if s in only]
+        if exclude is not None:
+            return [s for s in self.filled if s not in exclude]
+        return None
+
+    def draw_fill(self, exclude=None, only=None):
+        """Preenchimento translúcido dos polígonos (chamar depois de draw)"""
+        if not self.available:
+            return
+        indices = self._fill_indices(self._subset(exclude, only))
+        if len(indices) == 0:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glPushAttrib(GL_COLOR_BUFFER_BIT)
+        glEnable(GL_BLEND)
+        glBlendColor(0.0, 0.0, 0.0, 0.35)
+        glBlendFunc(GL_CONSTANT_ALPHA, GL_ONE_MINUS_CONSTANT_ALPHA)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(8))
+        glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, indices)
+        glPopAttrib()
+        glPopClientAttrib()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, view_rect=None, exclude=None, only=None):
+        """
+        Desenha as formas que tocam view_rect (todas se None); 'exclude' e
+        'only' (conjuntos de formas) restringem o desenho (cache de camada).
+        Retorna False se VBOs não estiverem disponíveis
+        """
+        if self.available is None:
+            try:
+                self.vbo = glGenBuffers(1)
+                self.available = True
+            except Exception:
+                self.available = False
+        if not self.available:
+            return False
+
+        if self.order_version == -1 and state.use_lod:
+            self.lod_ppu = coords.pixels_per_unit()  # primeira carga já no nível certo
+        self.sync()
+        self._update_lod()
+        self._upload()
+        if self.order_version != scene.order_version:
+            self.sync()  # algum trecho foi realocado durante o envio
+        firsts, counts = self.firsts, self.counts
+        if only is not None:
+            pos = np.array(sorted(self.order_pos[s] for s in only if s in self.order_pos),
+                           dtype=np.int64)
+            firsts, counts = firsts[pos], counts[pos]
+        else:
+            mask = None
+            if view_rect is not None:
+                mask = culling.visible_mask(self.bounds, view_rect)
+            if exclude:
+                if mask is None:
+                    mask = np.ones(len(firsts), dtype=bool)
+                mask[[self.order_pos[s] for s in exclude if s in self.order_pos]] = False
+            if mask is not None:
+                firsts, counts = firsts[mask], counts[mask]
+            culling.stats.record(len(self.firsts), len(firsts))
+        self.drawn_vertices = int(counts.sum())
+        if len(firsts) == 0:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            return True
+
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(8))
+        glLineWidth(1.5)
+        glMultiDrawArrays(GL_LINE_LOOP, firsts, counts, len(firsts))
+        glPopClientAttrib()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return True
+
+
+batch = ShapeBatch()
@@ -0,0 +1,5 @@
+# bench
+# Benchmarks sem janela/GPU dos caminhos críticos do trab3.
+# Uso (a partir de trab3/):  python -m bench [--sizes 10,1000] [--out resultados.json]
+#                            python -m bench --compare antes.json depois.json
+#                            python -m bench.replay sessao.trb3rec [--realtime] [--out resultados.json]
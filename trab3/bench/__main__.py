@@ -0,0 +1,102 @@
+# __main__.py
+# Executa os benchmarks e grava/compara os resultados em JSON.
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from bench import stubs
+
+stubs.install()
+
+import numpy as np  # noqa: E402
+from bench import cases, scenes  # noqa: E402
+
+
+def summarize(times):
+    ms = np.array(times) * 1000
+    return {
+        'runs': len(ms),
+        'mean_ms': float(ms.mean()),
+        'median_ms': float(np.median(ms)),
+        'min_ms': float(ms.min()),
+        'p95_ms': float(np.percentile(ms, 95)),
+    }
+
+
+def run(sizes, selected, budget):
+    results = []
+    for n in sizes:
+        t0 = time.perf_counter()
+        st, extent = scenes.make_store(n)
+        cases.reset_state(st)
+        print(f'--- {n} formas (cena montada em {time.perf_counter() - t0:.2f} s)')
+        for name in selected:
+            times, extra = cases.CASES[name](n, budget)
+            rec = {'case': name, 'size': n, **summarize(times), **extra}
+            results.append(rec)
+            print(f'  {name:30s} mediana {rec["median_ms"]:10.3f} ms  ({rec["runs"]} exec.)')
+    return results
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = {(r['case'], r['size']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {(r['case'], r['size']): r for r in json.load(f)['results']}
+    worse = 0
+    print(f'{"caso":30s} {"tamanho":>9s} {"antes ms":>11s} {"depois ms":>11s} {"razão":>7s}')
+    for key in sorted(old.keys() & new.keys()):
+        a = old[key]['median_ms']
+        b = new[key]['median_ms']
+        ratio = b / a if a > 0 else float('inf')
+        flag = '  <-- mais lento' if ratio > 1 + threshold else ''
+        worse += bool(flag)
+        print(f'{key[0]:30s} {key[1]:9d} {a:11.3f} {b:11.3f} {ratio:7.2f}{flag}')
+    return worse
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        prog='python -m bench',
+        description='Executa os benchmarks do trab3 e grava/compara os resultados em JSON.')
+    p.add_argument('--sizes', default='10,1000,100000,1000000',
+                   help='tamanhos de cena separados por vírgula')
+    p.add_argument('--cases', default=','.join(cases.CASES),
+                   help='casos a executar (padrão: todos)')
+    p.add_argument('--budget', type=float, default=2.0,
+                   help='tempo máximo (s) por caso e tamanho')
+    p.add_argument('--out', default='bench_results.json')
+    p.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'),
+                   help='compara dois arquivos de resultados')
+    p.add_argument('--threshold', type=float, default=0.10,
+                   help='piora relativa marcada na comparação')
+    args = p.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    selected = [c for c in args.cases.split(',') if c]
+    unknown = set(selected) - set(cases.CASES)
+    if unknown:
+        p.error('casos desconhecidos: ' + ', '.join(sorted(unknown)))
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    results = run(sizes, selected, args.budget)
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'budget_s': args.budget,
+    }
+    with open(args.out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print('Resultados em', args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+# cases.py
+# Casos de benchmark. Cada caso recebe o tamanho da cena (já instalada em
+# state.shapes) e devolve (durações em segundos, dados extras).
+
+import time
+import numpy as np
+import glfw
+import state
+import scene
+import shapes
+import coords
+import callbacks
+import rendering
+import batch
+import layers
+import utils
+from bench import scenes
+from bench.stubs import recorder
+
+
+def measure(fn, repeat, budget):
+    """Executa fn até 'repeat' vezes ou até estourar 'budget' segundos (mín. 1)"""
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - start > budget:
+            break
+    return times
+
+
+def _sample(n, limit, seed=0):
+    rng = np.random.default_rng(seed)
+    if n <= limit:
+        return np.arange(n)
+    return np.sort(rng.choice(n, limit, replace=False))
+
+
+def transformed_vertices(n, budget):
+    """Transformação por forma (cache frio) de até 100k formas"""
+    handles = [state.shapes[i] for i in _sample(n, 100_000).tolist()]
+
+    def run():
+        for s in handles:
+            s._matrix = s._world = s._bbox = None
+            s.transformed_vertices()
+
+    times = measure(run, 5, budget)
+    return times, {'shapes_per_run': len(handles),
+                   'us_per_shape': 1e6 * min(times) / max(len(handles), 1)}
+
+
+def transformed_vertices_cached(n, budget):
+    handles = [state.shapes[i] for i in _sample(n, 100_000).tolist()]
+    for s in handles:
+        s.transformed_vertices()
+
+    def run():
+        for s in handles:
+            s.transformed_vertices()
+
+    times = measure(run, 5, budget)
+    return times, {'shapes_per_run': len(handles),
+                   'us_per_shape': 1e6 * min(times) / max(len(handles), 1)}
+
+
+def store_world_vertices(n, budget):
+    """Transformação vetorizada da cena inteira pelo ShapeStore"""
+    rows = state.shapes.rows()
+    times = measure(lambda: state.shapes.world_vertices(rows), 5, budget)
+    return times, {'vertices': int(state.shapes.vcount[rows].sum())}
+
+
+def picking(n, budget):
+    """Clique (press + release) via mouse_button_callback em pontos aleatórios"""
+    rng = np.random.default_rng(1)
+    pts = np.column_stack((rng.uniform(0, state.WINDOW_W, 200),
+                           rng.uniform(0, state.WINDOW_H, 200))).tolist()
+    hits = [0]
+    it = iter(range(10 ** 9))
+
+    def run():
+        glfw.cursor = tuple(pts[next(it) % len(pts)])
+        callbacks.mouse_button_callback(None, glfw.MOUSE_BUTTON_LEFT, glfw.PRESS, 0)
+        if state.selected is not None:
+            hits[0] += 1
+        callbacks.mouse_button_callback(None, glfw.MOUSE_BUTTON_LEFT, glfw.RELEASE, 0)
+        state.selected = None
+
+    times = measure(run, 200, budget)
+    return times, {'hit_ratio': hits[0] / len(times)}
+
+
+def convex_hull(n, budget):
+    """utils.convex_hull sobre até 100k vértices de mundo da cena"""
+    verts, _, _ = state.shapes.world_vertices(state.shapes.rows())
+    pts = [tuple(p) for p in verts[_sample(len(verts), 100_000)].tolist()]
+    hull = []
+
+    def run():
+        hull[:] = utils.convex_hull(pts)
+
+    times = measure(run, 5, budget)
+    return times, {'points': len(pts), 'hull_size': len(hull)}
+
+
+def scroll_zoom(n, budget):
+    """Zoom in/out alternado com scroll_callback"""
+    glfw.cursor = (state.WINDOW_W / 3, state.WINDOW_H / 3)
+    flip = [1]
+
+    def run():
+        flip[0] = -flip[0]
+        callbacks.scroll_callback(None, 0, flip[0])
+
+    times = measure(run, 200, budget)
+    return times, {}
+
+
+def _render(n, budget, use_vbo):
+    state.use_vbo = use_vbo
+    state.global_zoom = 1.0
+    state.global_pan = (0.0, 0.0)
+    recorder.reset()
+    t0 = time.perf_counter()
+    rendering.render(None)
+    first = time.perf_counter() - t0
+    recorder.reset()
+    times = measure(lambda: rendering.render(None), 20, budget)
+    frames = len(times)
+    return times, {
+        'first_frame_ms': first * 1000,
+        'gl_calls_per_frame': recorder.total_calls() / frames,
+        'vertices_per_frame': recorder.vertices / frames,
+    }
+
+
+def render_overview(n, budget):
+    """
+    Cena inteira na tela (zoom para caber) com polígonos detalhados (256
+    vértices): vértices por quadro com e sem LOD, no total e só dos polígonos
+    (triângulos e retângulos não têm o que simplificar e seguram o total)
+    """
+    previous = state.shapes
+    reset_state(scenes.make_store(n, polygon_vertices=256)[0])
+    st = state.shapes
+    b = st.world_bounds(st.rows())
+    state.global_zoom = 2.0 / max(b[:, 1].max() - b[:, 0].min(), b[:, 3].max() - b[:, 2].min())
+    state.global_pan = (-state.global_zoom * (b[:, 0].min() + b[:, 1].max()) / 2,
+                        -state.global_zoom * (b[:, 2].min() + b[:, 3].max()) / 2)
+    extra = {}
+    for use_lod in (False, True):
+        state.use_lod = use_lod
+        rendering.render(None)
+        recorder.reset()
+        times = measure(lambda: rendering.render(None), 10, budget)
+        extra['vertices_per_frame' + ('_lod' if use_lod else '_exact')] = recorder.vertices / len(times)
+    extra['reduction'] = extra['vertices_per_frame_exact'] / max(extra['vertices_per_frame_lod'], 1)
+    # Só os polígonos: contornos com e sem LOD no zoom da visão geral
+    rows = st.rows()
+    polygons = [st.handle(r) for r in rows[st.kind[rows] == shapes.Polygon.kind].tolist()]
+    ppu = coords.pixels_per_unit()
+    extra['polygon_vertices_exact'] = sum(len(s.outline_vertices()) for s in polygons)
+    extra['polygon_vertices_lod'] = sum(len(s.outline_vertices(ppu)) for s in polygons)
+    extra['reduction_polygons'] = extra['polygon_vertices_exact'] / max(extra['polygon_vertices_lod'], 1)
+    reset_state(previous)
+    return times, extra
+
+
+def render_drag(n, budget):
+    """
+    Quadros durante o arrasto de uma forma: vértices por quadro com o fundo
+    no cache de camada (layers.py) e redesenhando a cena inteira
+    """
+    st = state.shapes
+    s = st[len(st) // 2]
+    state.selected = s
+    state.mode_mouse = 'translate'
+    step = [0.001]
+
+    def run():
+        step[0] = -step[0]
+        s.x += step[0]
+        rendering.render(None)
+
+    extra = {}
+    for cached in (False, True):
+        state.use_layer_cache = cached
+        rendering.render(None)
+        recorder.reset()
+        times = measure(run, 20, budget)
+        extra['vertices_per_frame' + ('_cached' if cached else '_full')] = recorder.vertices / len(times)
+    extra['layer_cache'] = layers.cache.summary()
+    state.selected = None
+    state.mode_mouse = None
+    return times, extra
+
+
+def render_click(n, budget):
+    """
+    Quadro depois de um clique que leva uma forma do meio da ordem para a
+    frente (mudança pontual da ordem de desenho, sem reconstruir o lote)
+    """
+    state.use_vbo = True
+    rendering.render(None)
+    st = state.shapes
+    rng = np.random.default_rng(0)
+    rebuilds = batch.batch.rebuilds
+
+    def run():
+        scene.bring_to_front(st[int(rng.integers(len(st)))])
+        rendering.render(None)
+
+    times = measure(run, 20, budget)
+    return times, {'rebuilds': batch.batch.rebuilds - rebuilds}
+
+
+def render_vbo(n, budget):
+    """rendering.render com o VBO em lote (GL falso que só registra as chamadas)"""
+    return _render(n, budget, True)
+
+
+def render_immediate(n, budget):
+    """rendering.render no modo imediato (glBegin/glEnd)"""
+    return _render(n, budget, False)
+
+
+CASES = {
+    'transformed_vertices': transformed_vertices,
+    'transformed_vertices_cached': transformed_vertices_cached,
+    'store_world_vertices': store_world_vertices,
+    'picking': picking,
+    'convex_hull': convex_hull,
+    'scroll_zoom': scroll_zoom,
+    'render_vbo': render_vbo,
+    'render_immediate': render_immediate,
+    'render_overview': render_overview,
+    'render_drag': render_drag,
+    'render_click': render_click,
+}
+
+
+def reset_state(st):
+    """Instala a cena 'st' e volta câmera/seleção ao estado inicial"""
+    state.global_zoom = 1.0
+    state.global_pan = (0.0, 0.0)
+    state.mode_mouse = None
+    state.dragging = False
+    state.use_vbo = True
+    state.use_lod = True
+    state.use_layer_cache = True
+    scene.replace_shapes(st)
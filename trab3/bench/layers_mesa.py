@@ -0,0 +1,160 @@
+# layers_mesa.py
+# Confere o cache de camada (layers.py) com OpenGL de verdade, sem janela:
+# contexto EGL "surfaceless" (Mesa llvmpipe serve). Cada quadro de arrasto
+# desenhado com o fundo em cache tem de ser idêntico, pixel a pixel, ao quadro
+# completo. Os dois são desenhados em FBOs (a rasterização de linhas do
+# pbuffer pode diferir da de uma textura). Sem EGL o teste é pulado.
+# Uso (a partir de trab3/):  python -m bench.layers_mesa
+
+import os
+import sys
+
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+SKIPPED = 77  # código de saída de teste pulado (convenção do automake)
+
+
+def make_context(w, h):
+    """Contexto OpenGL de compatibilidade num pbuffer EGL; None se não houver EGL"""
+    import ctypes
+    try:
+        from OpenGL import EGL
+        dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(dpy, ctypes.pointer(major), ctypes.pointer(minor)):
+            return None
+        attrs = (EGL.EGLint * 11)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                  EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+                                  EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        cfg, n = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(dpy, attrs, ctypes.pointer(cfg), 1, ctypes.pointer(n)) or not n.value:
+            return None
+        surf = EGL.eglCreatePbufferSurface(
+            dpy, cfg, (EGL.EGLint * 5)(EGL.EGL_WIDTH, w, EGL.EGL_HEIGHT, h, EGL.EGL_NONE))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        ctx = EGL.eglCreateContext(dpy, cfg, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(dpy, surf, surf, ctx):
+            return None
+        return dpy, surf, ctx
+    except Exception as e:  # biblioteca EGL ausente, sem dispositivo, etc.
+        print('EGL indisponível:', e)
+        return None
+
+
+def main():
+    trab3 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if trab3 not in sys.path:
+        sys.path.insert(0, trab3)
+    import state
+    if make_context(state.WINDOW_W, state.WINDOW_H) is None:
+        print('pulado: sem contexto OpenGL via EGL')
+        return SKIPPED
+
+    import random
+    import numpy as np
+    import glfw
+    from OpenGL.GL import (glGenFramebuffers, glGenTextures, glBindTexture, glTexImage2D,
+                           glBindFramebuffer, glFramebufferTexture2D, glCheckFramebufferStatus,
+                           glReadPixels, glGetString, GL_TEXTURE_2D, GL_RGBA8, GL_RGBA, GL_RGB,
+                           GL_UNSIGNED_BYTE, GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0,
+                           GL_FRAMEBUFFER_COMPLETE, GL_RENDERER)
+    import scene
+    import shapes
+    import rendering
+    import layers
+    import selection
+
+    glfw.swap_buffers = lambda window: None  # sem janela
+    w, h = state.WINDOW_W, state.WINDOW_H
+    print('Renderer:', glGetString(GL_RENDERER).decode())
+
+    def target():
+        fbo, tex = glGenFramebuffers(1), glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, tex)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, tex, 0)
+        assert glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        return fbo
+
+    cached_fbo, full_fbo = target(), target()
+    layers.cache.screen = cached_fbo
+
+    def frame(fbo, use_cache):
+        state.use_layer_cache = use_cache
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+        rendering.render(None)
+        pixels = glReadPixels(0, 0, w, h, GL_RGB, GL_UNSIGNED_BYTE)
+        return np.frombuffer(pixels, np.uint8).reshape(h, w, 3)
+
+    random.seed(3)
+    for i in range(1500):
+        s = random.choice([shapes.Triangle, shapes.Rectangle, shapes.Circle])()
+        s.x, s.y = random.uniform(-1, 1), random.uniform(-1, 1)
+        s.rotation = random.uniform(0, 360)
+        s.color = (random.random() * 0.5, 0.0, random.random() * 0.5)
+        scene.add_shape(s)
+    for i in range(20):
+        pts = [(0.1 * np.cos(a) * random.uniform(0.5, 1), 0.1 * np.sin(a) * random.uniform(0.5, 1))
+               for a in np.linspace(0, 2 * np.pi, 40, endpoint=False)]
+        p = shapes.Polygon(pts)
+        p.x, p.y = random.uniform(-1, 1), random.uniform(-1, 1)
+        p.color = (0.0, 0.4, 0.2)
+        scene.add_shape(p)
+
+    # As formas ativas são desenhadas por cima das demais durante o arrasto:
+    # o quadro completo só é idêntico se elas já estiverem na frente
+    st = state.shapes
+    moving = st[len(st) // 2]
+    scene.bring_to_front(moving)
+    failures = 0
+
+    def check(tag, rebuilt):
+        nonlocal failures
+        before = layers.cache.rebuilds
+        cached = frame(cached_fbo, True)
+        after = layers.cache.rebuilds
+        full = frame(full_fbo, False)
+        diff = int((cached != full).any(axis=2).sum())
+        ok = diff == 0 and (after > before) == rebuilt
+        failures += not ok
+        print(f'  {tag:28s} pixels diferentes {diff:6d}  fundo redesenhado {after > before}'
+              f'  {"ok" if ok else "FALHOU"}')
+
+    for use_vbo in (True, False):
+        state.use_vbo = use_vbo
+        print('VBO em lote' if use_vbo else 'modo imediato')
+        state.selected, state.mode_mouse = moving, 'translate'
+        state.global_zoom, state.global_pan = 1.0, (0.0, 0.0)
+        state.fill_polygons = False
+        check('início do arrasto', True)
+        for k in range(3):
+            moving.x += 0.03
+            check(f'arrasto passo {k + 1}', False)
+        st[7].x += 0.1
+        check('outra forma mudou', True)
+        state.global_zoom, state.global_pan = 2.0, (0.3, -0.2)
+        check('câmera mudou', True)
+        state.fill_polygons = True
+        check('polígonos preenchidos', True)
+        moving.rotation += 15
+        check('giro', False)
+
+        state.selected = None
+        selection.set_group([st[i] for i in range(len(st) - 40, len(st))])
+        state.mode_mouse = 'group_translate'
+        check('arrasto de grupo', True)
+        st.translate(st.rows_of(state.group), 0.02, 0.01)
+        check('grupo movido', False)
+        selection.set_group([])
+        state.mode_mouse = None
+
+    print('Cache:', layers.cache.summary())
+    print('ok' if not failures else f'{failures} verificações falharam')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
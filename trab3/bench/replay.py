@@ -0,0 +1,185 @@
+# replay.py
+# Reproduz uma sessão gravada (recording.py) sem janela nem GPU: os eventos
+# vão direto para os callbacks com o glfw falso (stubs.py), o mais rápido
+# possível ou no ritmo original. Mede a latência de cada callback e confere
+# o checksum final do estado com o da gravação.
+# Uso (a partir de trab3/):  python -m bench.replay sessao.trb3rec [--realtime] [--render]
+#                            [--out resultados.json]   (comparável com python -m bench --compare)
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+from bench import stubs
+
+glfw = stubs.install()
+
+import numpy as np  # noqa: E402
+import state  # noqa: E402
+import scene  # noqa: E402
+import scenefile  # noqa: E402
+import callbacks  # noqa: E402
+import motion  # noqa: E402
+import stream  # noqa: E402
+import rendering  # noqa: E402
+import recording  # noqa: E402
+from store import ShapeStore  # noqa: E402
+
+CALLBACKS = {
+    recording.MOUSE_BUTTON: callbacks.mouse_button_callback,
+    recording.CURSOR_POS: callbacks.cursor_pos_callback,
+    recording.KEY: callbacks.key_callback,
+    recording.SCROLL: callbacks.scroll_callback,
+}
+
+
+def _scene_path(header, path, override):
+    if override is not None:
+        return override
+    scene_path = header.get('scene')
+    if scene_path and not os.path.exists(scene_path):
+        # Gravação movida junto com a cena: procura ao lado do arquivo gravado
+        near = os.path.join(os.path.dirname(os.path.abspath(path)), os.path.basename(scene_path))
+        if os.path.exists(near):
+            return near
+    return scene_path
+
+
+def setup(header, scene_path):
+    """Estado inicial da gravação; retorna False se o checksum inicial não confere"""
+    for name, value in header['constants'].items():
+        setattr(glfw, name, value)  # códigos de teclas/botões do glfw de verdade
+    state.WINDOW_W, state.WINDOW_H = header['window']
+    state.global_zoom = header['zoom']
+    state.global_pan = tuple(header['pan'])
+    scene.install(scenefile.load(scene_path) if scene_path else ShapeStore())
+    return recording.state_checksum() == header['initial_checksum']
+
+
+def _finish_stream():
+    # Carga em partes (tecla L) iniciada na sessão: termina antes do próximo
+    # evento, para o resultado não depender do ritmo da thread de leitura
+    while stream.loader.active:
+        if not stream.loader.step(budget=float('inf')):
+            time.sleep(0.001)
+
+
+def replay(events, realtime=False, render=False):
+    """
+    Entrega os eventos aos callbacks. Retorna as latências (s) por tipo de
+    evento e o checksum gravado no fim da sessão (None se a gravação foi
+    interrompida)
+    """
+    latencies = {name: [] for name in recording.NAMES[:recording.END]}
+    recorded = None
+    t0 = time.perf_counter()
+    for kind, t, values in events:
+        if kind == recording.END:
+            recorded = values[0].hex()
+            break
+        if realtime:
+            wait = t0 + t - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        glfw._time = t
+        if kind == recording.CURSOR_POS:
+            glfw.cursor = values
+        elif kind != recording.FRAME:
+            glfw.cursor = values[-2:]
+            values = values[:-2]
+        start = time.perf_counter()
+        if kind == recording.FRAME:
+            # Como no laço (scheduler.py): movimento pendente e então o quadro
+            _finish_stream()
+            motion.queue.flush()
+            if render:
+                rendering.render(None)
+        else:
+            CALLBACKS[kind](None, *values)
+        latencies[recording.NAMES[kind]].append(time.perf_counter() - start)
+    _finish_stream()
+    motion.queue.flush()
+    return latencies, recorded
+
+
+def summarize(times):
+    ms = np.array(times) * 1000
+    return {
+        'runs': len(ms),
+        'mean_ms': float(ms.mean()),
+        'median_ms': float(np.median(ms)),
+        'min_ms': float(ms.min()),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        prog='python -m bench.replay',
+        description='Reproduz uma sessão gravada (main.py --record) sem janela e confere o checksum.')
+    p.add_argument('recording', help='arquivo gravado com python main.py --record')
+    p.add_argument('--scene', default=None, help='cena inicial (padrão: a do cabeçalho)')
+    p.add_argument('--realtime', action='store_true', help='respeita os tempos originais')
+    p.add_argument('--render', action='store_true',
+                   help='desenha cada quadro gravado (GL falso) e mede o tempo')
+    p.add_argument('--verbose', action='store_true', help='mostra as mensagens dos callbacks')
+    p.add_argument('--out', default=None, help='grava os resultados em JSON')
+    args = p.parse_args(argv)
+
+    try:
+        header, events = recording.read(args.recording)
+    except (OSError, recording.RecordingError) as e:
+        p.error(str(e))
+    if not setup(header, _scene_path(header, args.recording, args.scene)):
+        print('Aviso: a cena inicial difere da gravada', file=sys.stderr)
+    size = len(state.shapes)
+
+    t0 = time.perf_counter()
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    with quiet:
+        latencies, recorded = replay(events, args.realtime, args.render)
+    elapsed = time.perf_counter() - t0
+    checksum = recording.state_checksum()
+
+    results = []
+    n = sum(len(v) for v in latencies.values())
+    print(f'{n} eventos em {elapsed:.3f} s ({n / elapsed if elapsed > 0 else 0:.0f} eventos/s), '
+          f'{size} formas no início')
+    for name, times in latencies.items():
+        if times:
+            rec = {'case': 'replay.' + name, 'size': size, **summarize(times)}
+            results.append(rec)
+            print(f'  {name:14s} {rec["runs"]:7d}  mediana {rec["median_ms"]:8.3f} ms  '
+                  f'p95 {rec["p95_ms"]:8.3f} ms  máx {rec["max_ms"]:8.3f} ms')
+    match = recorded is not None and checksum == recorded
+    print('Checksum final:', checksum)
+    if recorded is None:
+        print('Gravação sem checksum final (interrompida)')
+    else:
+        print('Confere com a gravação' if match else f'DIFERENTE da gravação ({recorded})')
+
+    if args.out:
+        meta = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'recording': args.recording,
+            'realtime': args.realtime,
+            'render': args.render,
+            'checksum': checksum,
+            'checksum_matches': match,
+        }
+        with open(args.out, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print('Resultados em', args.out)
+    return 0 if match or recorded is None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# scenes.py
+# Geração de cenas sintéticas com tipos de forma misturados.
+
+import numpy as np
+import shapes
+from store import ShapeStore
+
+# Proporção de cada tipo nas cenas geradas
+MIX = ((shapes.Triangle, 0.35), (shapes.Rectangle, 0.35), (shapes.Circle, 0.2), (shapes.Polygon, 0.1))
+
+
+def _polygon(rng, k):
+    a = np.sort(rng.uniform(0, 2 * np.pi, k))
+    r = rng.uniform(0.05, 0.15, k)
+    return np.column_stack((np.cos(a) * r, np.sin(a) * r))
+
+
+def _detailed_polygon(rng, k):
+    # Contorno suave (poucas harmônicas) com ruído fino, como um contorno importado
+    a = np.linspace(0, 2 * np.pi, k, endpoint=False)
+    r = np.full(k, 0.1)
+    for h in range(2, 6):
+        r += rng.uniform(-0.01, 0.01) * np.cos(h * a + rng.uniform(0, 2 * np.pi))
+    r += rng.uniform(-0.002, 0.002, k)
+    return np.column_stack((np.cos(a) * r, np.sin(a) * r))
+
+
+def make_store(n, seed=0, extent=None, polygon_vertices=None):
+    """
+    Cena com n formas espalhadas num quadrado de lado 'extent' (por padrão
+    cresce com n para manter a densidade parecida). Nenhum handle é criado.
+    'polygon_vertices' troca os polígonos (5 a 12 vértices aleatórios) por
+    contornos detalhados com esse nº de vértices.
+    """
+    rng = np.random.default_rng(seed)
+    if extent is None:
+        extent = max(2.0, np.sqrt(n) * 0.25)
+    classes = [c for c, _ in MIX]
+    weights = np.array([w for _, w in MIX])
+    kinds = rng.choice(len(classes), size=n, p=weights / weights.sum())
+
+    protos = {
+        shapes.Triangle: shapes.Triangle().base_vertices,
+        shapes.Rectangle: shapes.Rectangle().base_vertices,
+        shapes.Circle: shapes.Circle().base_vertices,
+    }
+    parts = []
+    for k in kinds.tolist():
+        cls = classes[k]
+        if cls in protos:
+            parts.append(protos[cls])
+        elif polygon_vertices:
+            parts.append(_detailed_polygon(rng, polygon_vertices))
+        else:
+            parts.append(_polygon(rng, int(rng.integers(5, 13))))
+    counts = np.array([len(p) for p in parts], dtype=np.int64)
+    verts = np.concatenate(parts) if parts else np.zeros((0, 2))
+
+    st = ShapeStore()
+    st.bulk_insert(
+        np.array([classes[k].kind for k in kinds], dtype=np.int8), verts, counts,
+        x=rng.uniform(-extent / 2, extent / 2, n),
+        y=rng.uniform(-extent / 2, extent / 2, n),
+        rotation=rng.uniform(0, 360, n),
+        scale_x=rng.uniform(0.5, 1.5, n),
+        scale_y=rng.uniform(0.5, 1.5, n),
+        color=rng.uniform(0, 0.6, (n, 3)),
+    )
+    return st, extent
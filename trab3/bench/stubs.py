@@ -0,0 +1,142 @@
+# stubs.py
+# Substitutos de OpenGL.GL e glfw para rodar o trab3 sem janela nem GPU.
+# Devem ser instalados (install()) antes de importar qualquer módulo do trab3.
+
+import os
+import re
+import sys
+import types
+from collections import Counter
+
+TRAB3_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class GLRecorder:
+    """Conta as chamadas GL feitas e os vértices enviados"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()
+        self.vertices = 0
+        self._next_id = 1
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id - 1
+
+
+recorder = GLRecorder()
+
+# Funções GL que devolvem algo útil para o código chamador
+_RETURNS = {
+    'glGenBuffers': lambda *a: recorder.new_id(),
+    'glGenTextures': lambda *a: recorder.new_id(),
+    'glGenFramebuffers': lambda *a: recorder.new_id(),
+}
+
+
+def _gl_function(name):
+    special = _RETURNS.get(name)
+
+    def fn(*args):
+        recorder.calls[name] += 1
+        if name == 'glVertex2f':
+            recorder.vertices += 1
+        elif name == 'glDrawArrays':
+            recorder.vertices += int(args[2])
+        elif name == 'glMultiDrawArrays':
+            recorder.vertices += int(sum(args[2][:args[3]]))
+        if special is not None:
+            return special(*args)
+        return None
+
+    fn.__name__ = name
+    return fn
+
+
+def _used_gl_names():
+    names = set()
+    pattern = re.compile(r'\b(gl[A-Z]\w*|GL_\w+)\b')
+    for root, _, files in os.walk(TRAB3_DIR):
+        for f in files:
+            if f.endswith('.py'):
+                with open(os.path.join(root, f), encoding='utf-8') as fh:
+                    names.update(pattern.findall(fh.read()))
+    return names
+
+
+def make_gl_module():
+    gl = types.ModuleType('OpenGL.GL')
+    names = sorted(_used_gl_names())
+    for i, name in enumerate(names):
+        if name.startswith('GL_'):
+            setattr(gl, name, 1 << (i % 31) if name.endswith('_BIT') else 0x10000 + i)
+        else:
+            setattr(gl, name, _gl_function(name))
+    gl.GL_FRAMEBUFFER_COMPLETE = getattr(gl, 'GL_FRAMEBUFFER_COMPLETE', 0x8CD5)
+    if 'glCheckFramebufferStatus' in names:
+        gl.glCheckFramebufferStatus = lambda *a: gl.GL_FRAMEBUFFER_COMPLETE
+    gl.__all__ = names
+    return gl
+
+
+class _Glfw(types.ModuleType):
+    """glfw falso: constantes geradas sob demanda e cursor controlável"""
+
+    PRESS = 1
+    RELEASE = 0
+    REPEAT = 2
+    MOUSE_BUTTON_LEFT = 0
+    MOUSE_BUTTON_RIGHT = 1
+    MOUSE_BUTTON_MIDDLE = 2
+    MOD_SHIFT = 0x0001
+    MOD_CONTROL = 0x0002
+    MOD_ALT = 0x0004
+    TRUE = 1
+    FALSE = 0
+
+    def __init__(self):
+        super().__init__('glfw')
+        self.cursor = (0.0, 0.0)
+        self._consts = {}
+        self._time = 0.0
+
+    def __getattr__(self, name):
+        if name.isupper() or name.startswith(('KEY_', 'MOUSE_')):
+            return self._consts.setdefault(name, 1000 + len(self._consts))
+        raise AttributeError(name)
+
+    def get_cursor_pos(self, window):
+        return self.cursor
+
+    def get_time(self):
+        return self._time
+
+    def swap_buffers(self, window):
+        pass
+
+    def poll_events(self):
+        pass
+
+    def wait_events_timeout(self, timeout):
+        pass
+
+    def window_should_close(self, window):
+        return True
+
+
+def install():
+    """Instala os stubs em sys.modules e coloca trab3/ no caminho de import"""
+    if TRAB3_DIR not in sys.path:
+        sys.path.insert(0, TRAB3_DIR)
+    opengl = types.ModuleType('OpenGL')
+    opengl.GL = make_gl_module()
+    sys.modules['OpenGL'] = opengl
+    sys.modules['OpenGL.GL'] = opengl.GL
+    sys.modules['glfw'] = _Glfw()
+    return sys.modules['glfw']
@@ -5,6 +5,15 @@ import glfw
 import math
 import state
 import coords
+import scene
+import scenefile
+import raster
+import stream
+import profiling
+import history
+import picking
+import motion
+import selection
 from shapes import Triangle, Rectangle, Circle, Polygon
 from utils import rotate_point, inverse_rotate_point
 
@@ -22,33 +31,16 @@ def finalize_drawing():
 
     s = Polygon(local_pts)
     s.x, s.y = (cx, cy)
-    state.shapes.append(s)
+    scene.add_shape(s)
 
     state.drawing_points = []
     state.mode_mouse = None
 
 
-def mouse_over_handle(s, wx, wy, idx, size=0.035):
-    try:
-        # Tamanho do handle deve ser independente do zoom
-        # Vamos calcular o tamanho em pixels e converter para mundo
-        handle_size_world = size / state.global_zoom 
-        
-        hx, hy = s.get_handles_world()[idx]
-        return abs(wx - hx) <= handle_size_world and abs(wy - hy) <= handle_size_world
-    except IndexError:
-        return False
-
-
-def mouse_over_rotation_handle(s, wx, wy, radius=0.04):
-    # Tamanho do handle independente do zoom
-    radius_world = radius / state.global_zoom
-    
-    rx, ry = s.rotation_handle_world()
-    return (wx - rx)**2 + (wy - ry)**2 <= radius_world**2
-
-
+@profiling.timed('cb.mouse_button')
 def mouse_button_callback(window, button, action, mods):
+    motion.queue.flush() # eventos chegam na ordem: aplica o movimento pendente antes
+    state.needs_redraw = True
     x, y = glfw.get_cursor_pos(window)
     # Conversão de 2 passos
     vx, vy = coords.window_to_view(x, y)
@@ -70,7 +62,7 @@ def mouse_button_callback(window, button, action, mods):
             
             s = Circle(radius=max(radius, 0.01)) # Evita raio zero
             s.x, s.y = cx, cy
-            state.shapes.append(s)
+            scene.add_shape(s)
             state.selected = s
             print("Círculo criado.")
             
@@ -99,60 +91,33 @@ def mouse_button_callback(window, button, action, mods):
             state.prev_mouse = (vx, vy) 
             return # Ignora seleção/etc
             
-        found = None
-        found_handle = None
-        found_rotation = False
-        
-        for s in reversed(state.shapes):
-            if state.selected is not None and s == state.selected: 
-                 handles = s.get_handles_world()
-                 for i in range(len(handles)):
-                    if mouse_over_handle(s, wx, wy, i):
-                        found = s
-                        found_handle = i
-                        break
-                 if found_handle is not None:
-                     break
-                 if mouse_over_rotation_handle(s, wx, wy):
-                    found = s
-                    found_rotation = True
-                    break
-            
-            if found_handle is None and not found_rotation:
-                if s.contains(wx, wy):
-                    found = s
-                    break
-
-        if found is None and state.selected is not None:
-             handles = state.selected.get_handles_world()
-             for i in range(len(handles)):
-                if mouse_over_handle(state.selected, wx, wy, i):
-                    found = state.selected
-                    found_handle = i
-                    break
-             if found_handle is None:
-                if mouse_over_rotation_handle(state.selected, wx, wy):
-                    found = state.selected
-                    found_rotation = True
-        
-        elif found is not None and found != state.selected:
-             handles = found.get_handles_world()
-             for i in range(len(handles)):
-                if mouse_over_handle(found, wx, wy, i):
-                    found_handle = i
-                    break
-             if found_handle is None:
-                if mouse_over_rotation_handle(found, wx, wy):
-                    found_rotation = True
-                    
+        # Seleção múltipla: handles/rotação do grupo ou corpo de um membro arrastam o grupo
+        if state.group and button == glfw.MOUSE_BUTTON_LEFT and not mods & glfw.MOD_SHIFT:
+            mode, handle = selection.pick(wx, wy)
+            if mode is not None:
+                history.begin_group()
+                selection.begin_drag(mode, wx, wy, handle)
+                history.begin_transform(state.group)
+                state.dragging = True
+                return
+
+        # Handle, handle de rotação e corpo resolvidos em uma única passada
+        found, found_handle, found_rotation = picking.pick(wx, wy)
+
+        # Shift+clique adiciona/remove a forma da seleção
+        if mods & glfw.MOD_SHIFT and found is not None and found_handle is None and not found_rotation:
+            selection.toggle(found)
+            return
+
+        # Clique + arrasto viram uma única entrada no histórico
+        history.begin_group()
+
         # Traz o objeto para a "frente"
         if found is not None:
-            state.selected = found
-            if state.selected in state.shapes:
-                state.shapes.remove(state.selected)
-                state.shapes.append(state.selected)
+            selection.set_group([found])
+            scene.bring_to_front(found)
         else:
-            state.selected = None # Clicar fora desseleciona
+            selection.set_group([]) # Clicar fora desseleciona
 
         state.prev_mouse = (wx, wy) # Padrão é coords de MUNDO
         state.dragging = True
@@ -168,7 +133,7 @@ def mouse_button_callback(window, button, action, mods):
                 4: 6, 5: 7, 6: 4, 7: 5,
             }
             
-            local_base_handles = state.selected.get_handles_local_base()
+            local_base_handles = picking.gizmo(state.selected).local
             state.resizing_orig_handle_base = local_base_handles[state.resizing_handle_idx]
             state.resizing_anchor = local_base_handles[opposite_idx[state.resizing_handle_idx]]
             
@@ -189,14 +154,24 @@ def mouse_button_callback(window, button, action, mods):
             state.mode_mouse = 'rotate'
 
         else:
-            if state.selected is not None and state.selected.contains(wx, wy):
-                state.mode_mouse = 'translate'
+            if found is not None:
+                state.mode_mouse = 'translate' # picking já testou o corpo da forma
+            elif mods & glfw.MOD_ALT:
+                # Arrastar no vazio seleciona por laço (com Alt) ou por retângulo
+                state.mode_mouse = 'lasso_select'
+                state.lasso_points = [(wx, wy)]
             else:
-                state.mode_mouse = None
-                state.selected = None # Garante deseleção se clicou no nada
+                state.mode_mouse = 'box_select'
+                state.select_start = (wx, wy)
+
+        if state.mode_mouse in ('resize', 'rotate', 'translate'):
+            history.begin_transform(state.selected)
+        else:
+            history.end_group()
 
     elif action == glfw.RELEASE:
         state.dragging = False
+        history.end_group() # Fecha o arrasto (se houve) no histórico
         
         # Só reseta o modo se estiver em um modo de interação (não desenho)
         if state.resizing:
@@ -210,9 +185,26 @@ def mouse_button_callback(window, button, action, mods):
             state.mode_mouse = None
         elif state.mode_mouse == 'pan': # Reseta o modo Pan
             state.mode_mouse = None
+        elif state.mode_mouse == 'box_select':
+            selection.set_group(selection.in_rect(state.select_start, (wx, wy)))
+            state.select_start = None
+            state.mode_mouse = None
+        elif state.mode_mouse == 'lasso_select':
+            selection.set_group(selection.in_lasso(state.lasso_points))
+            state.lasso_points = []
+            state.mode_mouse = None
+        elif state.mode_mouse in ('group_translate', 'group_rotate', 'group_resize'):
+            selection.end_drag()
+            state.mode_mouse = None
             
 
 def cursor_pos_callback(window, xpos, ypos):
+    # Só enfileira: a posição mais recente é aplicada uma vez por quadro
+    motion.queue.push(window, xpos, ypos)
+
+
+@profiling.timed('cb.cursor_pos')
+def apply_cursor_pos(window, xpos, ypos):
     # Conversão de 2 passos
     vx, vy = coords.window_to_view(xpos, ypos)
     wx, wy = coords.view_to_world(vx, vy)
@@ -223,6 +215,9 @@ def cursor_pos_callback(window, xpos, ypos):
         state.prev_mouse = (wx, wy) # Padrão é MUNDO
         return
 
+    # Arrastos e previews de desenho dependem da posição do mouse
+    state.needs_redraw = True
+
     # Lógica de Pan
     if state.mode_mouse == 'pan' and state.dragging:
         px, py = state.prev_mouse # Coords de VISUALIZAÇÃO
@@ -234,20 +229,25 @@ def cursor_pos_callback(window, xpos, ypos):
         state.prev_mouse = (vx, vy) # Atualiza pos de VISUALIZAÇÃO
         return
 
-    if state.mode_mouse == 'translate' and state.dragging and state.selected is not None:
+    if state.mode_mouse in ('group_translate', 'group_rotate', 'group_resize') and state.group_drag:
+        selection.drag_to(wx, wy) # uma única atualização afim para o grupo todo
+
+    elif state.mode_mouse == 'lasso_select':
+        state.lasso_points.append((wx, wy))
+
+    elif state.mode_mouse == 'translate' and state.dragging and state.selected is not None:
         px, py = state.prev_mouse # Coords de MUNDO
         dx = wx - px
         dy = wy - py
-        state.selected.x += dx
-        state.selected.y += dy
+        x, y, rot, sx, sy = state.selected.get_transform()
+        state.selected.set_transform((x + dx, y + dy, rot, sx, sy)) # uma só invalidação
         state.prev_mouse = (wx, wy) # Atualiza pos de MUNDO
 
     elif state.mode_mouse == 'rotate' and state.rotating and state.selected is not None:
-        cx = state.selected.x
-        cy = state.selected.y
+        cx, cy, _, sx, sy = state.selected.get_transform()
         ang_now = math.atan2(wy - cy, wx - cx)
         delta = ang_now - state.rotation_start_angle
-        state.selected.rotation = (state.rotation_orig + math.degrees(delta)) % 360
+        state.selected.set_transform((cx, cy, (state.rotation_orig + math.degrees(delta)) % 360, sx, sy))
 
     elif state.mode_mouse == 'resize' and state.resizing and state.selected is not None:
         # --- LÓGICA DE RESIZE CORRIGIDA ---
@@ -280,23 +280,23 @@ def cursor_pos_callback(window, xpos, ypos):
         elif handle_type in (5, 7): # left-center, right-center
              new_sy = state.selected.scale_y
 
-        state.selected.scale_x = new_sx
-        state.selected.scale_y = new_sy
-        
         ax, ay = state.resizing_anchor
         sax = ax * new_sx
         say = ay * new_sy
-        rsax, rsay = rotate_point(sax, say, state.selected.rotation)
+        rotation = state.selected.rotation
+        rsax, rsay = rotate_point(sax, say, rotation)
         
-        state.selected.x = awx - rsax
-        state.selected.y = awy - rsay
+        # Escala e posição de uma vez (uma só invalidação por passo)
+        state.selected.set_transform((awx - rsax, awy - rsay, rotation, new_sx, new_sy))
         # --- FIM DA LÓGICA DE RESIZE ---
 
     if state.mode_mouse not in ('rotate', 'resize', 'pan'):
         state.prev_mouse = (wx, wy)
 
 
+@profiling.timed('cb.key')
 def key_callback(window, key, scancode, action, mods):
+    motion.queue.flush() # eventos chegam na ordem: aplica o movimento pendente antes
     x, y = glfw.get_cursor_pos(window)
     # Conversão de 2 passos
     vx, vy = coords.window_to_view(x, y)
@@ -304,6 +304,7 @@ def key_callback(window, key, scancode, action, mods):
 
     if action != glfw.PRESS:
         return
+    state.needs_redraw = True
 
     # --- Primeiro, checa se está em modo de desenho ---
     if state.mode_mouse in ('drawing_polygon', 'drawing_circle_center', 'drawing_circle_radius'):
@@ -318,18 +319,29 @@ def key_callback(window, key, scancode, action, mods):
     # --- Se não está em modo de desenho, processa teclas normais ---
     
     if key == glfw.KEY_ESCAPE:
-        state.selected = None
+        selection.set_group([])
         print("Seleção limpa.")
         return
 
+    if key == glfw.KEY_Z and mods & glfw.MOD_CONTROL:
+        # Ctrl+Shift+Z também refaz
+        done = history.redo() if mods & glfw.MOD_SHIFT else history.undo()
+        if not done:
+            print('Nada para desfazer/refazer.')
+        return
+    if key == glfw.KEY_Y and mods & glfw.MOD_CONTROL:
+        if not history.redo():
+            print('Nada para refazer.')
+        return
+
     if key == glfw.KEY_1:
         s = Triangle()
         s.x, s.y = wx, wy
-        state.shapes.append(s)
+        scene.add_shape(s)
     elif key == glfw.KEY_2:
         s = Rectangle()
         s.x, s.y = wx, wy
-        state.shapes.append(s)
+        scene.add_shape(s)
     elif key == glfw.KEY_3:
         state.mode_mouse = 'drawing_circle_center'
         state.drawing_circle_pt_center = None
@@ -339,19 +351,84 @@ def key_callback(window, key, scancode, action, mods):
         state.mode_mouse = 'drawing_polygon'
         print('Modo: desenhar polígono — clique para adicionar vértices, botão direito para finalizar')
     elif key in (glfw.KEY_DELETE, glfw.KEY_BACKSPACE):
-        if state.selected and state.selected in state.shapes:
-            state.shapes.remove(state.selected)
-            state.selected = None
+        if state.selected is not None:
+            scene.remove_shape(state.selected)
+        elif state.group:
+            group = state.group
+            selection.set_group([])
+            history.begin_group() # apagar o grupo é uma única ação
+            for s in group:
+                scene.remove_shape(s)
+            history.end_group()
+    elif key in (glfw.KEY_HOME, glfw.KEY_END, glfw.KEY_PAGE_UP, glfw.KEY_PAGE_DOWN):
+        # Ordem de desenho: Home/End = frente/fundo, PageUp/PageDown = um passo
+        if state.selected is not None:
+            if key == glfw.KEY_HOME:
+                scene.bring_to_front(state.selected)
+            elif key == glfw.KEY_END:
+                scene.send_to_back(state.selected)
+            else:
+                scene.step_z(state.selected, 1 if key == glfw.KEY_PAGE_UP else -1)
+    elif key == glfw.KEY_S:
+        try:
+            n, nverts = scenefile.save(state.scene_path, state.shapes)
+        except (OSError, scenefile.SceneFileError) as e:
+            print('Erro ao salvar cena:', e)
+        else:
+            print(f'Cena salva em {state.scene_path} ({n} formas, {nverts} vértices).')
+    elif key == glfw.KEY_L:
+        # Carga em partes: a cena aparece enquanto o arquivo é lido
+        try:
+            total = scenefile.count(state.scene_path)
+        except (OSError, scenefile.SceneFileError) as e:
+            print('Erro ao carregar cena:', e)
+        else:
+            stream.loader.start(scenefile.iter_chunks(state.scene_path), total)
+            print(f'Carregando {state.scene_path} ({total} formas)...')
+    elif key == glfw.KEY_E:
+        try:
+            raster.write_png(state.export_path, raster.render())
+        except OSError as e:
+            print('Erro ao exportar imagem:', e)
+        else:
+            print('Imagem exportada em', state.export_path)
+    elif key == glfw.KEY_P:
+        # Liga/desliga a instrumentação junto com o HUD
+        state.show_hud = not state.show_hud
+        profiling.enabled = state.show_hud
+        if not state.show_hud:
+            print(profiling.report())
+    elif key == glfw.KEY_O:
+        try:
+            profiling.dump(state.profile_path)
+        except OSError as e:
+            print('Erro ao salvar perfil:', e)
+        else:
+            print('Perfil salvo em', state.profile_path)
+    elif key == glfw.KEY_V:
+        state.use_vbo = not state.use_vbo
+        print('Renderização:', 'VBO em lote' if state.use_vbo else 'modo imediato')
+    elif key == glfw.KEY_F:
+        state.fill_polygons = not state.fill_polygons
+        print('Preenchimento dos polígonos:', 'ligado' if state.fill_polygons else 'desligado')
+    elif key == glfw.KEY_D:
+        state.use_lod = not state.use_lod
+        state.needs_redraw = True
+        print('Nível de detalhe (LOD):', 'ligado' if state.use_lod else 'desligado')
+    elif key == glfw.KEY_B:
+        state.use_layer_cache = not state.use_layer_cache
+        print('Cache de camada nos arrastos:', 'ligado' if state.use_layer_cache else 'desligado')
     elif key == glfw.KEY_C:
-        state.shapes = []
-        state.selected = None
+        scene.clear()
         state.drawing_points = []
         state.drawing_circle_pt_center = None
         state.mode_mouse = None
         print("Canvas limpo.")
 
 
+@profiling.timed('cb.scroll')
 def scroll_callback(window, xoffset, yoffset):
+    motion.queue.flush()
     # 1. Obtém a posição do mouse na visualização (-1 a 1)
     x, y = glfw.get_cursor_pos(window)
     vx, vy = coords.window_to_view(x, y)
@@ -373,6 +450,7 @@ def scroll_callback(window, xoffset, yoffset):
     
     if state.global_zoom == old_zoom:
         return # Não houve mudança (atingiu o limite)
+    state.needs_redraw = True
         
     # 4. Ajusta o pan para que o ponto do mundo sob o cursor permaneça o mesmo
     # new_pan = view_mouse - (world_mouse * new_zoom)
@@ -383,4 +461,7 @@ def scroll_callback(window, xoffset, yoffset):
     state.global_pan = (new_pan_x, new_pan_y)
 
     # Atualiza a posição global do mouse no mundo (importante!)
-    cursor_pos_callback(window, x, y)
\ No newline at end of file
+    apply_cursor_pos(window, x, y)
+
+
+motion.queue.handler = apply_cursor_pos
@@ -0,0 +1,57 @@
+# conftest.py
+# Comum aos testes do trab3: OpenGL e glfw falsos (bench/stubs.py) instalados
+# antes de qualquer módulo do trab3 ser importado, cena vazia a cada teste e
+# um gerador de formas aleatórias.
+
+import numpy as np
+import pytest
+
+from bench import stubs
+
+stubs.install()
+
+import state  # noqa: E402
+import scene  # noqa: E402
+import shapes  # noqa: E402
+import history  # noqa: E402
+import selection  # noqa: E402
+from store import ShapeStore  # noqa: E402
+
+
+def random_shape(rng, polygon_vertices=(6,)):
+    """
+    Triângulo, retângulo, círculo ou polígono (elipse com k vértices, k
+    sorteado de polygon_vertices) em posição, giro e cor aleatórios; rng é um
+    random.Random
+    """
+    kind = rng.randrange(4)
+    if kind == 0:
+        s = shapes.Triangle(rng.uniform(0.05, 0.3))
+    elif kind == 1:
+        s = shapes.Rectangle(rng.uniform(0.05, 0.3), rng.uniform(0.05, 0.3))
+    elif kind == 2:
+        s = shapes.Circle(rng.uniform(0.05, 0.2))
+    else:
+        k = rng.choice(polygon_vertices)
+        a = np.linspace(0, 2 * np.pi, k, endpoint=False) + rng.uniform(0, 1)
+        s = shapes.Polygon(list(zip(rng.uniform(0.05, 0.2) * np.cos(a),
+                                    rng.uniform(0.05, 0.2) * np.sin(a))))
+    s.x, s.y = rng.uniform(-2, 2), rng.uniform(-2, 2)
+    s.rotation = rng.uniform(0, 360)
+    s.color = (rng.random(), rng.random(), rng.random())
+    return s
+
+
+def _reset():
+    history._history.clear()
+    scene.install(ShapeStore())
+    selection.set_group([])
+    state.mode_mouse = None
+
+
+@pytest.fixture
+def fresh_scene():
+    """Cena vazia e histórico limpo antes e depois do teste"""
+    _reset()
+    yield
+    _reset()
@@ -17,10 +17,22 @@ def view_to_world(vx, vy):
     world_y = (vy - pan_y) / state.global_zoom
     return world_x, world_y
 
+def pixels_per_unit():
+    """Quantos pixels da janela correspondem a uma unidade do mundo"""
+    # A visualização [-1, 1] ocupa a janela inteira; usa o menor eixo
+    return state.global_zoom * min(state.WINDOW_W, state.WINDOW_H) / 2
+
 def world_to_view(wx, wy):
     """Converte coordenadas de mundo para visualização (para desenhar)"""
     pan_x, pan_y = state.global_pan
     # Aplica a transformação da renderização
     view_x = wx * state.global_zoom + pan_x
     view_y = wy * state.global_zoom + pan_y
-    return view_x, view_y
\ No newline at end of file
+    return view_x, view_y
+
+def visible_world_rect():
+    """Retângulo do mundo visível na janela: (minx, maxx, miny, maxy)"""
+    # A visualização sempre vai de -1 a 1 nos dois eixos (glOrtho em rendering.render)
+    x0, y0 = view_to_world(-1.0, -1.0)
+    x1, y1 = view_to_world(1.0, 1.0)
+    return min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)
@@ -0,0 +1,49 @@
+# culling.py
+# Descarte (culling) de formas fora do retângulo visível da câmera.
+# Usa os AABBs de mundo já em cache nas formas; nenhum vértice é retransformado.
+
+
+class CullStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.total = 0        # formas consideradas no último quadro
+        self.visible = 0      # formas desenhadas no último quadro
+        self.culled = 0       # formas descartadas no último quadro
+        self.culled_sum = 0   # acumulado desde o último reset
+        self.total_sum = 0
+
+    def record(self, total, visible):
+        self.frames += 1
+        self.total = total
+        self.visible = visible
+        self.culled = total - visible
+        self.total_sum += total
+        self.culled_sum += total - visible
+
+    def summary(self):
+        return {
+            'frames': self.frames,
+            'last_total': self.total,
+            'last_visible': self.visible,
+            'last_culled': self.culled,
+            'culled_ratio': self.culled_sum / self.total_sum if self.total_sum else 0.0,
+        }
+
+
+stats = CullStats()
+
+
+def intersects(bbox, rect):
+    """AABB (minx, maxx, miny, maxy) toca o retângulo rect (mesmo formato)?"""
+    return not (bbox[1] < rect[0] or bbox[0] > rect[1] or
+                bbox[3] < rect[2] or bbox[2] > rect[3])
+
+
+def visible_mask(bounds, rect):
+    """Versão vetorizada: bounds é um array (N, 4) de AABBs; retorna máscara booleana"""
+    minx, maxx, miny, maxy = rect
+    return ((bounds[:, 1] >= minx) & (bounds[:, 0] <= maxx) &
+            (bounds[:, 3] >= miny) & (bounds[:, 2] <= maxy))
@@ -0,0 +1,68 @@
+# grid.py
+# Grade de fundo adaptada à câmera. Os vértices ficam em cache (e num VBO,
+# enviado por rendering.draw_grid) e só são reconstruídos quando a câmera
+# cruza um bloco ou muda de nível.
+
+import math
+import numpy as np
+
+
+class GridCache:
+    def __init__(self, lines_per_view=20, tile_lines=10):
+        self.lines_per_view = lines_per_view  # linhas aprox. na menor dimensão visível
+        self.tile_lines = tile_lines          # linhas por bloco (granularidade do cache)
+        self.key = None
+        self.verts = np.zeros((0, 2), dtype=np.float32)
+        self.rebuilds = 0
+        self.vbo = None
+        self.vbo_ok = None
+        self.uploaded_key = None
+
+    def step_for(self, extent):
+        """Espaçamento em potência de dez, limitando o nº de linhas em qualquer zoom"""
+        return 10.0 ** math.floor(math.log10(max(extent, 1e-12) / self.lines_per_view))
+
+    def _key(self, rect):
+        minx, maxx, miny, maxy = rect
+        step = self.step_for(min(maxx - minx, maxy - miny))
+        tile = step * self.tile_lines
+        return (step,
+                math.floor(minx / tile), math.floor(maxx / tile) + 1,
+                math.floor(miny / tile), math.floor(maxy / tile) + 1)
+
+    def vertices(self, rect):
+        """Vértices (GL_LINES) da grade cobrindo rect, reconstruídos só se o bloco mudou"""
+        key = self._key(rect)
+        if key != self.key:
+            self._build(key)
+        return self.verts
+
+    def _build(self, key):
+        step, tx0, tx1, ty0, ty1 = key
+        n = self.tile_lines
+        # Índices inteiros de linha evitam acúmulo de erro de ponto flutuante
+        ks_x = np.arange(tx0 * n, tx1 * n + 1)
+        ks_y = np.arange(ty0 * n, ty1 * n + 1)
+        x0, x1 = tx0 * n * step, tx1 * n * step
+        y0, y1 = ty0 * n * step, ty1 * n * step
+
+        xs = ks_x * step
+        vert = np.empty((len(xs), 2, 2))
+        vert[:, 0, 0] = xs
+        vert[:, 0, 1] = y0
+        vert[:, 1, 0] = xs
+        vert[:, 1, 1] = y1
+
+        ys = ks_y * step
+        horiz = np.empty((len(ys), 2, 2))
+        horiz[:, 0, 0] = x0
+        horiz[:, 0, 1] = ys
+        horiz[:, 1, 0] = x1
+        horiz[:, 1, 1] = ys
+
+        self.verts = np.concatenate((vert, horiz)).reshape(-1, 2).astype(np.float32)
+        self.key = key
+        self.rebuilds += 1
+
+
+grid = GridCache()
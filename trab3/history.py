@@ -0,0 +1,267 @@
+# history.py
+# Desfazer/refazer. Cada entrada guarda só as diferenças (deltas) da
+# operação, nunca uma cópia da cena, e o histórico respeita um limite de
+# memória (state.history_budget): as entradas mais antigas são descartadas.
+
+from collections import deque
+import state
+import scene
+import selection
+
+# Custo aproximado (bytes) de um handle + sua linha no store, sem os vértices
+_SHAPE_BYTES = 200
+_VERTEX_BYTES = 16
+
+
+def _shape_bytes(s):
+    return _SHAPE_BYTES + _VERTEX_BYTES * len(s.base_vertices)
+
+
+class Create:
+    __slots__ = ('shape', 'z')
+
+    def __init__(self, shape, z):
+        self.shape = shape
+        self.z = z
+
+    def undo(self):
+        scene.remove_shape(self.shape)
+
+    def redo(self):
+        scene.insert_shape(self.shape, self.z)
+
+    def nbytes(self):
+        return _shape_bytes(self.shape)
+
+
+class Delete(Create):
+    __slots__ = ()
+
+    def undo(self):
+        Create.redo(self)
+
+    def redo(self):
+        Create.undo(self)
+
+
+class Transform:
+    """Mudança de (x, y, rotation, scale_x, scale_y); um arrasto inteiro vira uma só"""
+    __slots__ = ('shape', 'before', 'after')
+
+    def __init__(self, shape, before, after):
+        self.shape = shape
+        self.before = before
+        self.after = after
+
+    def undo(self):
+        self.shape.set_transform(self.before)
+
+    def redo(self):
+        self.shape.set_transform(self.after)
+
+    def nbytes(self):
+        return 160
+
+
+class GroupTransform:
+    """Transformação de várias formas (seleção múltipla): colunas (k, 5) antes/depois"""
+    __slots__ = ('shapes', 'before', 'after')
+
+    def __init__(self, shapes, before, after):
+        self.shapes = shapes
+        self.before = before
+        self.after = after
+
+    def undo(self):
+        state.shapes.set_transforms(state.shapes.rows_of(self.shapes), self.before)
+
+    def redo(self):
+        state.shapes.set_transforms(state.shapes.rows_of(self.shapes), self.after)
+
+    def nbytes(self):
+        return 64 + 8 * len(self.shapes) + self.before.nbytes + self.after.nbytes
+
+
+class ZOrder:
+    __slots__ = ('shape', 'before', 'after')
+
+    def __init__(self, shape, before, after):
+        self.shape = shape
+        self.before = before
+        self.after = after
+
+    def undo(self):
+        scene.set_z(self.shape, self.before)
+
+    def redo(self):
+        scene.set_z(self.shape, self.after)
+
+    def nbytes(self):
+        return 96
+
+
+class ZSwap:
+    """Duas formas trocam de chave z (subir/descer um passo); a troca é o próprio inverso"""
+    __slots__ = ('a', 'b')
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    def undo(self):
+        scene.swap_z(self.a, self.b)
+
+    redo = undo
+
+    def nbytes(self):
+        return 80
+
+
+class Replace:
+    """Troca da cena inteira (limpar, carregar arquivo): guarda os dois stores"""
+    __slots__ = ('before', 'after')
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+
+    def undo(self):
+        scene.install(self.before)
+
+    def redo(self):
+        scene.install(self.after)
+
+    def nbytes(self):
+        # O store novo é o estado atual (já contado na cena); só o antigo é extra
+        st = self.before
+        return st.nbytes() + _SHAPE_BYTES * sum(h is not None for h in st.handles)
+
+
+class Entry:
+    """Uma ação do usuário: uma ou mais operações desfeitas/refeitas juntas"""
+    __slots__ = ('ops', 'size')
+
+    def __init__(self, ops):
+        self.ops = ops
+        self.size = sum(op.nbytes() for op in ops)
+
+    def undo(self):
+        for op in reversed(self.ops):
+            op.undo()
+
+    def redo(self):
+        for op in self.ops:
+            op.redo()
+
+
+class History:
+    def __init__(self):
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.total = 0          # bytes estimados no histórico
+        self.dropped = 0        # entradas descartadas pelo limite de memória
+        self.replaying = False  # True durante undo/redo (nada é registrado)
+        self._group = None      # operações da ação em andamento
+        self._drag = None       # (forma ou lista de formas, transformação inicial) do arrasto
+
+    # --- registro ---
+    def record(self, op):
+        if self.replaying:
+            return
+        if self._group is not None:
+            self._group.append(op)
+        else:
+            self._push(Entry([op]))
+
+    def _push(self, entry):
+        self.undo_stack.append(entry)
+        self.total += entry.size
+        for e in self.redo_stack:
+            self.total -= e.size
+        self.redo_stack.clear()
+        self._trim()
+
+    def _trim(self):
+        budget = state.history_budget
+        while self.total > budget and len(self.undo_stack) > 1:
+            self.total -= self.undo_stack.popleft().size
+            self.dropped += 1
+
+    def begin_group(self):
+        """Junta as operações seguintes (até end_group) numa única entrada"""
+        self.end_group()
+        self._group = []
+
+    def end_group(self):
+        self.end_transform()
+        ops, self._group = self._group, None
+        if ops:
+            self._push(Entry(ops))
+
+    def begin_transform(self, s):
+        """Início de um arrasto (translate/rotate/resize) da forma s ou de uma lista de formas"""
+        self.end_transform()
+        if isinstance(s, list):
+            self._drag = (s, state.shapes.transforms(state.shapes.rows_of(s)))
+        else:
+            self._drag = (s, s.get_transform())
+
+    def end_transform(self):
+        if self._drag is None:
+            return
+        s, before = self._drag
+        self._drag = None
+        if isinstance(s, list):
+            after = state.shapes.transforms(state.shapes.rows_of(s))
+            if not (after == before).all():
+                self.record(GroupTransform(s, before, after))
+            return
+        after = s.get_transform()
+        if after != before:
+            self.record(Transform(s, before, after))
+
+    # --- desfazer/refazer ---
+    def undo(self):
+        self.end_group()
+        if not self.undo_stack:
+            return False
+        entry = self.undo_stack.pop()
+        self._replay(entry.undo)
+        self.redo_stack.append(entry)
+        return True
+
+    def redo(self):
+        self.end_group()
+        if not self.redo_stack:
+            return False
+        entry = self.redo_stack.pop()
+        self._replay(entry.redo)
+        self.undo_stack.append(entry)
+        return True
+
+    def _replay(self, fn):
+        self.replaying = True
+        try:
+            fn()
+        finally:
+            self.replaying = False
+        selection.set_group([])  # limpa também o AABB do grupo em cache
+        state.needs_redraw = True
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.total = 0
+        self.dropped = 0
+        self._group = None
+        self._drag = None
+
+
+_history = History()
+record = _history.record
+begin_group = _history.begin_group
+end_group = _history.end_group
+begin_transform = _history.begin_transform
+end_transform = _history.end_transform
+undo = _history.undo
+redo = _history.redo
@@ -0,0 +1,119 @@
+# layers.py
+# Cache de camada para interações: durante um arrasto (mover, girar ou
+# redimensionar uma forma ou o grupo) o fundo que não muda — grade e as
+# demais formas — é desenhado uma vez na textura de um FBO, na câmera atual.
+# Cada quadro copia essa textura para a tela (glBlitFramebuffer) e desenha
+# por cima só as formas ativas, os handles e os previews. Mudanças de câmera,
+# de tamanho da janela, da ordem ou de qualquer outra forma invalidam o cache.
+# As formas ativas ficam por cima das demais enquanto o arrasto dura.
+
+from OpenGL.GL import *
+import state
+import scene
+import shapes
+
+# Modos de state.mode_mouse em que só as formas ativas mudam a cada quadro
+DRAG_MODES = ('translate', 'rotate', 'resize',
+              'group_translate', 'group_rotate', 'group_resize')
+
+
+class LayerCache:
+    def __init__(self):
+        self.available = None   # None = ainda não testado (precisa de FBO)
+        self.screen = 0         # framebuffer que recebe o quadro (0 = janela; testes usam um FBO)
+        self.fbo = None
+        self.tex = None
+        self.size = None        # (largura, altura) da textura
+        self.key = None         # câmera/ordem/opções com que o fundo foi desenhado
+        self.valid = False
+        self.active = frozenset()
+        self.rebuilds = 0       # estatística: fundos redesenhados
+        self.hits = 0           # estatística: quadros que só copiaram o fundo
+        shapes.transform_listeners.append(self._on_transform)
+        shapes.transform_listeners_many.append(self._on_transform_many)
+
+    def _on_transform(self, s):
+        # Outra forma mudou: o fundo desenhado ficou velho
+        if self.valid and s not in self.active:
+            self.valid = False
+
+    def _on_transform_many(self, st, group):
+        if self.valid and not self.active.issuperset(group):
+            self.valid = False
+
+    def invalidate(self):
+        self.valid = False
+
+    def active_shapes(self):
+        """Formas que mudam a cada quadro no arrasto atual (vazio = sem cache)"""
+        if not state.use_layer_cache or state.mode_mouse not in DRAG_MODES:
+            return frozenset()
+        if state.mode_mouse.startswith('group_'):
+            return frozenset(state.group)
+        return frozenset() if state.selected is None else frozenset([state.selected])
+
+    def _ensure_target(self, w, h):
+        """Cria (ou redimensiona) o FBO com uma textura RGBA do tamanho da janela"""
+        if self.available is None:
+            try:
+                self.fbo = glGenFramebuffers(1)
+                self.tex = glGenTextures(1)
+                self.available = True
+            except Exception:
+                self.available = False
+        if not self.available or self.size == (w, h):
+            return self.available
+        glBindTexture(GL_TEXTURE_2D, self.tex)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.tex, 0)
+        complete = glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        glBindFramebuffer(GL_FRAMEBUFFER, self.screen)
+        if not complete:
+            self.available = False
+            return False
+        self.size = (w, h)
+        self.valid = False
+        return True
+
+    def prepare(self, active, draw_background):
+        """
+        Garante o fundo em cache para as formas ativas dadas, chamando
+        draw_background() dentro do FBO se preciso. Retorna False se não há FBO
+        """
+        w, h = state.WINDOW_W, state.WINDOW_H
+        if not self._ensure_target(w, h):
+            return False
+        key = (state.global_zoom, state.global_pan, w, h, scene.order_version,
+               state.fill_polygons, state.use_lod, state.use_vbo)
+        if self.valid and key == self.key and active == self.active:
+            self.hits += 1
+            return True
+        self.active = active
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, w, h)
+        glClearColor(1.0, 1.0, 1.0, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw_background()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.screen)
+        self.key = key
+        self.valid = True
+        self.rebuilds += 1
+        return True
+
+    def blit(self):
+        """Copia o fundo em cache para a tela"""
+        w, h = self.size
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.screen)
+        glBlitFramebuffer(0, 0, w, h, 0, 0, w, h, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.screen)
+
+    def summary(self):
+        return {'rebuilds': self.rebuilds, 'hits': self.hits, 'available': self.available}
+
+
+cache = LayerCache()
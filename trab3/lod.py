@@ -0,0 +1,88 @@
+# lod.py
+# Níveis de detalhe (LOD) para contornos de polígonos.
+# Visvalingam–Whyatt: cada vértice recebe a área efetiva do triângulo que ele
+# forma com os vizinhos no momento em que seria removido. Um nível com
+# tolerância t mantém os vértices de área >= t, na ordem original; os níveis
+# são potências de 4 (em unidades de área) e montados sob demanda.
+
+import heapq
+import math
+import numpy as np
+from mesh import triangulate
+
+# Área (em pixels²) que um vértice precisa "valer" na tela para ser desenhado
+PIXEL_AREA = 0.5
+
+
+def visvalingam_ranks(points):
+    """Área efetiva de cada vértice de um polígono fechado (3 ficam com inf)"""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    ranks = np.full(n, np.inf)
+    if n <= 3:
+        return ranks
+    xs, ys = pts[:, 0].tolist(), pts[:, 1].tolist()
+    prev = [n - 1] + list(range(n - 1))
+    nxt = list(range(1, n)) + [0]
+
+    def area(i):
+        a, c = prev[i], nxt[i]
+        return abs((xs[i] - xs[a]) * (ys[c] - ys[a]) - (xs[c] - xs[a]) * (ys[i] - ys[a])) * 0.5
+
+    current = [area(i) for i in range(n)]
+    heap = [(current[i], i) for i in range(n)]
+    heapq.heapify(heap)
+    removed = [False] * n
+    remaining = n
+    last = 0.0
+    while remaining > 3:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != current[i]:
+            continue  # entrada velha do heap
+        # Área efetiva nunca diminui: vértices que sobram valem pelo menos o anterior
+        last = max(last, a)
+        ranks[i] = last
+        removed[i] = True
+        remaining -= 1
+        p, q = prev[i], nxt[i]
+        nxt[p] = q
+        prev[q] = p
+        for k in (p, q):
+            current[k] = area(k)
+            heapq.heappush(heap, (current[k], k))
+    return ranks
+
+
+class LODPyramid:
+    """Índices (e triângulos) dos vértices de cada nível, calculados uma vez por nível"""
+    __slots__ = ('points', 'ranks', 'levels', 'fills')
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.ranks = visvalingam_ranks(self.points)
+        self.levels = {}  # expoente k -> índices dos vértices com área >= 4**k
+        self.fills = {}   # expoente k -> triângulos do contorno simplificado
+
+    def level_for(self, pixels_per_unit, scale):
+        """Expoente do nível para o tamanho na tela (None = geometria exata)"""
+        unit = pixels_per_unit * scale  # pixels por unidade do espaço base
+        if unit <= 0:
+            return None
+        tol = PIXEL_AREA / (unit * unit)
+        # Arredonda para baixo: o nível escolhido nunca é mais grosso que a tolerância
+        return math.floor(math.log(tol, 4))
+
+    def indices(self, k):
+        idx = self.levels.get(k)
+        if idx is None:
+            idx = np.flatnonzero(self.ranks >= 4.0 ** k)
+            self.levels[k] = idx
+        return idx
+
+    def triangles(self, k):
+        """Triangulação do nível k (índices relativos ao contorno simplificado)"""
+        tris = self.fills.get(k)
+        if tris is None:
+            tris = triangulate(self.points[self.indices(k)])[0]
+            self.fills[k] = tris
+        return tris
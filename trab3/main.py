@@ -2,11 +2,18 @@
 # Ponto de entrada da aplicação.
 # Inicializa o GLFW e executa o loop principal.
 
+import argparse
 import sys
 import glfw
 import state
 import callbacks
 import rendering
+import scheduler
+import motion
+import stream
+import scenefile
+import scene
+import recording
 
 def init_glfw():
     if not glfw.init():
@@ -20,20 +27,45 @@ def init_glfw():
         sys.exit(1)
     glfw.make_context_current(window)
     
-    # Define os callbacks
-    glfw.set_mouse_button_callback(window, callbacks.mouse_button_callback)
-    glfw.set_cursor_pos_callback(window, callbacks.cursor_pos_callback)
-    glfw.set_key_callback(window, callbacks.key_callback)
-    glfw.set_scroll_callback(window, callbacks.scroll_callback)
+    # Define os callbacks (gravados em arquivo se a gravação estiver ligada)
+    rec = recording.recorder
+    glfw.set_mouse_button_callback(window, rec.wrap(recording.MOUSE_BUTTON, callbacks.mouse_button_callback))
+    glfw.set_cursor_pos_callback(window, rec.wrap(recording.CURSOR_POS, callbacks.cursor_pos_callback))
+    glfw.set_key_callback(window, rec.wrap(recording.KEY, callbacks.key_callback))
+    glfw.set_scroll_callback(window, rec.wrap(recording.SCROLL, callbacks.scroll_callback))
     
     return window
 
 
-def main():
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Canvas OpenGL - shapes')
+    p.add_argument('scene', nargs='?', help='cena (.trb3) aberta já carregando em partes')
+    p.add_argument('--record', metavar='ARQUIVO',
+                   help='grava os eventos da sessão (reproduzir com python -m bench.replay)')
+    args = p.parse_args(argv)
+
+    if args.record:
+        # A reprodução parte do mesmo estado: a cena é carregada inteira antes
+        if args.scene:
+            state.scene_path = args.scene
+            scene.install(scenefile.load(args.scene))
+        recording.recorder.start(args.record, args.scene)
     window = init_glfw()
-    while not glfw.window_should_close(window):
-        rendering.render(window)
-        glfw.poll_events()
+    if args.scene and not args.record:
+        # python main.py cena.trb3: abre a janela já carregando a cena em partes
+        state.scene_path = args.scene
+        try:
+            total = scenefile.count(state.scene_path)
+        except (OSError, scenefile.SceneFileError) as e:
+            print('Erro ao carregar cena:', e)
+        else:
+            stream.loader.start(scenefile.iter_chunks(state.scene_path), total)
+    try:
+        scheduler.run(window, recording.recorder.wrap_render(rendering.render))
+    finally:
+        recording.recorder.stop()
+    print('Quadros:', scheduler.stats.summary())
+    print('Movimentos do mouse:', motion.queue.summary())
     glfw.terminate()
 
 
@@ -0,0 +1,340 @@
+# mesh.py
+# Triangulação de polígonos (recorte de orelhas) e BVH de triângulos, usados
+# no teste de ponto exato em O(log n) e no preenchimento dos polígonos.
+# Tudo é calculado no espaço base: a malha não muda quando a forma se move.
+
+import numpy as np
+from utils import convex_hull
+
+# Polígonos pequenos não passam pelos flips de Delaunay (só servem à BVH)
+FLIP_MIN_VERTICES = 32
+
+
+def triangulate(vertices):
+    """
+    Recorte de orelhas (ear clipping) seguido de flips de Delaunay.
+    Retorna (triângulos (m, 3) anti-horários, simples?): simples=False quando o
+    polígono se auto-intersecta (orelha forçada ou arestas que se cruzam).
+    """
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    n = len(v)
+    if n < 3:
+        return np.zeros((0, 3), dtype=np.uint32), False
+    vx, vy = v[:, 0], v[:, 1]
+    xs, ys = vx.tolist(), vy.tolist()
+    # Orientação: o teste de convexidade assume sentido anti-horário
+    area2 = float(np.dot(vx[:-1], vy[1:]) - np.dot(vx[1:], vy[:-1]) + vx[-1] * vy[0] - vx[0] * vy[-1])
+    sign = 1.0 if area2 >= 0 else -1.0
+
+    prev = [n - 1] + list(range(n - 1))
+    nxt = list(range(1, n)) + [0]
+
+    def cross(a, b, c):
+        return sign * ((xs[b] - xs[a]) * (ys[c] - ys[a]) - (ys[b] - ys[a]) * (xs[c] - xs[a]))
+
+    # Vértices reflexos são os únicos que podem cair dentro de uma orelha;
+    # um vértice reflexo só pode virar convexo (nunca o contrário)
+    pv, nv = np.array(prev), np.array(nxt)
+    reflex = sign * ((vx - vx[pv]) * (vy[nv] - vy[pv]) - (vy - vy[pv]) * (vx[nv] - vx[pv])) < 0
+    ridx = np.flatnonzero(reflex)
+    rdirty = False
+
+    def update(k):
+        nonlocal rdirty
+        if reflex[k] and cross(prev[k], k, nxt[k]) >= 0:
+            reflex[k] = False
+            rdirty = True
+
+    def unlink(k):
+        p, q = prev[k], nxt[k]
+        nxt[p] = q
+        prev[q] = p
+
+    tris = []
+    simple = True
+    i = 0
+    remaining = n
+    misses = 0
+    while remaining > 3:
+        p, q = prev[i], nxt[i]
+        c = cross(p, i, q)
+        if c == 0:
+            # Vértice colinear: sai sem gerar triângulo
+            unlink(i)
+            if reflex[i]:
+                reflex[i] = False
+                rdirty = True
+            remaining -= 1
+            update(p)
+            update(q)
+            i, misses = p, 0
+            continue
+
+        ear = False
+        if c > 0:
+            if rdirty:
+                ridx = np.flatnonzero(reflex)
+                rdirty = False
+            if len(ridx) == 0:
+                ear = True
+            elif len(ridx) < 32:
+                # Poucos reflexos: laço simples sai mais barato que o numpy
+                ax, ay, bx, by, cx, cy = xs[p], ys[p], xs[i], ys[i], xs[q], ys[q]
+                ear = True
+                for k in ridx.tolist():
+                    if k == p or k == i or k == q:
+                        continue
+                    x, y = xs[k], ys[k]
+                    if (sign * ((bx - ax) * (y - ay) - (by - ay) * (x - ax)) >= 0
+                            and sign * ((cx - bx) * (y - by) - (cy - by) * (x - bx)) >= 0
+                            and sign * ((ax - cx) * (y - cy) - (ay - cy) * (x - cx)) >= 0):
+                        ear = False
+                        break
+            else:
+                # Nenhum vértice reflexo dentro (ou na borda) do triângulo p, i, q
+                px, py = vx[ridx], vy[ridx]
+                d0 = sign * ((xs[i] - xs[p]) * (py - ys[p]) - (ys[i] - ys[p]) * (px - xs[p]))
+                d1 = sign * ((xs[q] - xs[i]) * (py - ys[i]) - (ys[q] - ys[i]) * (px - xs[i]))
+                d2 = sign * ((xs[p] - xs[q]) * (py - ys[q]) - (ys[p] - ys[q]) * (px - xs[q]))
+                inside = (d0 >= 0) & (d1 >= 0) & (d2 >= 0)
+                inside &= (ridx != p) & (ridx != i) & (ridx != q)
+                ear = not inside.any()
+
+        if ear or misses > remaining:
+            if not ear:
+                simple = False  # volta inteira sem orelha: força o recorte
+            tris.append((p, i, q))
+            unlink(i)
+            if reflex[i]:
+                reflex[i] = False
+                rdirty = True
+            remaining -= 1
+            update(p)
+            update(q)
+            i, misses = p, 0
+        else:
+            i = q
+            misses += 1
+
+    tris.append((prev[i], i, nxt[i]))
+    if sign < 0:
+        tris = [(a, c, b) for a, b, c in tris]  # todos anti-horários
+    if n > FLIP_MIN_VERTICES:
+        tris = _delaunay_flips(xs, ys, tris)
+    tris = np.array(tris, dtype=np.uint32)
+
+    # Polígonos que se auto-intersectam podem ser recortados "sem erro" (todas
+    # as orelhas aceitas), com triângulos sobrepostos: confere as arestas
+    if simple and edges_cross(v):
+        simple = False
+    return tris, simple
+
+
+def edges_cross(vertices, budget=1 << 20):
+    """
+    True se duas arestas não vizinhas do polígono se cruzam. Varredura em x:
+    só os pares cujos intervalos em x se sobrepõem são gerados (em lotes de
+    até 'budget' pares), depois filtrados pelo y e testados com orientações.
+    Toques sem cruzamento (vértice sobre aresta, arestas colineares) não contam.
+    """
+    a = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    n = len(a)
+    if n < 4:
+        return False
+    b = np.roll(a, -1, axis=0)
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    order = np.argsort(lo[:, 0], kind='stable')
+    lo_x, hi_x = lo[order, 0], hi[order, 0]
+    # Arestas depois da posição i (ordem de lo_x) que começam antes de hi_x[i] terminar
+    counts = np.searchsorted(lo_x, hi_x, side='right') - np.arange(n) - 1
+    cum = np.cumsum(counts)
+
+    i0 = 0
+    while i0 < n:
+        base = cum[i0 - 1] if i0 else 0
+        i1 = min(n, max(i0 + 1, int(np.searchsorted(cum, base + budget, side='right'))))
+        c = counts[i0:i1]
+        ii = np.repeat(np.arange(i0, i1), c)
+        jj = ii + 1 + np.arange(len(ii)) - np.repeat(np.cumsum(c) - c, c)
+        e, f = order[ii], order[jj]
+        keep = (lo[e, 1] <= hi[f, 1]) & (lo[f, 1] <= hi[e, 1])
+        d = np.abs(e - f)
+        keep &= (d != 1) & (d != n - 1)
+        e, f = e[keep], f[keep]
+        if len(e):
+            p0, p1, q0, q1 = a[e], b[e], a[f], b[f]
+            o1 = np.sign(_cross(p0, p1, q0))
+            o2 = np.sign(_cross(p0, p1, q1))
+            o3 = np.sign(_cross(q0, q1, p0))
+            o4 = np.sign(_cross(q0, q1, p1))
+            if ((o1 * o2 < 0) & (o3 * o4 < 0)).any():
+                return True
+        i0 = i1
+    return False
+
+
+def _cross(o, p, q):
+    """(p - o) x (q - o) por linha"""
+    return (p[:, 0] - o[:, 0]) * (q[:, 1] - o[:, 1]) - (p[:, 1] - o[:, 1]) * (q[:, 0] - o[:, 0])
+
+
+def _delaunay_flips(xs, ys, tris):
+    """
+    Troca diagonais (flips de Lawson) até nenhum triângulo ter o vértice
+    oposto do vizinho dentro do seu circuncírculo: evita triângulos finos,
+    que deixariam as caixas da BVH muito sobrepostas. As arestas do
+    polígono nunca são trocadas (só têm um triângulo).
+    """
+    tris = [list(t) for t in tris]
+    edges = {}
+    for t, (a, b, c) in enumerate(tris):
+        for u, w in ((a, b), (b, c), (c, a)):
+            edges.setdefault((u, w) if u < w else (w, u), []).append(t)
+
+    def incircle(a, b, c, d):
+        adx, ady = xs[a] - xs[d], ys[a] - ys[d]
+        bdx, bdy = xs[b] - xs[d], ys[b] - ys[d]
+        cdx, cdy = xs[c] - xs[d], ys[c] - ys[d]
+        return ((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+                - (bdx * bdx + bdy * bdy) * (adx * cdy - cdx * ady)
+                + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+
+    def opposite(t, u, w):
+        a, b, c = tris[t]
+        return a + b + c - u - w
+
+    stack = [e for e, ts in edges.items() if len(ts) == 2]
+    flips = 0
+    limit = 8 * len(tris) + 100  # proteção contra ciclos por erro numérico
+    while stack and flips < limit:
+        e = stack.pop()
+        ts = edges.get(e)
+        if ts is None or len(ts) != 2:
+            continue
+        t1, t2 = ts
+        u, w = e
+        # Orienta t1 como (u, w, p) anti-horário
+        a, b, c = tris[t1]
+        if (a, b) == (w, u) or (b, c) == (w, u) or (c, a) == (w, u):
+            t1, t2 = t2, t1
+        p, q = opposite(t1, u, w), opposite(t2, u, w)
+        if incircle(u, w, p, q) <= 0:
+            continue
+        # Flip: (u, w, p) + (w, u, q) -> (p, u, q) + (q, w, p)
+        tris[t1] = [p, u, q]
+        tris[t2] = [q, w, p]
+        del edges[e]
+        edges[(p, q) if p < q else (q, p)] = [t1, t2]
+        for k, (x0, x1) in enumerate(((w, p), (u, q))):
+            key = (x0, x1) if x0 < x1 else (x1, x0)
+            lst = edges[key]
+            old, new = (t1, t2) if k == 0 else (t2, t1)
+            lst[lst.index(old)] = new
+        for key in ((u, p), (w, p), (u, q), (w, q)):
+            key = key if key[0] < key[1] else (key[1], key[0])
+            if len(edges[key]) == 2:
+                stack.append(key)
+        flips += 1
+    return tris
+
+
+class TriangleBVH:
+    """Hierarquia de AABBs sobre os triângulos (folhas com até LEAF triângulos)"""
+
+    LEAF = 4
+
+    def __init__(self, points, triangles):
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        tri = pts[triangles]                          # (m, 3, 2)
+        lo, hi = tri.min(axis=1), tri.max(axis=1)
+        centers = tri.mean(axis=1)
+
+        self.bounds = []   # por nó: (minx, maxx, miny, maxy)
+        self.children = [] # por nó: (esquerdo, direito) ou None nas folhas
+        self.leaves = []   # por nó: índices dos triângulos (só folhas)
+        if len(tri) == 0:
+            self.tri = []
+            return
+        stack = [(np.arange(len(tri)), None, 0)]
+        while stack:
+            ids, parent, side = stack.pop()
+            node = len(self.bounds)
+            if parent is not None:
+                left, right = self.children[parent]
+                self.children[parent] = (node, right) if side == 0 else (left, node)
+            b_lo, b_hi = lo[ids].min(axis=0), hi[ids].max(axis=0)
+            self.bounds.append((b_lo[0], b_hi[0], b_lo[1], b_hi[1]))
+            if len(ids) <= self.LEAF:
+                self.children.append(None)
+                self.leaves.append(ids.tolist())
+                continue
+            # Divide pela mediana dos centros no eixo mais comprido
+            axis = 0 if b_hi[0] - b_lo[0] >= b_hi[1] - b_lo[1] else 1
+            order = ids[np.argsort(centers[ids, axis], kind='stable')]
+            half = len(order) // 2
+            self.children.append((None, None))
+            self.leaves.append(None)
+            stack.append((order[half:], node, 1))
+            stack.append((order[:half], node, 0))
+        self.bounds = np.array(self.bounds).tolist()
+        self.tri = tri.reshape(-1, 6).tolist()  # (ax, ay, bx, by, cx, cy) por triângulo
+
+    def contains(self, x, y):
+        """True se (x, y) cai em algum triângulo (bordas incluídas)"""
+        if not self.bounds:
+            return False
+        bounds, children, leaves, tri = self.bounds, self.children, self.leaves, self.tri
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            minx, maxx, miny, maxy = bounds[node]
+            if x < minx or x > maxx or y < miny or y > maxy:
+                continue
+            kids = children[node]
+            if kids is not None:
+                stack.extend(kids)
+                continue
+            for t in leaves[node]:
+                ax, ay, bx, by, cx, cy = tri[t]
+                d0 = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+                d1 = (cx - bx) * (y - by) - (cy - by) * (x - bx)
+                d2 = (ax - cx) * (y - cy) - (ay - cy) * (x - cx)
+                if (d0 >= 0 and d1 >= 0 and d2 >= 0) or (d0 <= 0 and d1 <= 0 and d2 <= 0):
+                    return True
+        return False
+
+
+class PolygonMesh:
+    """
+    Triangulação de um polígono (espaço base); o fecho convexo e a BVH,
+    que só o teste de ponto usa, são montados na primeira consulta
+    """
+    __slots__ = ('points', 'triangles', 'simple', '_hull', '_bvh')
+
+    def __init__(self, vertices):
+        self.points = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.triangles, self.simple = triangulate(self.points)
+        self._hull = None
+        self._bvh = None
+
+    def _build_queries(self):
+        pts = self.points
+        # Fecho convexo anti-horário como arestas (x0, y0, dx, dy) para o teste rápido
+        hull = np.array(convex_hull([tuple(p) for p in pts.tolist()]), dtype=np.float64)
+        if len(hull) >= 3:
+            self._hull = np.column_stack((hull, np.roll(hull, -1, axis=0) - hull))
+        else:
+            self._hull = np.zeros((0, 4))
+        self._bvh = TriangleBVH(pts, self.triangles)
+
+    def in_hull(self, x, y):
+        if self._hull is None:
+            self._build_queries()
+        h = self._hull
+        if len(h) == 0:
+            return False
+        return bool((h[:, 2] * (y - h[:, 1]) - h[:, 3] * (x - h[:, 0]) >= 0).all())
+
+    def contains(self, x, y):
+        """Ponto no espaço base: rejeição pelo fecho convexo e depois a BVH"""
+        return self.in_hull(x, y) and self._bvh.contains(x, y)
@@ -0,0 +1,42 @@
+# motion.py
+# Agrupa (coalesce) os eventos de movimento do mouse: o callback do GLFW só
+# guarda a última posição e ela é aplicada uma vez por quadro, antes de
+# desenhar. Arrastos continuam idênticos: translate/pan calculam o delta a
+# partir de state.prev_mouse (delta acumulado desde a última aplicação) e
+# rotate/resize só dependem da posição atual.
+
+import state
+
+
+class MotionQueue:
+    def __init__(self):
+        self.pending = None   # (window, x, y) ainda não aplicado
+        self.handler = None   # função(window, x, y) que faz o trabalho de fato
+        self.received = 0     # eventos entregues pelo GLFW
+        self.applied = 0      # posições efetivamente aplicadas
+
+    def push(self, window, x, y):
+        self.received += 1
+        self.pending = (window, x, y)
+        if state.mode_mouse is not None:
+            state.needs_redraw = True  # arrasto/preview: o quadro aplica a posição
+
+    def flush(self):
+        """Aplica a posição pendente (se houver); retorna True se aplicou"""
+        if self.pending is None:
+            return False
+        window, x, y = self.pending
+        self.pending = None
+        self.applied += 1
+        self.handler(window, x, y)
+        return True
+
+    def summary(self):
+        return {
+            'events': self.received,
+            'applied': self.applied,
+            'coalesced': self.received - self.applied - (self.pending is not None),
+        }
+
+
+queue = MotionQueue()
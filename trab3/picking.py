@@ -0,0 +1,99 @@
+# picking.py
+# Seleção pelo mouse em uma única passada ordenada:
+#   handles de resize -> handle de rotação -> corpo da forma.
+# A geometria do gizmo da forma selecionada (8 handles, handle de rotação e
+# contorno) é montada uma vez por mudança de transformação e reaproveitada
+# pelo desenho (rendering.draw_selection).
+
+import numpy as np
+import state
+import scene
+import shapes
+
+HANDLE_SIZE = 0.035     # lado dos handles desenhados; o clique aceita essa distância (view space)
+ROTATION_RADIUS = 0.04  # raio do handle de rotação (em 'view space')
+
+
+class Gizmo:
+    __slots__ = ('shape', 'local', 'handles', 'rotation_handle')
+
+    def __init__(self, s):
+        self.shape = s
+        self.local = s.get_handles_local_base()
+        self.handles = s.apply_transform(self.local)   # (8, 2) no mundo
+        self.rotation_handle = s.rotation_handle_world(self.handles)
+
+    def outline(self, pixels_per_unit=None):
+        # O contorno já fica em cache na própria forma
+        return self.shape.outline_vertices(pixels_per_unit)
+
+    def handle_at(self, wx, wy):
+        """Índice do primeiro handle sob (wx, wy) ou None"""
+        size = HANDLE_SIZE / state.global_zoom
+        hit = np.abs(self.handles - (wx, wy)).max(axis=1) <= size
+        idx = int(hit.argmax())
+        return idx if hit[idx] else None
+
+    def over_rotation(self, wx, wy):
+        radius = ROTATION_RADIUS / state.global_zoom
+        rx, ry = self.rotation_handle
+        return (wx - rx) ** 2 + (wy - ry) ** 2 <= radius ** 2
+
+
+_gizmo = None
+builds = 0  # estatística: quantas vezes o gizmo foi montado
+
+
+def _on_transform(s):
+    global _gizmo
+    if _gizmo is not None and _gizmo.shape is s:
+        _gizmo = None
+
+
+def _on_transform_many(st, group):
+    global _gizmo
+    if _gizmo is not None and any(s is _gizmo.shape for s in group):
+        _gizmo = None
+
+
+shapes.transform_listeners.append(_on_transform)
+shapes.transform_listeners_many.append(_on_transform_many)
+
+
+def gizmo(s):
+    """Gizmo da forma s (reconstruído só quando a transformação muda)"""
+    global _gizmo, builds
+    if _gizmo is None or _gizmo.shape is not s:
+        _gizmo = Gizmo(s)
+        builds += 1
+    return _gizmo
+
+
+def pick(wx, wy):
+    """
+    Resolve o clique em (wx, wy): retorna (forma, índice do handle, rotação?)
+    ou (None, None, False) se não há nada sob o cursor
+    """
+    top = scene.shape_at(wx, wy)
+    sel = state.selected
+
+    # Os handles da forma selecionada só perdem para formas que estão na frente dela
+    if sel is not None and (top is None or not scene.is_above(top, sel)):
+        g = gizmo(sel)
+        idx = g.handle_at(wx, wy)
+        if idx is not None:
+            return sel, idx, False
+        if g.over_rotation(wx, wy):
+            return sel, None, True
+
+    if top is None:
+        return None, None, False
+    if top is not sel:
+        # Uma forma não selecionada também pode ser agarrada pelos seus handles
+        g = gizmo(top)
+        idx = g.handle_at(wx, wy)
+        if idx is not None:
+            return top, idx, False
+        if g.over_rotation(wx, wy):
+            return top, None, True
+    return top, None, False
@@ -0,0 +1,117 @@
+# profiling.py
+# Instrumentação por quadro: intervalos nomeados (spans) em volta das fases
+# de rendering.render e dos callbacks GLFW, com percentis numa janela móvel.
+# Desligada (enabled = False) custa só um teste de flag por span.
+
+import functools
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+enabled = False
+WINDOW = 300  # amostras mantidas por nome
+
+_samples = {}  # nome -> deque de durações (s)
+_clock = time.perf_counter
+
+
+class _Span:
+    __slots__ = ('name', 't0')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, _clock() - self.t0)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def span(name):
+    """Uso: with profiling.span('render.grid'): ..."""
+    return _Span(name) if enabled else _NULL
+
+
+def timed(name):
+    """Decorador que mede cada chamada da função com o nome dado"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            t0 = _clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, _clock() - t0)
+        return wrapper
+    return deco
+
+
+def record(name, seconds):
+    q = _samples.get(name)
+    if q is None:
+        q = _samples[name] = deque(maxlen=WINDOW)
+    q.append(seconds)
+
+
+def samples(name):
+    """Durações recentes (s) de um nome, da mais antiga para a mais nova"""
+    return list(_samples.get(name, ()))
+
+
+def stats():
+    """{nome: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} da janela atual"""
+    out = {}
+    for name, q in _samples.items():
+        if not q:
+            continue
+        ms = np.fromiter(q, dtype=np.float64, count=len(q)) * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        out[name] = {
+            'count': len(ms),
+            'mean_ms': float(ms.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(ms.max()),
+        }
+    return out
+
+
+def reset():
+    _samples.clear()
+
+
+def dump(path):
+    """Grava as estatísticas atuais em JSON"""
+    with open(path, 'w') as f:
+        json.dump({'window': WINDOW, 'spans': stats()}, f, indent=2)
+
+
+def report():
+    """Texto com uma linha por span, ordenado pelo p95"""
+    rows = sorted(stats().items(), key=lambda kv: -kv[1]['p95_ms'])
+    lines = [f'{"span":24s} {"n":>5s} {"p50":>8s} {"p95":>8s} {"p99":>8s}  (ms)']
+    for name, st in rows:
+        lines.append(f'{name:24s} {st["count"]:5d} {st["p50_ms"]:8.3f} '
+                     f'{st["p95_ms"]:8.3f} {st["p99_ms"]:8.3f}')
+    return '\n'.join(lines)
@@ -0,0 +1,388 @@
+# raster.py
+# Rasterizador em software (NumPy) para exportar PNG sem janela nem GPU.
+# Reproduz o que rendering.render mostra: grade, contornos (e preenchimento),
+# seleção e a câmera (zoom/pan). Cada primitiva vira amostras
+# (pixel, camada, cobertura) e no fim todas são compostas de uma vez, na
+# ordem das camadas, como o blending do OpenGL faria quadro a quadro.
+#
+# Uso em lote (miniaturas de vários arquivos de cena, em paralelo):
+#   python raster.py saida/ cena1.trb3 cena2.trb3 ... --size 256x256
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import state
+import shapes
+import picking
+import selection
+import culling
+import scenefile
+from grid import GridCache
+
+# Mesmas cores de rendering.py
+GRID_COLOR = (0.85, 0.85, 0.85)
+SELECTION_COLOR = (1.0, 0.0, 0.0)
+GROUP_BOX_COLOR = (0.9, 0.5, 0.1)
+HANDLE_COLOR = (0.95, 0.95, 0.3)
+ROTATION_COLOR = (0.95, 0.6, 0.2)
+EDGE_COLOR = (0.05, 0.05, 0.05)
+FILL_ALPHA = 0.35
+
+
+class Canvas:
+    """Imagem RGB com câmera; as primitivas recebem coordenadas de mundo"""
+
+    def __init__(self, width, height, zoom=1.0, pan=(0.0, 0.0), background=(1.0, 1.0, 1.0)):
+        self.width, self.height = width, height
+        self.zoom, self.pan = zoom, pan
+        self.background = np.asarray(background, dtype=np.float64)
+        self.layers = 0     # camadas já criadas (ordem de desenho)
+        self._colors = []   # cor de cada camada, em blocos
+        self._pix = []      # índice linear do pixel de cada amostra
+        self._layer = []    # camada de cada amostra
+        self._alpha = []    # cobertura * alfa de cada amostra
+
+    # --- câmera ---
+    def world_rect(self):
+        """Retângulo do mundo visível (minx, maxx, miny, maxy), como coords.visible_world_rect"""
+        px, py = self.pan
+        return ((-1 - px) / self.zoom, (1 - px) / self.zoom,
+                (-1 - py) / self.zoom, (1 - py) / self.zoom)
+
+    def pixels_per_unit(self):
+        return self.zoom * min(self.width, self.height) / 2
+
+    def to_pixels(self, pts):
+        """Mundo -> pixels (origem no canto superior esquerdo, como no PNG)"""
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        out = np.empty_like(pts)
+        out[:, 0] = (pts[:, 0] * self.zoom + self.pan[0] + 1) * 0.5 * self.width
+        out[:, 1] = (1 - (pts[:, 1] * self.zoom + self.pan[1])) * 0.5 * self.height
+        return out
+
+    def _add_layers(self, colors):
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        first = self.layers
+        self._colors.append(colors)
+        self.layers += len(colors)
+        return first
+
+    def _emit(self, x, y, layer, alpha):
+        ok = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height) & (alpha > 0)
+        self._pix.append(y[ok] * self.width + x[ok])
+        self._layer.append(np.broadcast_to(layer, ok.shape)[ok])
+        self._alpha.append(np.broadcast_to(alpha, ok.shape)[ok])
+
+    # --- linhas (anti-aliasing por cobertura, estilo Wu) ---
+    def _clip(self, a, b):
+        # Liang–Barsky contra a imagem (com folga para a espessura da linha)
+        lo = (-2.0, -2.0)
+        hi = (self.width + 2.0, self.height + 2.0)
+        d = b - a
+        t0 = np.zeros(len(a))
+        t1 = np.ones(len(a))
+        keep = np.ones(len(a), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for axis in (0, 1):
+                for p, q in ((-d[:, axis], a[:, axis] - lo[axis]),
+                             (d[:, axis], hi[axis] - a[:, axis])):
+                    r = q / p
+                    keep &= ~((p == 0) & (q < 0))
+                    t0 = np.where(p < 0, np.maximum(t0, r), t0)
+                    t1 = np.where(p > 0, np.minimum(t1, r), t1)
+        keep &= t0 <= t1
+        return a + t0[:, None] * d, a + t1[:, None] * d, keep
+
+    def _segments(self, a, b, layer, width):
+        """Segmentos a->b (pixels), um valor de camada por segmento"""
+        a, b, keep = self._clip(a, b)
+        a, b, layer = a[keep], b[keep], layer[keep]
+        if len(a) == 0:
+            return
+        d = b - a
+        steep = np.abs(d[:, 1]) > np.abs(d[:, 0])
+        # u = eixo principal (um passo por pixel), v = eixo secundário
+        u0 = np.where(steep, a[:, 1], a[:, 0])
+        v0 = np.where(steep, a[:, 0], a[:, 1])
+        du = np.where(steep, d[:, 1], d[:, 0])
+        dv = np.where(steep, d[:, 0], d[:, 1])
+        n = np.ceil(np.abs(du)).astype(np.int64) + 1
+        seg = np.repeat(np.arange(len(a)), n)
+        k = np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n)
+        t = k / np.maximum(n - 1, 1)[seg]
+        u = u0[seg] + t * du[seg]
+        v = v0[seg] + t * dv[seg]
+        # Meia espessura medida no eixo secundário (linhas inclinadas cobrem mais)
+        slope = dv / np.where(du != 0, du, 1.0)
+        half = (width / 2 * np.sqrt(1 + slope * slope))[seg]
+        iu = np.floor(u).astype(np.int64)
+        base = np.floor(v - half).astype(np.int64)
+        seg_layer = layer[seg]
+        for off in range(int(np.ceil(width * 1.5)) + 2):
+            iv = base + off
+            cover = np.clip(half + 0.5 - np.abs(iv + 0.5 - v), 0.0, 1.0)
+            x = np.where(steep[seg], iv, iu)
+            y = np.where(steep[seg], iu, iv)
+            self._emit(x, y, seg_layer, cover)
+
+    def loops(self, verts, starts, counts, colors, width=1.0):
+        """Contornos fechados (GL_LINE_LOOP); cada laço é uma camada"""
+        if len(counts) == 0:
+            return
+        first = self._add_layers(colors)
+        p = self.to_pixels(verts)
+        nxt = np.arange(1, len(p) + 1)
+        nxt[starts + counts - 1] = starts
+        layer = np.repeat(np.arange(first, first + len(counts)), counts)
+        self._segments(p, p[nxt], layer, width)
+
+    def lines(self, pts, color, width=1.0):
+        """Pares de pontos (GL_LINES), todos numa camada"""
+        p = self.to_pixels(pts)
+        if len(p) < 2:
+            return
+        first = self._add_layers(color)
+        self._segments(p[0::2], p[1::2], np.full(len(p) // 2, first), width)
+
+    # --- preenchimento por scanline ---
+    def fill(self, verts, starts, counts, colors, alpha=1.0):
+        """Polígonos (regra par-ímpar, centros dos pixels); cada um é uma camada"""
+        if len(counts) == 0:
+            return
+        first = self._add_layers(colors)
+        p = self.to_pixels(verts)
+        nxt = np.arange(1, len(p) + 1)
+        nxt[starts + counts - 1] = starts
+        poly = np.repeat(np.arange(first, first + len(counts)), counts)
+        a, b = p, p[nxt]
+        # Linhas r cujo centro r + 0.5 está em [ymin, ymax) da aresta
+        r0 = np.clip(np.ceil(np.minimum(a[:, 1], b[:, 1]) - 0.5), 0, self.height).astype(np.int64)
+        r1 = np.clip(np.ceil(np.maximum(a[:, 1], b[:, 1]) - 0.5), 0, self.height).astype(np.int64)
+        n = np.maximum(r1 - r0, 0)
+        e = np.repeat(np.arange(len(a)), n)
+        if len(e) == 0:
+            return
+        row = r0[e] + np.arange(len(e)) - np.repeat(np.cumsum(n) - n, n)
+        ax, ay, bx, by = a[e, 0], a[e, 1], b[e, 0], b[e, 1]
+        x = ax + (row + 0.5 - ay) * (bx - ax) / (by - ay)
+        # Cruzamentos ordenados por (polígono, linha, x): cada par é um trecho
+        order = np.lexsort((x, row, poly[e]))
+        x, row, layer = x[order], row[order], poly[e][order]
+        c0 = np.clip(np.ceil(x[0::2] - 0.5), 0, self.width).astype(np.int64)
+        c1 = np.clip(np.ceil(x[1::2] - 0.5), 0, self.width).astype(np.int64)
+        span = np.maximum(c1 - c0, 0)
+        s = np.repeat(np.arange(len(span)), span)
+        cols = c0[s] + np.arange(len(s)) - np.repeat(np.cumsum(span) - span, span)
+        self._emit(cols, row[0::2][s], layer[0::2][s], np.float64(alpha))
+
+    # --- composição ---
+    def image(self):
+        """Compõe as amostras sobre o fundo e devolve (H, W, 3) uint8"""
+        img = np.empty((self.height * self.width, 3))
+        img[:] = self.background
+        if self._pix:
+            pix = np.concatenate(self._pix)
+            layer = np.concatenate(self._layer)
+            alpha = np.concatenate(self._alpha)
+            colors = np.concatenate(self._colors)
+            order = np.lexsort((layer, pix))
+            pix, layer, alpha = pix[order], layer[order], alpha[order]
+            # Amostras repetidas da mesma camada num pixel (pontas de segmentos) valem uma vez
+            first = np.ones(len(pix), dtype=bool)
+            first[1:] = (pix[1:] != pix[:-1]) | (layer[1:] != layer[:-1])
+            idx = np.flatnonzero(first)
+            if len(idx):
+                alpha = np.maximum.reduceat(alpha, idx)
+                pix, layer = pix[idx], layer[idx]
+                # Por pixel: fundo * prod(1 - a) + soma(cor_i * a_i * prod_{j > i}(1 - a_j))
+                log_t = np.log1p(-np.minimum(alpha, 1 - 1e-9))
+                group = np.ones(len(pix), dtype=bool)
+                group[1:] = pix[1:] != pix[:-1]
+                gid = np.cumsum(group) - 1
+                gstart = np.flatnonzero(group)
+                csum = np.cumsum(log_t)
+                total = np.add.reduceat(log_t, gstart)
+                before = csum[gstart] - log_t[gstart]
+                after = total[gid] - (csum - before[gid])
+                weight = alpha * np.exp(after)
+                out = self.background[None, :] * np.exp(total)[:, None]
+                for c in range(3):
+                    out[:, c] += np.bincount(gid, weights=weight * colors[layer, c],
+                                             minlength=len(gstart))
+                img[pix[gstart]] = out
+        img = np.clip(img * 255 + 0.5, 0, 255).astype(np.uint8)
+        return img.reshape(self.height, self.width, 3)
+
+
+def write_png(path, img):
+    """Grava uma imagem (H, W, 3) uint8 como PNG RGB de 8 bits (só zlib)"""
+    img = np.ascontiguousarray(img, dtype=np.uint8)
+    h, w = img.shape[:2]
+    raw = np.zeros((h, 1 + w * 3), dtype=np.uint8)  # filtro 0 (nenhum) por linha
+    raw[:, 1:] = img.reshape(h, -1)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+# --- cena ---
+def _squares(canvas, centers, size):
+    half = (size / 2) / canvas.zoom
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 1, 2)
+    quads = (centers + np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)]) * half).reshape(-1, 2)
+    n = len(centers)
+    starts = np.arange(0, 4 * n, 4)
+    counts = np.full(n, 4)
+    canvas.fill(quads, starts, counts, np.tile(HANDLE_COLOR, (n, 1)))
+    canvas.loops(quads, starts, counts, np.tile(EDGE_COLOR, (n, 1)))
+
+
+def _rotation_circle(canvas, cx, cy, r):
+    ring = shapes.unit_circle(18) * (r / canvas.zoom) + (cx, cy)
+    one = (np.array([0]), np.array([len(ring)]))
+    canvas.fill(ring, *one, ROTATION_COLOR)
+    canvas.loops(ring, *one, EDGE_COLOR)
+
+
+def _draw_selection(canvas):
+    if state.group:
+        st = state.shapes
+        verts, starts, counts = st.world_vertices(st.rows_of(state.group))
+        canvas.loops(verts, starts, counts, np.tile(SELECTION_COLOR, (len(counts), 1)), width=2.0)
+        minx, maxx, miny, maxy = selection.bounds()
+        canvas.loops([(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy)],
+                     np.array([0]), np.array([4]), GROUP_BOX_COLOR)
+        _squares(canvas, selection.handles(), picking.HANDLE_SIZE)
+        _rotation_circle(canvas, *selection.rotation_handle(), picking.ROTATION_RADIUS)
+    elif state.selected is not None:
+        g = picking.gizmo(state.selected)
+        outline = g.outline(canvas.pixels_per_unit())
+        canvas.loops(outline, np.array([0]), np.array([len(outline)]), SELECTION_COLOR, width=2.0)
+        _squares(canvas, g.handles, picking.HANDLE_SIZE)
+        _rotation_circle(canvas, *g.rotation_handle, picking.ROTATION_RADIUS)
+
+
+def render(st=None, width=None, height=None, camera=None, grid=True, fill=None, show_selection=None):
+    """
+    Desenha a cena 'st' (padrão: state.shapes) e devolve a imagem (H, W, 3).
+    camera = (zoom, pan); padrão: a câmera atual. A seleção só é desenhada
+    para a cena da aplicação.
+    """
+    if st is None:
+        st = state.shapes
+    if camera is None:
+        camera = (state.global_zoom, state.global_pan)
+    if fill is None:
+        fill = state.fill_polygons
+    if show_selection is None:
+        show_selection = st is state.shapes
+    canvas = Canvas(width or state.WINDOW_W, height or state.WINDOW_H, *camera)
+    rect = canvas.world_rect()
+
+    if grid:
+        canvas.lines(GridCache().vertices(rect), GRID_COLOR)
+
+    rows = st.rows()
+    if len(rows):
+        rows = rows[culling.visible_mask(st.world_bounds(rows), rect)]
+        verts, starts, counts = st.world_vertices(rows)
+        colors = st.color[rows]
+        canvas.loops(verts, starts, counts, colors)
+        if fill:
+            # Como o batch: preenchimentos dos polígonos por cima dos contornos
+            poly = st.kind[rows] == shapes.Polygon.kind
+            if poly.any():
+                pc = counts[poly]
+                canvas.fill(verts[np.repeat(poly, counts)], np.cumsum(pc) - pc, pc,
+                            colors[poly], FILL_ALPHA)
+
+    if show_selection:
+        _draw_selection(canvas)
+    return canvas.image()
+
+
+def fit_camera(st, margin=0.05):
+    """(zoom, pan) que enquadra todas as formas de 'st'"""
+    rows = st.rows()
+    if len(rows) == 0:
+        return 1.0, (0.0, 0.0)
+    b = st.world_bounds(rows)
+    minx, maxx = b[:, 0].min(), b[:, 1].max()
+    miny, maxy = b[:, 2].min(), b[:, 3].max()
+    zoom = 2 * (1 - margin) / max(maxx - minx, maxy - miny, 1e-9)
+    return zoom, (-zoom * (minx + maxx) / 2, -zoom * (miny + maxy) / 2)
+
+
+def export_scene(scene_path, png_path, width=256, height=256, grid=True, fill=False):
+    """Carrega um arquivo de cena, enquadra e grava a miniatura; devolve o nº de formas"""
+    st = scenefile.load(scene_path)
+    img = render(st, width, height, fit_camera(st), grid=grid, fill=fill, show_selection=False)
+    write_png(png_path, img)
+    return len(st)
+
+
+def _export_job(job):
+    scene_path, png_path, opts = job
+    try:
+        return scene_path, export_scene(scene_path, png_path, **opts), None
+    except (OSError, scenefile.SceneFileError) as e:
+        return scene_path, 0, str(e)
+    except Exception as e:
+        # Qualquer outra falha fica no registro deste arquivo: as demais
+        # miniaturas do lote continuam valendo
+        return scene_path, 0, f'{type(e).__name__}: {e}'
+
+
+def export_many(scene_paths, out_dir, width=256, height=256, processes=None, **opts):
+    """
+    Exporta uma miniatura PNG por arquivo de cena, em paralelo (um processo
+    por núcleo). Devolve [(caminho, nº de formas, erro ou None)].
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    opts = dict(opts, width=width, height=height)
+    jobs = [(p, os.path.join(out_dir, os.path.splitext(os.path.basename(p))[0] + '.png'), opts)
+            for p in scene_paths]
+    if processes == 1 or len(jobs) <= 1:
+        return [_export_job(j) for j in jobs]
+    with ProcessPoolExecutor(processes) as pool:
+        chunk = max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1)))
+        return list(pool.map(_export_job, jobs, chunksize=chunk))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Exporta miniaturas PNG de arquivos de cena.')
+    p.add_argument('out_dir', help='pasta de saída')
+    p.add_argument('scenes', nargs='+', help='arquivos de cena (.trb3)')
+    p.add_argument('--size', default='256x256', help='LARGURAxALTURA em pixels')
+    p.add_argument('--processes', type=int, default=None, help='processos (padrão: nº de núcleos)')
+    p.add_argument('--fill', action='store_true', help='preenche os polígonos')
+    p.add_argument('--no-grid', action='store_true', help='sem a grade de fundo')
+    args = p.parse_args(argv)
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    t0 = time.perf_counter()
+    results = export_many(args.scenes, args.out_dir, width, height, args.processes,
+                          grid=not args.no_grid, fill=args.fill)
+    elapsed = time.perf_counter() - t0
+    failed = [(path, err) for path, _, err in results if err]
+    for path, err in failed:
+        print(f'Erro em {path}: {err}')
+    print(f'{len(results) - len(failed)} miniaturas em {elapsed:.2f} s '
+          f'({sum(n for _, n, _ in results)} formas) -> {args.out_dir}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
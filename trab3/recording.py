@@ -0,0 +1,189 @@
+# recording.py
+# Gravação da sessão: cada evento do GLFW que chega aos callbacks (com o
+# horário e a posição do cursor naquele momento) e cada quadro desenhado vão
+# para um arquivo compacto (cabeçalho JSON + registros binários comprimidos
+# com zlib). bench/replay.py reproduz o arquivo sem janela e confere o
+# checksum final do estado, gravado no fim da sessão.
+#
+#   python main.py cena.trb3 --record sessao.trb3rec
+
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import zlib
+import numpy as np
+import glfw
+import state
+
+MAGIC = b'TRB3REC1'
+VERSION = 1
+
+# Tipos de registro; todos começam com (tipo, segundos desde o início)
+MOUSE_BUTTON, CURSOR_POS, KEY, SCROLL, FRAME, END = range(6)
+NAMES = ('mouse_button', 'cursor_pos', 'key', 'scroll', 'frame', 'end')
+_HEAD = struct.Struct('<Bd')
+# Argumentos do callback (sem a janela) + posição do cursor (glfw.get_cursor_pos)
+PAYLOADS = {
+    MOUSE_BUTTON: struct.Struct('<iiidd'),   # button, action, mods, cx, cy
+    CURSOR_POS: struct.Struct('<dd'),        # x, y
+    KEY: struct.Struct('<iiiidd'),           # key, scancode, action, mods, cx, cy
+    SCROLL: struct.Struct('<dddd'),          # xoffset, yoffset, cx, cy
+    FRAME: struct.Struct('<'),
+    END: struct.Struct('<32s'),              # checksum do estado no fim
+}
+
+
+class RecordingError(Exception):
+    pass
+
+
+def state_checksum():
+    """SHA-256 (hex) da cena na ordem de desenho, da câmera e da seleção"""
+    st = state.shapes
+    rows = np.asarray(st.rows(), dtype=np.int64)
+    h = hashlib.sha256()
+    h.update(st.kind[rows].tobytes())
+    for name in ('x', 'y', 'rotation', 'scale_x', 'scale_y'):
+        h.update(getattr(st, name)[rows].tobytes())
+    h.update(st.color[rows].tobytes())
+    verts, counts = st.gather_vertices(rows)
+    h.update(counts.tobytes())
+    h.update(np.ascontiguousarray(verts).tobytes())
+    h.update(np.array([state.global_zoom, *state.global_pan], dtype=np.float64).tobytes())
+    # Seleção pela posição na ordem de desenho (linhas não são estáveis entre sessões)
+    selected = [] if state.selected is None else [state.selected]
+    pos = {r: i for i, r in enumerate(rows.tolist())} if selected or state.group else {}
+    h.update(np.array([pos.get(s._row, -1) for s in selected], dtype=np.int64).tobytes())
+    h.update(b'|')
+    h.update(np.array([pos.get(s._row, -1) for s in state.group], dtype=np.int64).tobytes())
+    h.update(str(state.mode_mouse).encode())
+    return h.hexdigest()
+
+
+def glfw_constants():
+    """Valores das constantes glfw.XXX usadas pelo trab3 (o glfw falso do replay as recebe)"""
+    names = set()
+    pattern = re.compile(r'\bglfw\.([A-Z][A-Z0-9_]*)\b')
+    here = os.path.dirname(os.path.abspath(__file__))
+    for f in os.listdir(here):
+        if f.endswith('.py'):
+            with open(os.path.join(here, f), encoding='utf-8') as fh:
+                names.update(pattern.findall(fh.read()))
+    return {n: getattr(glfw, n) for n in sorted(names) if isinstance(getattr(glfw, n, None), int)}
+
+
+class Recorder:
+    def __init__(self):
+        self.file = None
+        self.path = None
+        self.started = 0.0
+        self.events = 0
+        self._z = None
+
+    @property
+    def active(self):
+        return self.file is not None
+
+    def start(self, path, scene_path=None):
+        """
+        Começa a gravar em 'path'. A cena atual deve ser a de 'scene_path'
+        (None = cena vazia): o replay parte dela
+        """
+        header = {
+            'version': VERSION,
+            'window': [state.WINDOW_W, state.WINDOW_H],
+            'zoom': state.global_zoom,
+            'pan': list(state.global_pan),
+            'scene': scene_path,
+            'initial_checksum': state_checksum(),
+            'constants': glfw_constants(),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        data = json.dumps(header).encode()
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(data)) + data)
+        self._z = zlib.compressobj(6)
+        self.path = path
+        self.events = 0
+        self.started = time.perf_counter()
+
+    def _write(self, kind, *values):
+        t = time.perf_counter() - self.started
+        self.file.write(self._z.compress(_HEAD.pack(kind, t) + PAYLOADS[kind].pack(*values)))
+        self.events += 1
+
+    def wrap(self, kind, fn):
+        """Callback que grava o evento antes de chamar 'fn' (ou o próprio fn sem gravação)"""
+        if not self.active:
+            return fn
+
+        def recorded(window, *args):
+            if self.active:
+                cursor = () if kind == CURSOR_POS else glfw.get_cursor_pos(window)
+                self._write(kind, *args, *cursor)
+            return fn(window, *args)
+
+        recorded.__name__ = fn.__name__
+        return recorded
+
+    def wrap_render(self, render):
+        """render que marca o quadro (o replay aplica o movimento pendente nesse ponto)"""
+        if not self.active:
+            return render
+
+        def recorded(window):
+            if self.active:
+                self._write(FRAME)
+            return render(window)
+
+        return recorded
+
+    def stop(self):
+        """Grava o checksum final e fecha o arquivo"""
+        if not self.active:
+            return None
+        checksum = state_checksum()
+        self._write(END, bytes.fromhex(checksum))
+        self.file.write(self._z.flush())
+        self.file.close()
+        self.file = None
+        print(f'Sessão gravada em {self.path}: {self.events} eventos, '
+              f'{time.perf_counter() - self.started:.1f} s, checksum {checksum[:16]}')
+        return checksum
+
+
+def read(path):
+    """Cabeçalho (dict) e lista de eventos (tipo, t, valores) de uma gravação"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise RecordingError(f'{path}: não é uma gravação do trab3')
+    pos = len(MAGIC)
+    (size,) = struct.unpack_from('<I', data, pos)
+    pos += 4
+    header = json.loads(data[pos:pos + size])
+    if header.get('version') != VERSION:
+        raise RecordingError(f'{path}: versão {header.get("version")} não suportada')
+    try:
+        body = zlib.decompressobj().decompress(data[pos + size:])
+    except zlib.error as e:
+        raise RecordingError(f'{path}: corpo corrompido ({e})')
+    events = []
+    pos = 0
+    while pos + _HEAD.size <= len(body):
+        kind, t = _HEAD.unpack_from(body, pos)
+        pos += _HEAD.size
+        payload = PAYLOADS.get(kind)
+        if payload is None:
+            raise RecordingError(f'{path}: registro inválido no byte {pos}')
+        if pos + payload.size > len(body):
+            break  # gravação interrompida: fica o que foi escrito inteiro
+        events.append((kind, t, payload.unpack_from(body, pos)))
+        pos += payload.size
+    return header, events
+
+
+recorder = Recorder()
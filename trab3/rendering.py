@@ -6,115 +6,201 @@ from OpenGL.GL import *
 import numpy as np
 import math
 import state
+import coords
+import culling
+import shapes
+import profiling
+import picking
+import selection
+import stream
+import layers
+from batch import batch
+from grid import grid
 
-def draw_handle_square(cx, cy, size=0.03):
+def draw_array(mode, pts):
+    """Envia um array (N, 2) de vértices em uma única chamada (vertex array)"""
+    pts = np.ascontiguousarray(pts, dtype=np.float32)
+    if len(pts) == 0:
+        return
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, pts)
+    glDrawArrays(mode, 0, len(pts))
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+
+# Quadrado unitário usado pelos handles (vértices na ordem do GL_QUADS)
+_UNIT_SQUARE = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float32)
+
+
+def draw_handle_squares(centers, size=0.03):
     # Tamanho do handle (em 'view space') para ser independente do zoom
-    half = (size / 2) / state.global_zoom 
-    
+    half = (size / 2) / state.global_zoom
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 1, 2)
+    quads = (centers + _UNIT_SQUARE * half).reshape(-1, 2)
+
     glColor3f(0.95, 0.95, 0.3)
-    glBegin(GL_QUADS)
-    glVertex2f(cx - half, cy - half)
-    glVertex2f(cx + half, cy - half)
-    glVertex2f(cx + half, cy + half)
-    glVertex2f(cx - half, cy + half)
-    glEnd()
+    draw_array(GL_QUADS, quads)
     glColor3f(0.05, 0.05, 0.05)
-    glBegin(GL_LINE_LOOP)
-    glVertex2f(cx - half, cy - half)
-    glVertex2f(cx + half, cy - half)
-    glVertex2f(cx + half, cy + half)
-    glVertex2f(cx - half, cy + half)
-    glEnd()
+    n = len(centers)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, quads)
+    glMultiDrawArrays(GL_LINE_LOOP, np.arange(0, 4 * n, 4, dtype=np.int32),
+                      np.full(n, 4, dtype=np.int32), n)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+
+def draw_handle_square(cx, cy, size=0.03):
+    draw_handle_squares([(cx, cy)], size)
 
 
 def draw_handle_circle(cx, cy, r=0.03, segments=18):
     # Tamanho do handle (em 'view space') para ser independente do zoom
     radius = r / state.global_zoom
-    
+    ring = shapes.unit_circle(segments) * radius + (cx, cy)
+
     glColor3f(0.95, 0.6, 0.2)
-    glBegin(GL_TRIANGLE_FAN)
-    glVertex2f(cx, cy)
-    for i in range(segments + 1):
-        a = 2 * math.pi * i / segments
-        glVertex2f(cx + math.cos(a) * radius, cy + math.sin(a) * radius)
-    glEnd()
+    draw_array(GL_TRIANGLE_FAN, np.vstack(([(cx, cy)], ring, ring[:1])))
     glColor3f(0.05, 0.05, 0.05)
-    glBegin(GL_LINE_LOOP)
-    for i in range(segments):
-        a = 2 * math.pi * i / segments
-        glVertex2f(cx + math.cos(a) * radius, cy + math.sin(a) * radius)
-    glEnd()
+    draw_array(GL_LINE_LOOP, ring)
 
 
 def draw_grid():
     glColor3f(0.85, 0.85, 0.85)
     glLineWidth(1.0)
-    glBegin(GL_LINES)
-    
-    # Desenha um grid maior para acomodar o zoom out
-    step = 0.1
-    world_range = 5.0 
-    for i in np.arange(-world_range, world_range + 1e-9, step):
-        glVertex2f(i, -world_range)
-        glVertex2f(i, world_range)
-        glVertex2f(-world_range, i)
-        glVertex2f(world_range, i)
-    glEnd()
+    # Cobre só o retângulo visível; o espaçamento acompanha o zoom
+    verts = grid.vertices(coords.visible_world_rect())
+    if grid.vbo_ok is None:
+        try:
+            grid.vbo = glGenBuffers(1)
+            grid.vbo_ok = True
+        except Exception:
+            grid.vbo_ok = False
 
+    glEnableClientState(GL_VERTEX_ARRAY)
+    if grid.vbo_ok:
+        glBindBuffer(GL_ARRAY_BUFFER, grid.vbo)
+        if grid.uploaded_key != grid.key:
+            glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, GL_STATIC_DRAW)
+            grid.uploaded_key = grid.key
+        glVertexPointer(2, GL_FLOAT, 0, None)
+        glDrawArrays(GL_LINES, 0, len(verts))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    else:
+        glVertexPointer(2, GL_FLOAT, 0, verts)
+        glDrawArrays(GL_LINES, 0, len(verts))
+    glDisableClientState(GL_VERTEX_ARRAY)
 
-def render(window):
-    glViewport(0, 0, state.WINDOW_W, state.WINDOW_H)
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    glOrtho(-1, 1, -1, 1, -1, 1)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity() # Reseta a matriz de Modelo/Visão
-
-    glClearColor(1.0, 1.0, 1.0, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-    # === APLICA A TRANSFORMAÇÃO DA CÂMERA ===
-    glPushMatrix()
-    
-    # 1. Aplica o Pan (Translação da Visão)
-    glTranslatef(state.global_pan[0], state.global_pan[1], 0.0)
-    
-    # 2. Aplica o Zoom (Escala da Visão)
-    glScalef(state.global_zoom, state.global_zoom, 1.0)
-    
-    # ========================================
-
-    draw_grid() # O grid agora será afetado pelo zoom/pan
-
-    for s in state.shapes:
-        s.draw()
-
-    if state.selected is not None:
-        glPushAttrib(GL_CURRENT_BIT | GL_LINE_BIT)
-        glLineWidth(2.0)
-        glColor3f(1.0, 0.0, 0.0)
-        verts = state.selected.transformed_vertices()
-        glBegin(GL_LINE_LOOP)
-        for vx, vy in verts:
-            glVertex2f(vx, vy)
-        glEnd()
+
+def draw_shape(s, pixels_per_unit=None, fill=False):
+    """Uma forma no modo imediato (glBegin/glEnd); polígonos podem ser preenchidos"""
+    verts = s.outline_vertices(pixels_per_unit)
+    if fill and isinstance(s, shapes.Polygon):
+        # Preenchimento: os triângulos da malha em um único glDrawElements
+        tris = s.fill_triangles(pixels_per_unit)
+        r, g, b = s.color
+        glColor4f(r, g, b, 0.35)
+        glPushAttrib(GL_COLOR_BUFFER_BIT)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_DOUBLE, 0, np.ascontiguousarray(verts))
+        glDrawElements(GL_TRIANGLES, tris.size, GL_UNSIGNED_INT, tris)
+        glDisableClientState(GL_VERTEX_ARRAY)
         glPopAttrib()
+    glColor3f(*s.color)
+    glLineWidth(1.5)
+    glBegin(GL_LINE_LOOP)
+    for vx, vy in verts.tolist():
+        glVertex2f(vx, vy)
+    glEnd()
+
+
+def draw_shapes(view_rect, exclude=None, only=None):
+    # Caminho retido (VBO); o modo imediato continua como alternativa.
+    # 'exclude'/'only' separam o fundo das formas ativas (layers.py)
+    if state.use_vbo and batch.draw(view_rect, exclude, only):
+        if state.fill_polygons:
+            batch.draw_fill(exclude, only)
+    else:
+        visible = 0
+        ppu = coords.pixels_per_unit() if state.use_lod else None
+        fill = state.fill_polygons
+        for s in state.shapes:
+            if only is not None:
+                if s in only:
+                    draw_shape(s, ppu, fill)
+            elif (exclude is None or s not in exclude) and \
+                    culling.intersects(s.bounding_box_world(), view_rect):
+                draw_shape(s, ppu, fill)
+                visible += 1
+        if only is None:
+            culling.stats.record(len(state.shapes), visible)
+
+
+def draw_background(view_rect, exclude=None):
+    """Grade e formas (menos 'exclude'), com a câmera já aplicada"""
+    with profiling.span('render.grid'):
+        draw_grid()
+    with profiling.span('render.shapes'):
+        draw_shapes(view_rect, exclude)
+
+
+def draw_group_selection():
+    # Contornos de todos os membros em uma chamada + AABB e handles do grupo
+    st = state.shapes
+    verts, starts, counts = st.world_vertices(st.rows_of(state.group))
+    glPushAttrib(GL_CURRENT_BIT | GL_LINE_BIT)
+    glLineWidth(2.0)
+    glColor3f(1.0, 0.0, 0.0)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, np.ascontiguousarray(verts, dtype=np.float32))
+    glMultiDrawArrays(GL_LINE_LOOP, starts.astype(np.int32), counts.astype(np.int32), len(counts))
+    glDisableClientState(GL_VERTEX_ARRAY)
 
-        handles = state.selected.get_handles_world()
-        for hx, hy in handles:
-            draw_handle_square(hx, hy, size=0.035)
-        rx, ry = state.selected.rotation_handle_world()
-        draw_handle_circle(rx, ry, r=0.04)
+    minx, maxx, miny, maxy = selection.bounds()
+    glLineWidth(1.0)
+    glColor3f(0.9, 0.5, 0.1)
+    draw_array(GL_LINE_LOOP, [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy)])
+    glPopAttrib()
+
+    draw_handle_squares(selection.handles(), size=picking.HANDLE_SIZE)
+    rx, ry = selection.rotation_handle()
+    draw_handle_circle(rx, ry, r=picking.ROTATION_RADIUS)
+
+
+def draw_selection():
+    if state.group:
+        draw_group_selection()
+        return
+    if state.selected is None:
+        return
+    glPushAttrib(GL_CURRENT_BIT | GL_LINE_BIT)
+    glLineWidth(2.0)
+    glColor3f(1.0, 0.0, 0.0)
+    g = picking.gizmo(state.selected)  # mesma geometria usada no clique
+    draw_array(GL_LINE_LOOP, g.outline(coords.pixels_per_unit()))
+    glPopAttrib()
+
+    draw_handle_squares(g.handles, size=picking.HANDLE_SIZE)
+    rx, ry = g.rotation_handle
+    draw_handle_circle(rx, ry, r=picking.ROTATION_RADIUS)
+
+
+def draw_previews():
+    # Retângulo / laço de seleção
+    if state.mode_mouse == 'box_select' and state.select_start is not None:
+        (x0, y0), (x1, y1) = state.select_start, state.global_mouse_world
+        glColor3f(0.2, 0.6, 0.9)
+        draw_array(GL_LINE_LOOP, [(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+    if state.mode_mouse == 'lasso_select' and len(state.lasso_points) > 1:
+        glColor3f(0.2, 0.6, 0.9)
+        draw_array(GL_LINE_LOOP, state.lasso_points)
 
     # Preview do polígono
     if state.mode_mouse == 'drawing_polygon' and len(state.drawing_points) > 0:
         glColor3f(0.2, 0.6, 0.9)
-        glBegin(GL_LINE_STRIP)
-        for px, py in state.drawing_points:
-            glVertex2f(px, py)
         # Linha até o mouse
-        glVertex2f(state.global_mouse_world[0], state.global_mouse_world[1])
-        glEnd()
+        draw_array(GL_LINE_STRIP, state.drawing_points + [state.global_mouse_world])
     
     # Preview do círculo
     if state.mode_mouse == 'drawing_circle_radius' and state.drawing_circle_pt_center is not None:
@@ -127,13 +213,126 @@ def render(window):
         if radius > 0.001:
             glColor3f(0.2, 0.6, 0.9) 
             glLineWidth(1.5)
-            glBegin(GL_LINE_LOOP)
-            segments = 48
-            for i in range(segments + 1):
-                a = 2 * math.pi * i / segments
-                glVertex2f(cx + math.cos(a) * radius, cy + math.sin(a) * radius)
-            glEnd()
+            # Mesma tesselação (e cache) dos círculos da cena
+            segments = shapes.circle_segments(radius * coords.pixels_per_unit())
+            draw_array(GL_LINE_LOOP, shapes.unit_circle(segments) * radius + (cx, cy))
+
+
+# Fases mostradas no HUD (empilhadas por quadro) e suas cores
+HUD_PHASES = (
+    ('render.grid', (0.6, 0.6, 0.6)),
+    ('render.shapes', (0.2, 0.5, 0.9)),
+    ('render.selection', (0.9, 0.4, 0.2)),
+    ('render.previews', (0.3, 0.8, 0.3)),
+    ('render.swap', (0.8, 0.2, 0.8)),
+)
+
+
+def draw_hud(scale_ms=50.0):
+    """Gráfico dos tempos de quadro (em coordenadas de visualização, sem câmera)"""
+    x0, y0, w, h = -0.98, -0.98, 0.7, 0.35
+    to_y = h / (scale_ms / 1000.0)
+
+    glColor3f(1.0, 1.0, 1.0)
+    draw_array(GL_QUADS, [(x0, y0), (x0 + w, y0), (x0 + w, y0 + h), (x0, y0 + h)])
+
+    # Barras empilhadas com o tempo de cada fase nos últimos quadros
+    n = len(profiling.samples('frame'))
+    if n:
+        bar_w = w / profiling.WINDOW
+        bottom = np.zeros(n)
+        xs = x0 + np.arange(n) * bar_w
+        for name, color in HUD_PHASES:
+            vals = np.array(profiling.samples(name)[-n:])
+            if len(vals) < n:
+                vals = np.concatenate((np.zeros(n - len(vals)), vals))
+            top = bottom + vals
+            quads = np.empty((n, 4, 2))
+            quads[:, 0] = np.column_stack((xs, y0 + np.minimum(bottom * to_y, h)))
+            quads[:, 1] = np.column_stack((xs + bar_w, y0 + np.minimum(bottom * to_y, h)))
+            quads[:, 2] = np.column_stack((xs + bar_w, y0 + np.minimum(top * to_y, h)))
+            quads[:, 3] = np.column_stack((xs, y0 + np.minimum(top * to_y, h)))
+            glColor3f(*color)
+            draw_array(GL_QUADS, quads.reshape(-1, 2))
+            bottom = top
+
+    # Percentis do tempo de quadro (verde p50, amarelo p95, vermelho p99)
+    frame = profiling.stats().get('frame')
+    if frame:
+        for key, color in (('p50_ms', (0.1, 0.7, 0.1)), ('p95_ms', (0.9, 0.7, 0.0)),
+                           ('p99_ms', (0.9, 0.1, 0.1))):
+            y = y0 + min(frame[key] / scale_ms, 1.0) * h
+            glColor3f(*color)
+            draw_array(GL_LINES, [(x0, y), (x0 + w, y)])
+
+    # Referências de 60 e 30 quadros/s
+    glColor3f(0.2, 0.2, 0.2)
+    for ref_ms in (1000 / 60, 1000 / 30):
+        y = y0 + ref_ms / scale_ms * h
+        draw_array(GL_LINES, [(x0, y), (x0 + 0.03, y)])
+    draw_array(GL_LINE_LOOP, [(x0, y0), (x0 + w, y0), (x0 + w, y0 + h), (x0, y0 + h)])
+
+
+def draw_load_progress():
+    """Barra de progresso da carga em partes (em coordenadas de visualização)"""
+    frac = stream.loader.progress()
+    x0, y0, w, h = -0.98, 0.95, 1.96, 0.02
+    glColor3f(0.85, 0.85, 0.85)
+    draw_array(GL_LINE_LOOP, [(x0, y0), (x0 + w, y0), (x0 + w, y0 + h), (x0, y0 + h)])
+    if frac:
+        glColor3f(0.2, 0.6, 0.9)
+        x1 = x0 + w * frac
+        draw_array(GL_QUADS, [(x0, y0), (x1, y0), (x1, y0 + h), (x0, y0 + h)])
+
+
+def render(window):
+    with profiling.span('frame'):
+        glViewport(0, 0, state.WINDOW_W, state.WINDOW_H)
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        glOrtho(-1, 1, -1, 1, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity() # Reseta a matriz de Modelo/Visão
+
+        # === APLICA A TRANSFORMAÇÃO DA CÂMERA ===
+        glPushMatrix()
+
+        # 1. Aplica o Pan (Translação da Visão)
+        glTranslatef(state.global_pan[0], state.global_pan[1], 0.0)
+
+        # 2. Aplica o Zoom (Escala da Visão)
+        glScalef(state.global_zoom, state.global_zoom, 1.0)
+
+        # ========================================
+
+        # Só desenha formas cujo AABB toca o retângulo visível
+        view_rect = coords.visible_world_rect()
+
+        # Num arrasto o fundo vem do cache de camada e só as formas ativas são
+        # redesenhadas (por cima das demais); sem FBO, o quadro é completo
+        active = layers.cache.active_shapes()
+        if active and layers.cache.prepare(active, lambda: draw_background(view_rect, active)):
+            with profiling.span('render.shapes'):
+                layers.cache.blit()
+                draw_shapes(view_rect, only=active)
+        else:
+            glClearColor(1.0, 1.0, 1.0, 1.0)
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            draw_background(view_rect)
+
+        with profiling.span('render.selection'):
+            draw_selection()
+        with profiling.span('render.previews'):
+            draw_previews()
+
+        glPopMatrix() # <-- Libera a matriz da câmera
+
+        if stream.loader.active:
+            draw_load_progress()
 
-    glPopMatrix() # <-- Libera a matriz da câmera
+        if state.show_hud:
+            with profiling.span('render.hud'):
+                draw_hud()
 
-    glfw.swap_buffers(window)
\ No newline at end of file
+        with profiling.span('render.swap'):
+            glfw.swap_buffers(window)
@@ -0,0 +1,176 @@
+# scene.py
+# Operações estruturais sobre a cena (state.shapes).
+# Toda inserção/remoção/reordenação passa por aqui para que os
+# índices auxiliares continuem sincronizados com a lista de formas.
+
+import state
+import shapes
+import history
+from spatial import GridIndex
+from store import ShapeStore
+
+index = GridIndex(state.shapes)
+# Incrementado a cada mudança estrutural (inserção, remoção, reordenação);
+# permite que caches da ordem de desenho saibam quando se reconstruir
+order_version = 0
+# Mudanças pontuais da ordem desde a versão edit_base, em posições da ordem
+# de desenho: [(versão depois da mudança, op, ...)], com op sendo
+#   'append', linhas       acréscimo no topo (carga em partes, stream.py)
+#   'insert', pos, forma   'remove', pos   'move', de, para   'swap', i, j
+# Caches da ordem que estão em edit_base ou depois só precisam aplicar as
+# mudanças seguintes; trocas da cena inteira (install) zeram a lista.
+edit_base = 0
+edits = []
+MAX_EDITS = 1024  # passou disso, refazer o cache sai mais barato
+
+
+def _transform_changed(s):
+    state.needs_redraw = True
+
+
+def _transform_changed_many(st, group):
+    if st is index.store:
+        rows = st.rows_of(group)
+        index.update_many(rows, st.world_bounds(rows))
+    state.needs_redraw = True
+
+
+# Movimentos/rotações/redimensionamentos atualizam o índice e pedem redesenho
+shapes.transform_listeners.append(index.update)
+shapes.transform_listeners.append(_transform_changed)
+shapes.transform_listeners_many.append(_transform_changed_many)
+
+
+def _order_changed():
+    global order_version, edit_base, edits
+    order_version += 1
+    edit_base = order_version
+    edits = []
+    state.needs_redraw = True
+
+
+def _edit(op, *args):
+    global order_version
+    if len(edits) >= MAX_EDITS:
+        _order_changed()
+        return
+    order_version += 1
+    edits.append((order_version, op) + args)
+    state.needs_redraw = True
+
+
+def add_shape(s):
+    state.shapes.append(s)
+    _edit('insert', len(state.shapes) - 1, s)
+    index.insert(s)
+    history.record(history.Create(s, s.z))
+
+
+def insert_shape(s, z):
+    """Recoloca uma forma na cena com a chave de ordem z (usado pelo desfazer)"""
+    state.shapes.insert_at_z(s, z)
+    _edit('insert', state.shapes.index(s), s)
+    index.insert(s)
+
+
+def append_columns(kind, verts, counts, **columns):
+    """
+    Acrescenta formas (em colunas, como ShapeStore.bulk_insert) no topo da
+    cena, sem registrar no histórico; usado pela carga em partes
+    """
+    st = state.shapes
+    rows = st.bulk_insert(kind, verts, counts, **columns)
+    index.insert_many(rows, st.world_bounds(rows))
+    _edit('append', rows)
+    return rows
+
+
+def remove_shape(s):
+    if s in state.shapes:
+        z = s.z
+        pos = state.shapes.index(s)
+        index.remove(s)  # antes de a forma sair do store (a chave é a linha)
+        state.shapes.remove(s)
+        _edit('remove', pos)
+        history.record(history.Delete(s, z))
+    if state.selected is s:
+        state.selected = None
+    if state.group and s in state.group:
+        state.group = [g for g in state.group if g is not s]
+
+
+def set_z(s, z):
+    """Move a forma para a posição de ordem z"""
+    if s in state.shapes and s.z != z:
+        old, pos = s.z, state.shapes.index(s)
+        state.shapes.set_z(s, z)
+        _edit('move', pos, state.shapes.index(s))
+        history.record(history.ZOrder(s, old, z))
+
+
+def bring_to_front(s):
+    """Move a forma para o fim da ordem (desenhada por último = na frente)"""
+    if s in state.shapes and state.shapes[-1] is not s:
+        old, pos = s.z, state.shapes.index(s)
+        state.shapes.raise_to_top(s)
+        _edit('move', pos, len(state.shapes) - 1)
+        history.record(history.ZOrder(s, old, s.z))
+
+
+def send_to_back(s):
+    """Move a forma para o começo da ordem (desenhada primeiro = no fundo)"""
+    if s in state.shapes and state.shapes[0] is not s:
+        old, pos = s.z, state.shapes.index(s)
+        state.shapes.lower_to_bottom(s)
+        _edit('move', pos, 0)
+        history.record(history.ZOrder(s, old, s.z))
+
+
+def step_z(s, step):
+    """Troca de lugar com a vizinha da frente (step=+1) ou de trás (step=-1)"""
+    if s not in state.shapes:
+        return
+    other = state.shapes.neighbor(s, step)
+    if other is not None:
+        swap_z(s, other)
+        history.record(history.ZSwap(s, other))
+
+
+def swap_z(a, b):
+    i, j = state.shapes.index(a), state.shapes.index(b)
+    state.shapes.swap_z(a, b)
+    if (state.shapes.index(a), state.shapes.index(b)) == (j, i):
+        _edit('swap', i, j)
+    else:
+        _order_changed()  # chaves z repetidas: as posições não só trocaram
+
+
+def clear():
+    # A cena antiga é mantida inteira (fica no histórico para o desfazer)
+    replace_shapes(ShapeStore())
+
+
+def replace_shapes(new_store):
+    """Troca a cena inteira por outro ShapeStore (p.ex. carregado de arquivo)"""
+    history.record(history.Replace(state.shapes, new_store))
+    install(new_store)
+
+
+def install(new_store):
+    """Instala new_store como cena e reconstrói os índices (sem registrar no histórico)"""
+    state.shapes = new_store
+    state.selected = None
+    state.group = []
+    index.reset(new_store)
+    rows = new_store.rows()
+    index.insert_many(rows, new_store.world_bounds(rows))
+    _order_changed()
+
+
+def shape_at(wx, wy):
+    """Forma mais à frente sob o ponto de mundo (wx, wy), ou None"""
+    return index.topmost_at(wx, wy)
+
+
+def is_above(a, b):
+    return a.z > b.z
@@ -0,0 +1,167 @@
+# scenefile.py
+# Leitura/gravação da cena em formato binário colunar e versionado.
+#
+# Layout (little-endian):
+#   cabeçalho   magic(8) versão(u32) nº blocos(u32) nº formas(u64) nº vértices(u64)
+#   diretório   por bloco: nome(16s) dtype(8s) offset(u64) bytes(u64)
+#   blocos      colunas do ShapeStore, cada uma alinhada em 64 bytes
+#
+# A leitura usa np.memmap: as colunas viram views do arquivo (cópia só na
+# escrita), então nenhum vértice passa por listas Python.
+
+import struct
+import numpy as np
+from store import ShapeStore
+
+MAGIC = b'TRB3SCN\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQ')
+ENTRY = struct.Struct('<16s8sQQ')
+ALIGN = 64
+
+# nome do bloco -> dtype no arquivo
+BLOCKS = {
+    'kind': '<i1',
+    'x': '<f8',
+    'y': '<f8',
+    'rotation': '<f8',
+    'scale_x': '<f8',
+    'scale_y': '<f8',
+    'color': '<f4',
+    'vstart': '<i8',
+    'vcount': '<i8',
+    'verts': '<f8',
+}
+
+
+class SceneFileError(Exception):
+    pass
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save(path, st):
+    """Grava as formas da cena (na ordem de desenho) em 'path'"""
+    rows = st.rows()
+    verts, counts = st.gather_vertices(rows)
+    columns = {
+        'kind': st.kind[rows],
+        'x': st.x[rows],
+        'y': st.y[rows],
+        'rotation': st.rotation[rows],
+        'scale_x': st.scale_x[rows],
+        'scale_y': st.scale_y[rows],
+        'color': st.color[rows],
+        'vstart': np.cumsum(counts) - counts,
+        'vcount': counts,
+        'verts': verts,
+    }
+
+    offset = _align(HEADER.size + ENTRY.size * len(BLOCKS))
+    directory = []
+    for name, dtype in BLOCKS.items():
+        arr = np.ascontiguousarray(columns[name], dtype=dtype)
+        directory.append((name, arr, offset))
+        offset = _align(offset + arr.nbytes)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(directory), len(rows), len(verts)))
+        for name, arr, off in directory:
+            f.write(ENTRY.pack(name.encode(), arr.dtype.str.encode(), off, arr.nbytes))
+        for name, arr, off in directory:
+            f.seek(off)
+            f.write(arr.reshape(-1).view(np.uint8).data)  # sem cópia (e vale para cena vazia)
+        f.truncate(offset)
+    return len(rows), len(verts)
+
+
+def load(path):
+    """Lê 'path' e devolve um ShapeStore cujas colunas mapeiam o arquivo"""
+    n, columns = _columns(path)
+    return ShapeStore.from_columns(n, columns)
+
+
+def _columns(path):
+    # (nº de formas, colunas como views do arquivo mapeado); qualquer
+    # inconsistência vira SceneFileError antes de a cena ser montada
+    try:
+        mm = np.memmap(path, dtype=np.uint8, mode='c')
+    except ValueError:  # arquivo vazio
+        raise SceneFileError('arquivo de cena truncado')
+    if len(mm) < HEADER.size:
+        raise SceneFileError('arquivo de cena truncado')
+    magic, version, nblocks, n, nverts = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise SceneFileError('não é um arquivo de cena')
+    if version > VERSION:
+        raise SceneFileError(f'versão {version} não suportada (máx. {VERSION})')
+    if HEADER.size + nblocks * ENTRY.size > len(mm):
+        raise SceneFileError('diretório de blocos fora do arquivo')
+
+    # Nº de elementos esperado em cada bloco
+    expected = {name: n for name in BLOCKS}
+    expected['color'] = 3 * n
+    expected['verts'] = 2 * nverts
+
+    columns = {}
+    for i in range(nblocks):
+        name, dtype, off, nbytes = ENTRY.unpack_from(mm, HEADER.size + i * ENTRY.size)
+        name = name.rstrip(b'\0').decode(errors='replace')
+        if name not in BLOCKS:
+            continue  # bloco de uma versão futura: ignorado
+        dtype = dtype.rstrip(b'\0').decode(errors='replace')
+        try:
+            ok = np.dtype(dtype) == np.dtype(BLOCKS[name])
+        except TypeError:
+            ok = False
+        if not ok:
+            raise SceneFileError(f'bloco {name!r} com tipo inválido {dtype!r}')
+        if off + nbytes > len(mm):
+            raise SceneFileError(f'bloco {name!r} fora do arquivo')
+        if nbytes != expected[name] * np.dtype(BLOCKS[name]).itemsize:
+            raise SceneFileError(f'bloco {name!r} com {nbytes} bytes, incompatível com o cabeçalho')
+        columns[name] = mm[off:off + nbytes].view(np.dtype(BLOCKS[name]))
+
+    missing = set(BLOCKS) - set(columns)
+    if missing:
+        raise SceneFileError('blocos ausentes: ' + ', '.join(sorted(missing)))
+
+    vstart, vcount = columns['vstart'], columns['vcount']
+    if n and ((vstart < 0).any() or (vcount < 0).any() or (vstart + vcount > nverts).any()):
+        raise SceneFileError('trechos de vértices fora do bloco de vértices')
+    # Trechos contíguos e na ordem das formas (como save grava): iter_chunks
+    # lê os vértices de cada parte como um único intervalo
+    if n and (vstart != np.cumsum(vcount) - vcount).any():
+        raise SceneFileError('trechos de vértices fora de ordem ou sobrepostos')
+
+    columns['color'] = columns['color'].reshape(n, 3)
+    columns['verts'] = columns['verts'].reshape(nverts, 2)
+    return n, columns
+
+
+def iter_chunks(path, chunk=4096):
+    """
+    Lê 'path' em partes de até 'chunk' formas, na ordem de desenho. Cada parte
+    é um dict com as colunas de ShapeStore.bulk_insert (cópias, não views).
+    """
+    n, columns = _columns(path)
+    for a in range(0, n, chunk):
+        b = min(a + chunk, n)
+        v0 = int(columns['vstart'][a])
+        v1 = int(columns['vstart'][b - 1] + columns['vcount'][b - 1])
+        part = {name: np.array(columns[name][a:b])
+                for name in ('kind', 'x', 'y', 'rotation', 'scale_x', 'scale_y', 'color')}
+        part['verts'] = np.array(columns['verts'][v0:v1])
+        part['counts'] = np.array(columns['vcount'][a:b])
+        yield part
+
+
+def count(path):
+    """Nº de formas gravadas em 'path' (só lê o cabeçalho)"""
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size or head[:8] != MAGIC:
+        raise SceneFileError('não é um arquivo de cena')
+    return HEADER.unpack(head)[3]
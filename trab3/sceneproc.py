@@ -0,0 +1,218 @@
+# sceneproc.py
+# Processamento em lote de arquivos de cena, sem OpenGL nem GLFW: recalcula
+# os AABBs, normaliza as transformações, valida os polígonos e calcula o
+# fecho convexo de cada cena. As cenas são distribuídas num pool de
+# processos (ProcessPoolExecutor, como em raster.py) em blocos (chunks) e os
+# resultados de cada bloco vão para o arquivo JSON Lines assim que ele fica
+# pronto. Uma cena com problema vira um registro de erro; as outras seguem.
+#
+#   python sceneproc.py cenas/ outras/x.trb3 --out resultados.jsonl --normalized saida/
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import shapes
+import scenefile
+from mesh import triangulate
+from utils import convex_hull
+
+MAX_ISSUES = 20  # problemas listados por cena (o total sempre é contado)
+
+
+def _area2(verts, starts, counts):
+    """Dobro da área com sinal de cada polígono (fórmula do laço), vetorizado"""
+    nxt = np.arange(1, len(verts) + 1)
+    nxt[starts + counts - 1] = starts
+    cross = verts[:, 0] * verts[nxt, 1] - verts[nxt, 0] * verts[:, 1]
+    return np.add.reduceat(cross, starts) if len(starts) else np.zeros(0)
+
+
+def normalize_transforms(st, rows):
+    """
+    Rotação em [0, 360) e escalas (-a, -b) trocadas por (a, b) com +180° (a
+    mesma matriz). Devolve o nº de formas alteradas.
+    """
+    rot = st.rotation[rows]
+    sx, sy = st.scale_x[rows], st.scale_y[rows]
+    flip = (sx < 0) & (sy < 0)
+    new_rot = np.mod(rot + np.where(flip, 180.0, 0.0), 360.0)
+    changed = flip | (new_rot != rot)
+    st.rotation[rows] = new_rot
+    st.scale_x[rows] = np.where(flip, -sx, sx)
+    st.scale_y[rows] = np.where(flip, -sy, sy)
+    return int(changed.sum())
+
+
+def validate(st, rows):
+    """Problemas encontrados: (total, [(índice na ordem de desenho, descrição), ...])"""
+    issues = []
+    finite = (np.isfinite(st.x[rows]) & np.isfinite(st.y[rows]) & np.isfinite(st.rotation[rows])
+              & np.isfinite(st.scale_x[rows]) & np.isfinite(st.scale_y[rows]))
+    for i in np.flatnonzero(~finite).tolist():
+        issues.append((i, 'transformação não finita'))
+    degenerate = (st.scale_x[rows] == 0) | (st.scale_y[rows] == 0)
+    for i in np.flatnonzero(degenerate).tolist():
+        issues.append((i, 'escala zero'))
+
+    poly = np.flatnonzero(st.kind[rows] == shapes.Polygon.kind)
+    if len(poly):
+        counts = st.vcount[rows[poly]]
+        for i, c in zip(poly[counts < 3].tolist(), counts[counts < 3].tolist()):
+            issues.append((i, f'polígono com {c} vértices'))
+        poly = poly[counts >= 3]
+    if len(poly):
+        verts, counts = st.gather_vertices(rows[poly])
+        starts = np.cumsum(counts) - counts
+        bad_coords = np.logical_or.reduceat(~np.isfinite(verts).all(axis=1), starts)
+        area2 = _area2(verts, starts, counts)
+        for j, i in enumerate(poly.tolist()):
+            if bad_coords[j]:
+                issues.append((i, 'vértice não finito'))
+            elif abs(area2[j]) < 1e-12:
+                issues.append((i, 'polígono de área zero'))
+            elif not triangulate(verts[starts[j]:starts[j] + counts[j]])[1]:
+                issues.append((i, 'polígono com auto-interseção'))
+    issues.sort()
+    return len(issues), issues[:MAX_ISSUES]
+
+
+def scene_hull(verts):
+    """Fecho convexo (utils.convex_hull) de todos os vértices de mundo da cena"""
+    pts = verts[np.isfinite(verts).all(axis=1)]
+    if len(pts) > 8:
+        # Akl–Toussaint: descarta os pontos dentro do quadrilátero dos extremos
+        quad = pts[[pts[:, 0].argmin(), pts[:, 1].argmin(), pts[:, 0].argmax(), pts[:, 1].argmax()]]
+        inside = np.ones(len(pts), dtype=bool)
+        for a, b in zip(quad, np.roll(quad, -1, axis=0)):
+            inside &= (b[0] - a[0]) * (pts[:, 1] - a[1]) - (b[1] - a[1]) * (pts[:, 0] - a[0]) > 0
+        pts = pts[~inside]
+    return convex_hull([tuple(p) for p in pts.tolist()])
+
+
+def process_scene(path, normalized_dir=None):
+    """Processa um arquivo de cena e devolve o registro (dict) do resultado"""
+    t0 = time.perf_counter()
+    try:
+        st = scenefile.load(path)
+    except (OSError, scenefile.SceneFileError) as e:
+        return {'path': path, 'error': str(e)}
+    rows = st.rows()
+    normalized = normalize_transforms(st, rows)
+    verts, _, counts = st.world_vertices(rows)
+    result = {'path': path, 'shapes': len(rows), 'vertices': int(counts.sum())}
+    if len(rows):
+        b = st.world_bounds(rows)
+        result['bounds'] = [float(b[:, 0].min()), float(b[:, 1].max()),
+                            float(b[:, 2].min()), float(b[:, 3].max())]
+    result['normalized'] = normalized
+    result['issue_count'], issues = validate(st, rows)
+    result['issues'] = [{'index': i, 'problem': p} for i, p in issues]
+    result['hull'] = scene_hull(verts)
+    if normalized_dir is not None:
+        scenefile.save(os.path.join(normalized_dir, os.path.basename(path)), st)
+    result['seconds'] = time.perf_counter() - t0
+    return result
+
+
+def _job(args):
+    try:
+        return process_scene(*args)
+    except Exception as e:
+        # Falha inesperada numa cena: registro de erro em vez de derrubar o lote
+        return {'path': args[0], 'error': f'{type(e).__name__}: {e}'}
+
+
+def _chunk_job(jobs):
+    return [_job(j) for j in jobs]
+
+
+def _results(jobs, processes, chunksize):
+    """Resultados na ordem em que os blocos terminam"""
+    if processes == 1:
+        yield from map(_job, jobs)
+        return
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(_chunk_job, jobs[i:i + chunksize])
+                   for i in range(0, len(jobs), chunksize)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def find_scenes(inputs):
+    """Arquivos de cena dos argumentos (pastas viram todos os *.trb3 dentro delas)"""
+    paths = []
+    for p in inputs:
+        if os.path.isdir(p):
+            paths.extend(sorted(glob.glob(os.path.join(p, '**', '*.trb3'), recursive=True)))
+        else:
+            paths.append(p)
+    return paths
+
+
+def run(paths, out, processes=None, chunksize=None, normalized_dir=None, progress=None):
+    """
+    Processa 'paths' num pool e grava um registro JSON por linha em 'out' na
+    ordem em que terminam. Devolve os totais (cenas, vértices, erros, tempo).
+    """
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        # Blocos pequenos o bastante para equilibrar a carga (~8 por processo)
+        chunksize = max(1, min(64, len(paths) // (8 * processes)))
+    if normalized_dir is not None:
+        os.makedirs(normalized_dir, exist_ok=True)
+    jobs = [(p, normalized_dir) for p in paths]
+    totals = {'scenes': 0, 'vertices': 0, 'shapes': 0, 'errors': 0, 'issues': 0}
+    t0 = time.perf_counter()
+    last = t0
+    with open(out, 'w') as f:
+        for r in _results(jobs, processes, chunksize):
+            f.write(json.dumps(r) + '\n')
+            totals['scenes'] += 1
+            if 'error' in r:
+                totals['errors'] += 1
+            else:
+                totals['vertices'] += r['vertices']
+                totals['shapes'] += r['shapes']
+                totals['issues'] += r['issue_count']
+            now = time.perf_counter()
+            if progress and now - last >= 1.0:
+                last = now
+                progress(totals, now - t0, len(paths))
+    totals['seconds'] = time.perf_counter() - t0
+    return totals
+
+
+def _report(totals, elapsed, total=None):
+    rate = totals['scenes'] / elapsed if elapsed > 0 else 0.0
+    vrate = totals['vertices'] / elapsed if elapsed > 0 else 0.0
+    done = f"{totals['scenes']}/{total}" if total is not None else str(totals['scenes'])
+    return f'{done} cenas em {elapsed:.1f} s ({rate:.1f} cenas/s, {vrate / 1e6:.2f} M vértices/s)'
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Processa arquivos de cena em lote (sem OpenGL).')
+    p.add_argument('inputs', nargs='+', help='arquivos .trb3 ou pastas com eles')
+    p.add_argument('--out', default='resultados.jsonl', help='arquivo de resultados (JSON Lines)')
+    p.add_argument('--processes', type=int, default=None, help='processos (padrão: nº de núcleos)')
+    p.add_argument('--chunksize', type=int, default=None, help='cenas por bloco enviado a um processo')
+    p.add_argument('--normalized', default=None, help='pasta para gravar as cenas normalizadas')
+    args = p.parse_args(argv)
+
+    paths = find_scenes(args.inputs)
+    if not paths:
+        p.error('nenhum arquivo de cena encontrado')
+    totals = run(paths, args.out, args.processes, args.chunksize, args.normalized,
+                 progress=lambda t, e, n: print(_report(t, e, n), file=sys.stderr))
+    print(_report(totals, totals['seconds']))
+    print(f"{totals['shapes']} formas, {totals['issues']} problemas, "
+          f"{totals['errors']} erros -> {args.out}")
+    return 1 if totals['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# scheduler.py
+# Laço principal com redesenho sob demanda: só renderiza quando a cena
+# foi marcada como suja (state.needs_redraw); caso contrário bloqueia
+# esperando eventos.
+
+import time
+import glfw
+import state
+import motion
+import stream
+
+
+class FrameStats:
+    """Contadores de quadros desenhados x pulados (não dependem de janela)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.rendered = 0
+        self.skipped = 0       # despertares do laço sem redesenho
+        self.idle_time = 0.0   # tempo bloqueado esperando eventos (s)
+        self.render_time = 0.0
+        self.started = time.perf_counter()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        total = self.rendered + self.skipped
+        return {
+            'elapsed_s': elapsed,
+            'frames_rendered': self.rendered,
+            'frames_skipped': self.skipped,
+            'skip_ratio': self.skipped / total if total else 0.0,
+            'idle_time_s': self.idle_time,
+            'render_time_s': self.render_time,
+        }
+
+
+stats = FrameStats()
+
+
+def _wait(timeout):
+    t0 = time.perf_counter()
+    glfw.wait_events_timeout(timeout)
+    stats.idle_time += time.perf_counter() - t0
+
+
+def run(window, render):
+    """Executa o laço até a janela ser fechada"""
+    last_frame = 0.0
+    while not glfw.window_should_close(window):
+        # Carga em andamento: acrescenta formas entre quadros e não dorme muito
+        loading = stream.loader.active
+        if loading:
+            stream.loader.step()
+        if not state.needs_redraw:
+            _wait(min(state.idle_timeout, 0.005) if loading else state.idle_timeout)
+            if not state.needs_redraw:
+                stats.skipped += 1
+            continue
+
+        # Limita a taxa de quadros durante arrastos (eventos de mouse chegam muito mais rápido)
+        now = time.perf_counter()
+        if state.dragging and state.drag_fps_cap:
+            wait = last_frame + 1.0 / state.drag_fps_cap - now
+            if wait > 0:
+                _wait(wait)
+                stats.skipped += 1
+                continue
+
+        motion.queue.flush()  # movimentos do mouse desde o último quadro, de uma vez
+        state.needs_redraw = False
+        render(window)
+        stream.loader.frame_rendered()
+        last_frame = time.perf_counter()
+        stats.rendered += 1
+        stats.render_time += last_frame - now
+        glfw.poll_events()
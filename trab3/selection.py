@@ -0,0 +1,190 @@
+# selection.py
+# Seleção múltipla: retângulo (box), laço (lasso) e transformações do grupo
+# (translate/rotate/resize em torno do AABB do grupo). Cada passo do arrasto
+# é uma única atualização afim vetorizada no ShapeStore (apply_affine).
+
+import math
+import numpy as np
+import state
+import scene
+import shapes
+import picking
+from utils import points_in_polygon
+
+ROTATION_OFFSET = 0.1   # distância (view space) do handle de rotação acima do grupo
+
+# Handle oposto (âncora) de cada um dos 8 handles (mesma ordem de Shape.get_handles_local_base)
+OPPOSITE = {0: 2, 1: 3, 2: 0, 3: 1, 4: 6, 5: 7, 6: 4, 7: 5}
+
+_bounds = None    # cache do AABB do grupo
+_members = set()  # formas do grupo para as quais o cache vale
+
+
+def _on_transform(s):
+    global _bounds
+    if _bounds is not None and s in _members:
+        _bounds = None
+
+
+def _on_transform_many(st, group):
+    global _bounds
+    if _bounds is not None and not _members.isdisjoint(group):
+        _bounds = None
+
+
+shapes.transform_listeners.append(_on_transform)
+shapes.transform_listeners_many.append(_on_transform_many)
+
+
+def set_group(group):
+    """Troca a seleção: 1 forma vira state.selected, 2 ou mais viram state.group"""
+    global _bounds, _members
+    _bounds = None
+    _members = set()
+    if len(group) == 1:
+        state.selected, state.group = group[0], []
+    else:
+        state.selected, state.group = None, list(group)
+
+
+def toggle(s):
+    """Shift+clique: adiciona/remove a forma da seleção"""
+    group = state.group or ([state.selected] if state.selected is not None else [])
+    if s in group:
+        set_group([g for g in group if g is not s])
+    else:
+        set_group(group + [s])
+
+
+# --- seleção por região ---
+def _fully_inside(cands, rect):
+    minx, maxx, miny, maxy = rect
+    out = []
+    for s in cands:
+        bminx, bmaxx, bminy, bmaxy = s.bounding_box_world()
+        if bminx >= minx and bmaxx <= maxx and bminy >= miny and bmaxy <= maxy:
+            out.append(s)
+    return out
+
+
+def _sorted_by_z(group):
+    return sorted(group, key=lambda s: s.z)
+
+
+def in_rect(p0, p1):
+    """Formas totalmente dentro do retângulo de cantos p0 e p1"""
+    rect = (min(p0[0], p1[0]), max(p0[0], p1[0]), min(p0[1], p1[1]), max(p0[1], p1[1]))
+    # Para o retângulo o teste de AABB já é exato
+    return _sorted_by_z(_fully_inside(scene.index.candidates_in(rect), rect))
+
+
+def in_lasso(points):
+    """Formas com todos os vértices dentro do laço (polígono 'points')"""
+    if len(points) < 3:
+        return []
+    poly = np.asarray(points, dtype=np.float64)
+    rect = (poly[:, 0].min(), poly[:, 0].max(), poly[:, 1].min(), poly[:, 1].max())
+    # Fase larga: índice espacial + AABB dentro do AABB do laço
+    cands = _fully_inside(scene.index.candidates_in(rect), rect)
+    if not cands:
+        return []
+    # Fase exata: um teste vetorizado com os vértices de todas as candidatas
+    st = state.shapes
+    verts, starts, counts = st.world_vertices(st.rows_of(cands))
+    inside = points_in_polygon(verts, poly)
+    ok = np.logical_and.reduceat(inside, starts) if len(verts) else np.zeros(0, bool)
+    return _sorted_by_z([s for s, keep in zip(cands, ok.tolist()) if keep])
+
+
+# --- geometria do grupo ---
+def bounds():
+    """AABB de mundo (minx, maxx, miny, maxy) do grupo"""
+    global _bounds, _members
+    if _bounds is None:
+        st = state.shapes
+        b = st.world_bounds(st.rows_of(state.group))
+        _bounds = (float(b[:, 0].min()), float(b[:, 1].max()),
+                   float(b[:, 2].min()), float(b[:, 3].max()))
+        _members = set(state.group)
+    return _bounds
+
+
+def handles():
+    """8 handles (8, 2) do AABB do grupo, na ordem dos handles de Shape"""
+    minx, maxx, miny, maxy = bounds()
+    cx = (minx + maxx) / 2
+    cy = (miny + maxy) / 2
+    return np.array([(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy),
+                     (cx, miny), (maxx, cy), (cx, maxy), (minx, cy)])
+
+
+def rotation_handle():
+    minx, maxx, miny, maxy = bounds()
+    return ((minx + maxx) / 2, maxy + ROTATION_OFFSET / state.global_zoom)
+
+
+def pick(wx, wy):
+    """Modo do arrasto do grupo sob (wx, wy): (modo, handle) ou (None, None)"""
+    size = picking.HANDLE_SIZE / state.global_zoom
+    hit = np.abs(handles() - (wx, wy)).max(axis=1) <= size
+    if hit.any():
+        return 'group_resize', int(hit.argmax())
+    rx, ry = rotation_handle()
+    radius = picking.ROTATION_RADIUS / state.global_zoom
+    if (wx - rx) ** 2 + (wy - ry) ** 2 <= radius ** 2:
+        return 'group_rotate', None
+    top = scene.shape_at(wx, wy)
+    if top is not None and top in _members:  # _members acabou de ser atualizado por bounds()
+        return 'group_translate', None
+    return None, None
+
+
+# --- arrasto do grupo ---
+def begin_drag(mode, wx, wy, handle=None):
+    """Guarda as colunas iniciais do grupo; os passos seguintes partem delas"""
+    st = state.shapes
+    rows = st.rows_of(state.group)
+    minx, maxx, miny, maxy = bounds()
+    drag = {'rows': rows, 'base': st.transforms(rows), 'start': (wx, wy)}
+    if mode == 'group_rotate':
+        cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+        drag['pivot'] = (cx, cy)
+        drag['angle'] = math.atan2(wy - cy, wx - cx)
+    elif mode == 'group_resize':
+        pts = handles()
+        drag['handle'] = handle
+        drag['grip'] = tuple(pts[handle])
+        drag['anchor'] = tuple(pts[OPPOSITE[handle]])
+    state.group_drag = drag
+    state.mode_mouse = mode
+
+
+def drag_to(wx, wy):
+    """Aplica o passo atual do arrasto como uma matriz afim sobre o grupo"""
+    drag = state.group_drag
+    mode = state.mode_mouse
+    if mode == 'group_translate':
+        sx, sy = drag['start']
+        m = np.array([[1.0, 0.0, wx - sx], [0.0, 1.0, wy - sy]])
+    elif mode == 'group_rotate':
+        cx, cy = drag['pivot']
+        a = math.atan2(wy - cy, wx - cx) - drag['angle']
+        ca, sa = math.cos(a), math.sin(a)
+        m = np.array([[ca, -sa, cx - ca * cx + sa * cy],
+                      [sa, ca, cy - sa * cx - ca * cy]])
+    else:  # group_resize
+        ax, ay = drag['anchor']
+        gx, gy = drag['grip']
+        fx = (wx - ax) / (gx - ax) if abs(gx - ax) > 1e-7 else 1.0
+        fy = (wy - ay) / (gy - ay) if abs(gy - ay) > 1e-7 else 1.0
+        fx, fy = max(fx, 0.02), max(fy, 0.02)
+        if drag['handle'] in (4, 6):   # top/bottom-center
+            fx = 1.0
+        elif drag['handle'] in (5, 7): # left/right-center
+            fy = 1.0
+        m = np.array([[fx, 0.0, ax - fx * ax], [0.0, fy, ay - fy * ay]])
+    state.shapes.apply_affine(drag['rows'], m, drag['base'])
+
+
+def end_drag():
+    state.group_drag = None
@@ -1,53 +1,208 @@
 # shapes.py
 # Define a classe base Shape e todas as formas concretas.
+# Só geometria: o desenho (OpenGL) fica em rendering.py, então este módulo
+# também serve a ferramentas sem janela (raster.py, sceneproc.py).
 
 import math
-from OpenGL.GL import *
-from utils import rotate_point, inverse_rotate_point, point_in_polygon
+import numpy as np
+import store
+from mesh import PolygonMesh
+from lod import LODPyramid
+from utils import rotate_point, inverse_rotate_point, point_in_polygon, points_in_polygon
+
+# Funções chamadas com a forma sempre que sua transformação muda
+# (usado para manter índices auxiliares, como o índice espacial, atualizados)
+transform_listeners = []
+# Versão em lote, chamada com (store, formas) pelas operações do store
+# sobre várias linhas; cada listener acima precisa do seu par aqui
+transform_listeners_many = store.touched_listeners
+
+# Tesselações do círculo unitário, uma por nível de detalhe (nº de segmentos)
+_unit_circles = {}
+
+# Geometria base das primitivas (flyweight), uma por (tipo, parâmetros)
+_geometries = {}
+MAX_GEOMETRIES = 1024  # raios desenhados com o mouse são quase todos diferentes
+
+def unit_circle(segments):
+    """Pontos (segments, 2) do círculo unitário; compartilhados, somente leitura"""
+    pts = _unit_circles.get(segments)
+    if pts is None:
+        a = 2 * np.pi * np.arange(segments) / segments
+        pts = np.column_stack((np.cos(a), np.sin(a)))
+        pts.flags.writeable = False
+        _unit_circles[segments] = pts
+    return pts
+
+def shared_geometry(key, build):
+    """Vértices base de uma primitiva, montados uma vez por chave; somente leitura"""
+    pts = _geometries.get(key)
+    if pts is None:
+        if len(_geometries) >= MAX_GEOMETRIES:
+            _geometries.clear()
+        pts = np.asarray(build(), dtype=np.float64).reshape(-1, 2)
+        pts.flags.writeable = False
+        _geometries[key] = pts
+    return pts
+
+def circle_segments(radius_px, max_error_px=0.25, lo=8, hi=1024):
+    """
+    Nº de segmentos (potência de 2) para que a corda se afaste no máximo
+    max_error_px do círculo de raio radius_px (em pixels): n >= pi * sqrt(R / 2e)
+    """
+    n = math.pi * math.sqrt(max(radius_px, 0.0) / (2 * max_error_px))
+    segments = lo
+    while segments < n and segments < hi:
+        segments *= 2
+    return segments
+
+def _column(name):
+    """Propriedade que lê/escreve uma coluna do store e invalida os caches"""
+    def get(self):
+        return float(getattr(self._store, name)[self._row])
+
+    def set(self, value):
+        getattr(self._store, name)[self._row] = value
+        self._invalidate()
+
+    return property(get, set)
+
 
 # ---------- formas ----------
 class Shape:
-    def __init__(self, vertices):
-        self.base_vertices = vertices[:]  # não modificar diretamente
-        self.x = 0.0
-        self.y = 0.0
-        self.rotation = 0.0  # graus
-        self.scale_x = 1.0
-        self.scale_y = 1.0
-        self.color = (0.0, 0.0, 0.0)
+    # Handle leve: os dados ficam nas colunas de um ShapeStore (store.py)
+    __slots__ = ('_store', '_row', '_matrix', '_world', '_bbox', '_outline', '__weakref__')
+
+    # True quando o contorno desenhado depende do zoom (ver outline_vertices)
+    adaptive = False
+
+    def __init__(self, vertices, key=None):
+        # Até entrar na cena a forma vive no store das formas soltas; com 'key'
+        # os vértices base são compartilhados com as formas de mesma chave
+        self._attach(store.loose, store.loose.alloc_row(type(self).kind, vertices, key))
+
+    def _attach(self, st, row):
+        self._store = st
+        self._row = row
+        self._matrix = None  # cache da matriz afim 2x3
+        self._world = None   # cache dos vértices no mundo
+        self._bbox = None    # cache do AABB no mundo
+        self._outline = None # cache do contorno desenhado: (nível de detalhe, vértices)
+
+    def __del__(self):
+        # Formas soltas devolvem sua linha quando deixam de ser usadas
+        st = getattr(self, '_store', None)
+        if st is not None and not st.keep_handles:
+            st.release_row(self._row)
+
+    # --- transformações (qualquer alteração invalida o cache) ---
+    def _drop_caches(self):
+        self._matrix = None
+        self._world = None
+        self._bbox = None
+        self._outline = None
+
+    def _invalidate(self):
+        self._drop_caches()
+        for fn in transform_listeners:
+            fn(self)
+
+    x = _column('x')
+    y = _column('y')
+    rotation = _column('rotation')  # graus
+    scale_x = _column('scale_x')
+    scale_y = _column('scale_y')
+
+    @property
+    def z(self):
+        """Chave da ordem de desenho (maior = mais à frente); muda via scene/store"""
+        return float(self._store.z[self._row])
+
+    def get_transform(self):
+        st, row = self._store, self._row
+        return (float(st.x[row]), float(st.y[row]), float(st.rotation[row]),
+                float(st.scale_x[row]), float(st.scale_y[row]))
+
+    def set_transform(self, transform):
+        """Define (x, y, rotation, scale_x, scale_y) de uma vez (um único aviso aos listeners)"""
+        st, row = self._store, self._row
+        st.x[row], st.y[row], st.rotation[row], st.scale_x[row], st.scale_y[row] = transform
+        self._invalidate()
+
+    @property
+    def color(self):
+        return tuple(float(c) for c in self._store.color[self._row])
+
+    @color.setter
+    def color(self, value):
+        self._store.color[self._row] = value
+        self._invalidate()
+
+    @property
+    def base_vertices(self):
+        # View somente leitura do array de vértices do store (não modificar diretamente)
+        return self._store.base_view(self._row)
+
+    @base_vertices.setter
+    def base_vertices(self, vertices):
+        self._store.set_vertices(self._row, vertices)
+        self._base_changed()
+        self._invalidate()
+
+    def _base_changed(self):
+        # Subclasses com caches no espaço base (ex.: malha do Polygon) os descartam aqui
+        pass
+
+    def transform_matrix(self):
+        """Matriz afim 2x3 (escala -> rotação -> translação), recalculada só quando muda"""
+        if self._matrix is None:
+            st, row = self._store, self._row
+            a = math.radians(st.rotation[row])
+            ca = math.cos(a)
+            sa = math.sin(a)
+            sx = st.scale_x[row]
+            sy = st.scale_y[row]
+            self._matrix = np.array([
+                [ca * sx, -sa * sy, st.x[row]],
+                [sa * sx,  ca * sy, st.y[row]],
+            ])
+        return self._matrix
+
+    def apply_transform(self, points):
+        """Leva pontos do espaço base para o mundo em uma única operação vetorizada"""
+        m = self.transform_matrix()
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return pts @ m[:, :2].T + m[:, 2]
 
     def transformed_vertices(self):
-        out = []
-        for bx, by in self.base_vertices:
-            sx = bx * self.scale_x
-            sy = by * self.scale_y
-            rx, ry = rotate_point(sx, sy, self.rotation)
-            out.append((rx + self.x, ry + self.y))
-        return out
+        if self._world is None:
+            self._world = self.apply_transform(self.base_vertices)
+            self._world.flags.writeable = False
+        return self._world
 
     def contains(self, px, py):
         verts = self.transformed_vertices()
-        return point_in_polygon(px, py, verts)
+        if len(verts) > 32:
+            # Polígonos grandes: teste vetorizado sobre todas as arestas
+            return bool(points_in_polygon((px, py), verts)[0])
+        return point_in_polygon(px, py, verts.tolist())
 
-    def draw(self):
-        verts = self.transformed_vertices()
-        glColor3f(*self.color)
-        glLineWidth(1.5)
-        glBegin(GL_LINE_LOOP)
-        for vx, vy in verts:
-            glVertex2f(vx, vy)
-        glEnd()
+    def outline_vertices(self, pixels_per_unit=None):
+        """Contorno desenhado no mundo; formas adaptativas o refinam com o zoom"""
+        return self.transformed_vertices()
 
     def local_bounds(self):
-        xs = [p[0] for p in self.base_vertices]
-        ys = [p[1] for p in self.base_vertices]
-        return min(xs), max(xs), min(ys), max(ys)
+        mins = self.base_vertices.min(axis=0)
+        maxs = self.base_vertices.max(axis=0)
+        return float(mins[0]), float(maxs[0]), float(mins[1]), float(maxs[1])
 
     def bounding_box_world(self):
-        verts = self.transformed_vertices()
-        xs = [v[0] for v in verts]
-        ys = [v[1] for v in verts]
-        return min(xs), max(xs), min(ys), max(ys)
+        if self._bbox is None:
+            verts = self.transformed_vertices()
+            mins = verts.min(axis=0)
+            maxs = verts.max(axis=0)
+            self._bbox = (float(mins[0]), float(maxs[0]), float(mins[1]), float(maxs[1]))
+        return self._bbox
 
     def get_handles_local_base(self):
         """
@@ -71,42 +226,26 @@ class Shape:
         """
         Transforma os handles 'base' para o espaço do mundo
         """
-        handles_world = []
-        base_handles = self.get_handles_local_base()
-        
-        for bx, by in base_handles:
-            # 1. Aplicar escala
-            sx = bx * self.scale_x
-            sy = by * self.scale_y
-            # 2. Aplicar rotação
-            rx, ry = rotate_point(sx, sy, self.rotation)
-            # 3. Aplicar translação (posição do objeto)
-            handles_world.append((rx + self.x, ry + self.y))
-            
-        return handles_world
-
-    def rotation_handle_world(self):
-        minx, maxx, miny, maxy = self.bounding_box_world()
-        cx = (minx + maxx) / 2
-        top = maxy
+        # Escala, rotação e translação aplicadas de uma vez pela matriz em cache
+        handles = self.apply_transform(self.get_handles_local_base())
+        return [(float(hx), float(hy)) for hx, hy in handles]
+
+    def rotation_handle_world(self, handles=None):
+        """Handle de rotação: a alça 'top-center' empurrada para fora do centro"""
         offset = 0.06
-        
-        try:
-            hx, hy = self.get_handles_world()[6] # Pega a alça 'top-center' (índice 6)
-            cx, cy = self.x, self.y # Posição do centro do objeto
-            vx, vy = hx - cx, hy - cy # Vetor do centro para a alça
-            v_len = math.sqrt(vx*vx + vy*vy)
-            
-            # Normaliza e estende o vetor
-            if v_len > 1e-6:
-                nx, ny = vx / v_len, vy / v_len
-                return (hx + nx * offset, hy + ny * offset)
-            else:
-                return (cx, top + offset) # Fallback
-        except IndexError:
-             minx, maxx, miny, maxy = self.bounding_box_world()
-             cx = (minx + maxx) / 2
-             return (cx, maxy + offset)
+        if handles is None:
+            handles = self.apply_transform(self.get_handles_local_base())
+        hx, hy = float(handles[6][0]), float(handles[6][1])  # alça 'top-center' (índice 6)
+        cx, cy = self.x, self.y # Posição do centro do objeto
+        vx, vy = hx - cx, hy - cy # Vetor do centro para a alça
+        v_len = math.sqrt(vx*vx + vy*vy)
+
+        # Normaliza e estende o vetor
+        if v_len > 1e-6:
+            nx, ny = vx / v_len, vy / v_len
+            return (hx + nx * offset, hy + ny * offset)
+        minx, maxx, miny, maxy = self.bounding_box_world()
+        return ((minx + maxx) / 2, maxy + offset) # Fallback
 
 
     def world_to_base_with_scale(self, wx, wy, scale_x=None, scale_y=None):
@@ -120,29 +259,189 @@ class Shape:
         return bx, by
 
 
+store.register_kind(Shape)
+
+
+@store.register_kind
 class Triangle(Shape):
+    __slots__ = ()
+
     def __init__(self, size=0.2):
+        key = (Triangle.kind, float(size))
+        super().__init__(shared_geometry(key, lambda: Triangle.geometry(size)), key)
+
+    @staticmethod
+    def geometry(size):
         h = size * math.sqrt(3) / 2
-        verts = [(-size/2, -h/3), (size/2, -h/3), (0.0, 2*h/3)]
-        super().__init__(verts)
+        return [(-size/2, -h/3), (size/2, -h/3), (0.0, 2*h/3)]
 
 
+@store.register_kind
 class Rectangle(Shape):
+    __slots__ = ()
+
     def __init__(self, w=0.3, h=0.2):
+        key = (Rectangle.kind, float(w), float(h))
+        super().__init__(shared_geometry(key, lambda: Rectangle.geometry(w, h)), key)
+
+    @staticmethod
+    def geometry(w, h):
         hw = w / 2
         hh = h / 2
-        verts = [(-hw, -hh), (hw, -hh), (hw, hh), (-hw, hh)]
-        super().__init__(verts)
+        return [(-hw, -hh), (hw, -hh), (hw, hh), (-hw, hh)]
 
 
+@store.register_kind
 class Circle(Shape):
+    # Elipse analítica: centro (x, y), raios radius*scale_x e radius*scale_y,
+    # girada por rotation. Os vértices base (48 segmentos) só servem às rotinas
+    # genéricas (arquivo, índices); teste de ponto, AABB e desenho são exatos.
+    __slots__ = ()
+    adaptive = True
+
     def __init__(self, radius=0.15, segments=48):
-        verts = []
-        for i in range(segments):
-            a = 2 * math.pi * i / segments
-            verts.append((math.cos(a) * radius, math.sin(a) * radius))
-        super().__init__(verts)
+        key = (Circle.kind, float(radius), int(segments))
+        super().__init__(shared_geometry(key, lambda: unit_circle(segments) * radius), key)
+
+    @property
+    def radius(self):
+        # O primeiro vértice base é (radius, 0)
+        st = self._store
+        return float(st.verts[st.vstart[self._row], 0])
+
+    def contains(self, px, py):
+        st, row = self._store, self._row
+        a = math.radians(st.rotation[row])
+        dx = px - st.x[row]
+        dy = py - st.y[row]
+        if st.scale_x[row] == 0 or st.scale_y[row] == 0:
+            return False  # elipse degenerada
+        # Leva o ponto para o espaço base (inverso da rotação e da escala)
+        u = (dx * math.cos(a) + dy * math.sin(a)) / st.scale_x[row]
+        v = (-dx * math.sin(a) + dy * math.cos(a)) / st.scale_y[row]
+        r = self.radius
+        return bool(u * u + v * v <= r * r)
+
+    def bounding_box_world(self):
+        if self._bbox is None:
+            st, row = self._store, self._row
+            ex, ey = _ellipse_extents(self.radius, st.scale_x[row], st.scale_y[row],
+                                      st.rotation[row])
+            x, y = float(st.x[row]), float(st.y[row])
+            self._bbox = (x - ex, x + ex, y - ey, y + ey)
+        return self._bbox
+
+    @classmethod
+    def world_bounds_many(cls, st, rows):
+        """AABBs exatos (k, 4) de várias elipses do store (usado por ShapeStore.world_bounds)"""
+        ex, ey = _ellipse_extents(st.verts[st.vstart[rows], 0], st.scale_x[rows],
+                                  st.scale_y[rows], st.rotation[rows])
+        x, y = st.x[rows], st.y[rows]
+        return np.column_stack((x - ex, x + ex, y - ey, y + ey))
+
+    def outline_vertices(self, pixels_per_unit=None):
+        if pixels_per_unit is None:
+            return self.transformed_vertices()
+        st, row = self._store, self._row
+        r = self.radius
+        radius_px = r * max(abs(st.scale_x[row]), abs(st.scale_y[row])) * pixels_per_unit
+        segments = circle_segments(radius_px)
+        if self._outline is None or self._outline[0] != segments:
+            verts = self.apply_transform(unit_circle(segments) * r)
+            verts.flags.writeable = False
+            self._outline = (segments, verts)
+        return self._outline[1]
 
+
+def _ellipse_extents(r, sx, sy, rotation):
+    """Meias-larguras (ex, ey) do AABB de uma elipse de raios r*sx, r*sy girada"""
+    a = np.radians(rotation)
+    ca, sa = np.cos(a), np.sin(a)
+    rx, ry = r * sx, r * sy
+    ex = np.sqrt((rx * ca) ** 2 + (ry * sa) ** 2)
+    ey = np.sqrt((rx * sa) ** 2 + (ry * ca) ** 2)
+    if np.ndim(ex) == 0:
+        return float(ex), float(ey)
+    return ex, ey
+
+
+@store.register_kind
 class Polygon(Shape):
+    # Malha (triangulação + BVH, mesh.py) e pirâmide de LOD (lod.py) criadas no
+    # primeiro uso e mantidas enquanto os vértices base não mudam
+    __slots__ = ('_mesh', '_lod')
+
+    # Abaixo disso o ray casting direto é mais barato que montar a malha
+    MESH_MIN_VERTICES = 32
+    # Polígonos menores que isso são sempre desenhados com todos os vértices
+    LOD_MIN_VERTICES = 32
+
     def __init__(self, pts):
-        super().__init__(pts)
\ No newline at end of file
+        super().__init__(pts)
+
+    def _attach(self, st, row):
+        super()._attach(st, row)
+        self._mesh = None
+        self._lod = None
+
+    def _base_changed(self):
+        self._mesh = None
+        self._lod = None
+
+    def mesh(self):
+        if self._mesh is None:
+            self._mesh = PolygonMesh(self.base_vertices)
+        return self._mesh
+
+    @property
+    def adaptive(self):
+        return len(self.base_vertices) > self.LOD_MIN_VERTICES
+
+    def _lod_level(self, pixels_per_unit):
+        """Nível da pirâmide para o zoom dado, ou None para a geometria exata"""
+        n = len(self.base_vertices)
+        if pixels_per_unit is None or n <= self.LOD_MIN_VERTICES:
+            return None
+        if self._lod is None:
+            self._lod = LODPyramid(self.base_vertices)
+        st, row = self._store, self._row
+        k = self._lod.level_for(pixels_per_unit, max(abs(st.scale_x[row]), abs(st.scale_y[row])))
+        if k is None or len(self._lod.indices(k)) == n:
+            return None
+        return k
+
+    def outline_vertices(self, pixels_per_unit=None):
+        # Desenho usa o nível simplificado; picking/edição seguem com os vértices exatos
+        k = self._lod_level(pixels_per_unit)
+        if k is None:
+            return self.transformed_vertices()
+        if self._outline is None or self._outline[0] != k:
+            verts = self.apply_transform(self.base_vertices[self._lod.indices(k)])
+            verts.flags.writeable = False
+            self._outline = (k, verts)
+        return self._outline[1]
+
+    def fill_triangles(self, pixels_per_unit=None):
+        """Triângulos (índices em outline_vertices(pixels_per_unit)) para o preenchimento"""
+        k = self._lod_level(pixels_per_unit)
+        if k is None:
+            return self.mesh().triangles
+        return self._lod.triangles(k)
+
+    def contains(self, px, py):
+        if len(self.base_vertices) <= self.MESH_MIN_VERTICES:
+            return super().contains(px, py)
+        # Rejeição pelo AABB de mundo antes de qualquer coisa
+        minx, maxx, miny, maxy = self.bounding_box_world()
+        if px < minx or px > maxx or py < miny or py > maxy:
+            return False
+        mesh = self.mesh()
+        if not mesh.simple:
+            return super().contains(px, py)  # auto-intersecção: regra par-ímpar
+        # Leva o ponto ao espaço base (inverso da matriz afim)
+        (a, b, tx), (c, d, ty) = self.transform_matrix()
+        det = a * d - b * c
+        if det == 0:
+            return False
+        dx, dy = px - tx, py - ty
+        return mesh.contains((d * dx - b * dy) / det, (a * dy - c * dx) / det)
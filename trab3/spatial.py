@@ -0,0 +1,259 @@
+# spatial.py
+# Índice espacial (grade uniforme) para encontrar rapidamente a forma sob um ponto.
+
+import math
+import numpy as np
+
+OUT, CELLS, LARGE = 0, 1, 2  # onde cada linha está no índice
+
+
+class GridIndex:
+    """
+    Grade uniforme de células quadradas sobre as linhas de um ShapeStore.
+    Cada linha é registrada em todas as células que seu AABB de mundo toca;
+    linhas grandes demais ficam num conjunto à parte, testado em toda consulta.
+    As chaves são linhas, não handles: montar o índice de uma cena inteira
+    não cria nenhum handle; as consultas criam só os das formas achadas.
+    """
+
+    def __init__(self, store=None, cell_size=0.25, max_cells=256):
+        self.cell_size = cell_size
+        self.max_cells = max_cells  # acima disso a linha vai para 'large'
+        self.reset(store)
+        # A ordem de desenho vem do próprio store (coluna z: maior = mais à frente)
+
+    def reset(self, store):
+        """Esvazia o índice e passa a indexar as linhas de 'store'"""
+        self.store = store
+        self.cells = {}    # (i, j) -> set de linhas
+        self.large = set()
+        self.ranges = np.zeros((0, 4), dtype=np.int64)  # linha -> (i0, i1, j0, j1)
+        self.bounds = np.zeros((0, 4))                  # linha -> AABB de mundo
+        self.where = np.zeros(0, dtype=np.int8)         # linha -> OUT, CELLS ou LARGE
+        self.count = 0
+
+    def clear(self):
+        self.reset(self.store)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, s):
+        row = self._row(s)
+        return row is not None and self.where[row] != OUT
+
+    def _row(self, s):
+        # Linha de s se ela for do store indexado (formas soltas ficam de fora)
+        if getattr(s, '_store', None) is not self.store:
+            return None
+        self._grow(s._row + 1)
+        return s._row
+
+    def _grow(self, n):
+        cap = len(self.where)
+        if n <= cap:
+            return
+        cap = max(cap, 1024)
+        while cap < n:
+            cap *= 2
+        ranges = np.zeros((cap, 4), dtype=np.int64)
+        bounds = np.zeros((cap, 4))
+        where = np.zeros(cap, dtype=np.int8)
+        ranges[:len(self.ranges)] = self.ranges
+        bounds[:len(self.bounds)] = self.bounds
+        where[:len(self.where)] = self.where
+        self.ranges, self.bounds, self.where = ranges, bounds, where
+
+    def _cell_range(self, bbox):
+        # Uma forma só: sem numpy, que pesa mais que a conta
+        minx, maxx, miny, maxy = bbox
+        c = self.cell_size
+        return (math.floor(minx / c), math.floor(maxx / c),
+                math.floor(miny / c), math.floor(maxy / c))
+
+    def _cell_ranges(self, bounds):
+        # AABBs (N, 4) = (minx, maxx, miny, maxy) -> células (i0, i1, j0, j1)
+        return np.floor(np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+                        / self.cell_size).astype(np.int64)
+
+    def _link(self, row, rng):
+        i0, i1, j0, j1 = rng
+        self.ranges[row] = rng
+        self.count += 1
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells:
+            self.large.add(row)
+            self.where[row] = LARGE
+            return
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                bucket = cells.get((i, j))
+                if bucket is None:
+                    cells[(i, j)] = bucket = set()
+                bucket.add(row)
+        self.where[row] = CELLS
+
+    def _unlink(self, row):
+        where = self.where[row]
+        self.where[row] = OUT
+        self.count -= 1
+        if where == LARGE:
+            self.large.discard(row)
+            return
+        i0, i1, j0, j1 = self.ranges[row].tolist()
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                bucket = cells.get((i, j))
+                if bucket is not None:
+                    bucket.discard(row)
+                    if not bucket:
+                        del cells[(i, j)]
+
+    def insert(self, s):
+        row = self._row(s)
+        if row is None:
+            return
+        if self.where[row] != OUT:
+            self._unlink(row)
+        bbox = s.bounding_box_world()
+        self.bounds[row] = bbox
+        self._link(row, self._cell_range(bbox))
+
+    def insert_many(self, rows, bounds):
+        """Insere várias linhas com AABBs (N, 4) já calculados, sem criar handles"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self._grow(int(rows.max()) + 1)
+        for row in rows[self.where[rows] != OUT].tolist():
+            self._unlink(row)  # já estavam no índice (raro)
+        self.bounds[rows] = bounds
+        rng = self._cell_ranges(bounds)
+        self.ranges[rows] = rng
+        self.count += len(rows)
+        ni = rng[:, 1] - rng[:, 0] + 1
+        nj = rng[:, 3] - rng[:, 2] + 1
+        ncells = ni * nj
+        big = ncells > self.max_cells
+        self.where[rows[big]] = LARGE
+        self.large.update(rows[big].tolist())
+        small = ~big
+        rows, rng, nj, ncells = rows[small], rng[small], nj[small], ncells[small]
+        self.where[rows] = CELLS
+        if not len(rows):
+            return
+        # Um par (célula, linha) para cada célula tocada, agrupados por célula
+        owner = np.repeat(np.arange(len(rows)), ncells)
+        k = np.arange(len(owner)) - np.repeat(np.cumsum(ncells) - ncells, ncells)
+        ci = rng[owner, 0] + k // nj[owner]
+        cj = rng[owner, 2] + k % nj[owner]
+        order = np.lexsort((cj, ci))
+        ci, cj, members = ci[order], cj[order], rows[owner[order]]
+        cuts = np.flatnonzero((ci[1:] != ci[:-1]) | (cj[1:] != cj[:-1])) + 1
+        starts = np.concatenate(([0], cuts)).tolist()
+        ends = np.concatenate((cuts, [len(members)])).tolist()
+        cells = self.cells
+        members = members.tolist()
+        for i, j, a, b in zip(ci[starts].tolist(), cj[starts].tolist(), starts, ends):
+            bucket = cells.get((i, j))
+            if bucket is None:
+                cells[(i, j)] = set(members[a:b])
+            else:
+                bucket.update(members[a:b])
+
+    def remove(self, s):
+        row = self._row(s)
+        if row is not None and self.where[row] != OUT:
+            self._unlink(row)
+
+    def update(self, s):
+        """Chamada quando a forma se move/gira/redimensiona"""
+        row = self._row(s)
+        if row is None or self.where[row] == OUT:
+            return  # forma fora da cena (ainda não inserida)
+        bbox = s.bounding_box_world()
+        self.bounds[row] = bbox
+        rng = self._cell_range(bbox)
+        if self.where[row] == CELLS and tuple(self.ranges[row].tolist()) == rng:
+            return
+        self._unlink(row)
+        self._link(row, rng)
+
+    def update_many(self, rows, bounds):
+        """update() de várias linhas com AABBs (N, 4) já calculados"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self._grow(int(rows.max()) + 1)
+        where = self.where[rows]
+        inside = where != OUT
+        self.bounds[rows[inside]] = np.asarray(bounds).reshape(-1, 4)[inside]
+        rng = self._cell_ranges(bounds)
+        changed = (where == LARGE) | ((where == CELLS) & (self.ranges[rows] != rng).any(axis=1))
+        for row, r in zip(rows[changed].tolist(), map(tuple, rng[changed].tolist())):
+            self._unlink(row)
+            self._link(row, r)
+
+    def _hits(self, rows, rect):
+        # Linhas cujo AABB toca rect = (minx, maxx, miny, maxy); poucas
+        # linhas (um clique, uma célula) vão num laço simples, que sai mais
+        # barato que montar os arrays
+        minx, maxx, miny, maxy = rect
+        bounds = self.bounds
+        if len(rows) < 64:
+            out = []
+            for row in rows:
+                bminx, bmaxx, bminy, bmaxy = bounds[row].tolist()
+                if bminx <= maxx and bmaxx >= minx and bminy <= maxy and bmaxy >= miny:
+                    out.append(row)
+            return out
+        rows = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        b = bounds[rows]
+        return rows[(b[:, 0] <= maxx) & (b[:, 1] >= minx)
+                    & (b[:, 2] <= maxy) & (b[:, 3] >= miny)].tolist()
+
+    def _rows_at(self, wx, wy):
+        c = self.cell_size
+        bucket = self.cells.get((math.floor(wx / c), math.floor(wy / c)), ())
+        return self._hits([*bucket, *self.large], (wx, wx, wy, wy))
+
+    def candidates_at(self, wx, wy):
+        """Formas cujo AABB contém o ponto (ainda sem teste exato)"""
+        handle = self.store.handle
+        return [handle(row) for row in self._rows_at(wx, wy)]
+
+    def candidates_in(self, rect):
+        """Formas cujo AABB toca rect = (minx, maxx, miny, maxy) (fase larga)"""
+        minx, maxx, miny, maxy = rect
+        c = self.cell_size
+        i0, i1 = math.floor(minx / c), math.floor(maxx / c)
+        j0, j1 = math.floor(miny / c), math.floor(maxy / c)
+        found = set(self.large)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            # Retângulo maior que a parte ocupada da grade: percorre só as células existentes
+            for (i, j), bucket in self.cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found.update(bucket)
+        else:
+            cells = self.cells
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = cells.get((i, j))
+                    if bucket:
+                        found.update(bucket)
+        handle = self.store.handle
+        return [handle(row) for row in self._hits(found, rect)]
+
+    def topmost_at(self, wx, wy):
+        """Forma mais à frente que contém o ponto, ou None"""
+        rows = self._rows_at(wx, wy)
+        if not rows:
+            return None
+        rows.sort(key=self.store.z.__getitem__, reverse=True)
+        handle = self.store.handle
+        for row in rows:  # só as testadas ganham handle
+            s = handle(row)
+            if s.contains(wx, wy):
+                return s
+        return None
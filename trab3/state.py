@@ -3,18 +3,48 @@
 # Outros módulos irão importar este e acessar/modificar
 # as variáveis como 'state.shapes', 'state.global_zoom', etc.
 
+from store import ShapeStore
+
 # ---------- estado ----------
 WINDOW_W = 900
 WINDOW_H = 700
-shapes = []
+shapes = ShapeStore()  # formas da cena, em colunas (store.py), de trás para frente
 selected = None
+group = []  # seleção múltipla (selection.py); quando não vazia, selected é None
 
-mode_mouse = None  # 'translate','rotate','resize','drawing_polygon', 'drawing_circle_center', 'drawing_circle_radius', 'pan'
+mode_mouse = None  # 'translate','rotate','resize','drawing_polygon', 'drawing_circle_center', 'drawing_circle_radius', 'pan',
+                   # 'box_select', 'lasso_select', 'group_translate', 'group_rotate', 'group_resize'
 prev_mouse = (0.0, 0.0)
 global_mouse_world = (0.0, 0.0)
 
 dragging = False
 
+# Limite de memória (bytes) do histórico de desfazer/refazer (history.py)
+history_budget = 64 * 2**20
+
+# Arquivo usado pelas teclas S (salvar) e L (carregar)
+scene_path = 'cena.trb3'
+# Imagem gravada pela tecla E (raster.py, sem passar pela GPU)
+export_path = 'cena.png'
+
+# Carga progressiva (stream.py): tempo máximo por quadro acrescentando formas
+stream_budget = 0.008
+
+# Laço sob demanda (scheduler.py)
+needs_redraw = True   # a cena mudou desde o último quadro
+idle_timeout = 0.5    # espera máxima (s) por eventos quando nada muda
+drag_fps_cap = 60     # limite de quadros/s durante arrastos (None = sem limite)
+
+# Renderização: True usa o VBO em lote (batch.py), False o modo imediato
+use_vbo = True
+fill_polygons = False  # preenche os polígonos com sua triangulação (tecla F)
+use_lod = True         # contornos simplificados conforme o zoom (lod.py, tecla D)
+use_layer_cache = True # fundo em cache num FBO durante arrastos (layers.py, tecla B)
+
+# Instrumentação (profiling.py): HUD com tempos de quadro, tecla P; dump com tecla O
+show_hud = False
+profile_path = 'perfil.json'
+
 # Estado da Câmera (View)
 global_zoom = 1.0
 global_pan = (0.0, 0.0)
@@ -32,6 +62,11 @@ rotating = False
 rotation_start_angle = 0.0
 rotation_orig = 0.0
 
+# seleção por retângulo / laço
+select_start = None  # canto inicial do retângulo (mundo)
+lasso_points = []
+group_drag = None    # arrasto do grupo em andamento (selection.begin_drag)
+
 # drawing polygon
 drawing_points = []
 
@@ -0,0 +1,640 @@
+# store.py
+# Armazenamento "struct-of-arrays" das formas. Cada coluna de transformação
+# (x, y, rotação, escalas, cor, ordem z) é um array NumPy contíguo e todos os
+# vértices base ficam num único array (V, 2) indexado por início/quantidade.
+# As instâncias de Shape (shapes.py) são apenas "handles" (linha + store).
+# Primitivas com os mesmos parâmetros (flyweight) apontam para um único trecho
+# interno de vértices, identificado por uma chave; o trecho só é copiado
+# quando a geometria de uma delas muda (cópia na escrita).
+
+import numpy as np
+from zorder import OrderList
+
+# Classes de forma registradas (o índice é o código guardado na coluna 'kind')
+KINDS = []
+
+# Funções chamadas uma vez por operação em lote (translate, set_transforms,
+# apply_affine) com (store, formas afetadas), em vez de uma chamada por forma
+# (shapes.transform_listeners). Quem escuta uma lista tem de escutar a outra.
+touched_listeners = []
+
+
+def register_kind(cls):
+    cls.kind = len(KINDS)
+    KINDS.append(cls)
+    return cls
+
+
+class ShapeStore:
+    """
+    Guarda as formas em colunas. Como sequência (len, iteração, índice, 'in')
+    representa a cena na ordem de desenho, de trás para frente.
+    keep_handles=False é usado pelo store das formas soltas (fora da cena):
+    nesse caso a linha é liberada quando o handle é coletado.
+    """
+
+    COLUMNS = ('x', 'y', 'rotation', 'scale_x', 'scale_y', 'z')
+
+    def __init__(self, capacity=1024, vertex_capacity=4096, keep_handles=True):
+        self.keep_handles = keep_handles
+        self.capacity = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.rotation = np.zeros(0)  # graus
+        self.scale_x = np.zeros(0)
+        self.scale_y = np.zeros(0)
+        self.z = np.zeros(0)
+        self.color = np.zeros((0, 3), dtype=np.float32)
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.vstart = np.zeros(0, dtype=np.int64)
+        self.vcount = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self._grow_rows(capacity)
+
+        self.verts = np.zeros((vertex_capacity, 2))
+        self.vused = 0       # topo do array de vértices
+        self.vgarbage = 0    # vértices em trechos já liberados
+        self.interned = {}   # chave da geometria -> início do trecho compartilhado
+        self.shared = {}     # início de um trecho compartilhado -> [chave, nº de vértices, nº de linhas]
+
+        self.rows_used = 0   # maior linha já usada + 1
+        self.free_rows = []
+        self.handles = []    # linha -> Shape (criado sob demanda)
+        self.order = OrderList()  # linhas da cena ordenadas por z (de trás para frente)
+        self._next_z = 0.0
+
+    # ------------------------------------------------------------------
+    # Alocação
+    # ------------------------------------------------------------------
+    def _grow_rows(self, needed):
+        cap = max(self.capacity, 16)
+        while cap < needed:
+            cap *= 2
+        if cap == self.capacity:
+            return
+
+        def grown(arr, fill=0):
+            out = np.full((cap,) + arr.shape[1:], fill, dtype=arr.dtype)
+            out[:len(arr)] = arr
+            return out
+
+        for name in self.COLUMNS:
+            setattr(self, name, grown(getattr(self, name)))
+        self.color = grown(self.color)
+        self.kind = grown(self.kind)
+        self.vstart = grown(self.vstart)
+        self.vcount = grown(self.vcount)
+        self.alive = grown(self.alive, False)
+        self.capacity = cap
+
+    def _reserve_verts(self, count):
+        """Reserva 'count' vértices no topo do array; retorna o início"""
+        needed = self.vused + count
+        if needed > len(self.verts):
+            cap = max(len(self.verts), 16)
+            while cap < needed:
+                cap *= 2
+            grown = np.zeros((cap, 2))
+            grown[:self.vused] = self.verts[:self.vused]
+            self.verts = grown
+        start = self.vused
+        self.vused = needed
+        return start
+
+    def _new_row(self):
+        if self.free_rows:
+            return self.free_rows.pop()
+        row = self.rows_used
+        self.rows_used += 1
+        if self.rows_used > self.capacity:
+            self._grow_rows(self.rows_used)
+        if self.keep_handles:
+            self.handles.append(None)
+        return row
+
+    def alloc_row(self, kind, vertices, key=None):
+        """
+        Cria uma linha com transformação identidade e os vértices base dados;
+        com 'key' (hashable) a geometria é compartilhada com as linhas de mesma chave
+        """
+        row = self._new_row()
+        self.x[row] = self.y[row] = self.rotation[row] = self.z[row] = 0.0
+        self.scale_x[row] = self.scale_y[row] = 1.0
+        self.color[row] = 0.0
+        self.kind[row] = kind
+        self.alive[row] = True
+        self.vcount[row] = 0
+        if key is None:
+            self.set_vertices(row, vertices)
+        else:
+            self.share_vertices(row, key, vertices)
+        return row
+
+    def _intern(self, key, vertices):
+        """Início do trecho compartilhado da chave (criado com 'vertices' se não existe)"""
+        start = self.interned.get(key)
+        if start is None:
+            v = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+            start = self._reserve_verts(len(v))
+            self.verts[start:start + len(v)] = v
+            self.interned[key] = start
+            self.shared[start] = [key, len(v), 0]
+        return start
+
+    def share_vertices(self, row, key, vertices):
+        """Faz a linha usar o trecho compartilhado da chave (vertices só é lido na 1ª vez)"""
+        if len(vertices) == 0:
+            self.set_vertices(row, vertices)  # nada a compartilhar
+            return
+        start = self._intern(key, vertices)
+        entry = self.shared[start]
+        entry[2] += 1  # antes de soltar o trecho antigo, que pode ser o mesmo
+        self._drop_vertices(row)
+        self.vstart[row] = start
+        self.vcount[row] = entry[1]
+
+    def _drop_vertices(self, row):
+        """Solta o trecho da linha: compartilhado perde uma referência, próprio vira lixo"""
+        count = int(self.vcount[row])
+        if count == 0:
+            return
+        entry = self.shared.get(int(self.vstart[row]))
+        if entry is None:
+            self.vgarbage += count
+            return
+        entry[2] -= 1
+        if entry[2] == 0:
+            del self.shared[int(self.vstart[row])]
+            del self.interned[entry[0]]
+            self.vgarbage += count
+
+    def geometry_key(self, row):
+        """Chave da geometria compartilhada da linha (None se os vértices são só dela)"""
+        if self.vcount[row] == 0:
+            return None
+        entry = self.shared.get(int(self.vstart[row]))
+        return None if entry is None else entry[0]
+
+    def set_vertices(self, row, vertices):
+        v = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        old = int(self.vcount[row])
+        if old == len(v) and old > 0 and int(self.vstart[row]) not in self.shared:
+            start = int(self.vstart[row])
+        else:
+            # Trecho compartilhado nunca é escrito: a linha ganha uma cópia própria
+            self._drop_vertices(row)
+            start = self._reserve_verts(len(v))
+        self.verts[start:start + len(v)] = v
+        self.vstart[row] = start
+        self.vcount[row] = len(v)
+
+    def base_view(self, row):
+        """Vértices base da linha (view somente leitura do array compartilhado)"""
+        start = self.vstart[row]
+        view = self.verts[start:start + self.vcount[row]]
+        view.flags.writeable = False
+        return view
+
+    def release_row(self, row):
+        if not self.alive[row]:
+            return
+        self.alive[row] = False
+        self._drop_vertices(row)
+        self.vcount[row] = 0
+        if self.keep_handles:
+            self.handles[row] = None
+        self.free_rows.append(row)
+        if self.vgarbage > 4096 and self.vgarbage > self.vused // 2:
+            self.compact_vertices()
+
+    def compact_vertices(self):
+        """Remove os buracos deixados por linhas liberadas no array de vértices"""
+        rows = np.flatnonzero(self.alive[:self.rows_used] & (self.vcount[:self.rows_used] > 0))
+        # Cada trecho é copiado uma vez, mesmo se compartilhado por várias linhas
+        starts, first, inverse = np.unique(self.vstart[rows], return_index=True, return_inverse=True)
+        live, counts = self.gather_vertices(rows[first])
+        total = len(live)
+        new_starts = np.cumsum(counts) - counts
+        verts = np.zeros((max(total * 2, 16), 2))
+        verts[:total] = live
+        self.verts = verts
+        self.vstart[rows] = new_starts[inverse]
+        moved = dict(zip(starts.tolist(), new_starts.tolist()))
+        self.shared = {moved[old]: entry for old, entry in self.shared.items()}
+        self.interned = {entry[0]: start for start, entry in self.shared.items()}
+        self.vused = total
+        self.vgarbage = 0
+
+    def handle(self, row):
+        """Handle (Shape) da linha, criado sob demanda"""
+        s = self.handles[row]
+        if s is None:
+            cls = KINDS[self.kind[row]]
+            s = cls.__new__(cls)
+            s._attach(self, row)
+            self.handles[row] = s
+        return s
+
+    def adopt(self, s):
+        """Move a linha do handle s (de qualquer store) para este store"""
+        src, old = s._store, s._row
+        row = self._new_row()
+        for name in self.COLUMNS:
+            getattr(self, name)[row] = getattr(src, name)[old]
+        self.color[row] = src.color[old]
+        self.kind[row] = src.kind[old]
+        self.alive[row] = True
+        self.vcount[row] = 0
+        key = src.geometry_key(old)
+        if key is None:
+            self.set_vertices(row, src.base_view(old))
+        else:
+            self.share_vertices(row, key, src.base_view(old))
+        src.release_row(old)
+        s._store, s._row = self, row
+        if self.keep_handles:
+            self.handles[row] = s
+        return row
+
+    def gather_vertices(self, rows):
+        """Vértices base das linhas dadas, concatenados: (verts (V, 2), counts)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.vcount[rows]
+        total = int(counts.sum())
+        starts = np.cumsum(counts) - counts
+        src = np.repeat(self.vstart[rows] - starts, counts) + np.arange(total)
+        return self.verts[src], counts
+
+    def bulk_insert(self, kind, verts, counts, x=0.0, y=0.0, rotation=0.0,
+                    scale_x=1.0, scale_y=1.0, color=(0.0, 0.0, 0.0), ordered=True, key=None):
+        """
+        Insere várias formas de uma vez no topo da ordem, sem criar handles
+        (ordered=False só aloca as linhas, sem colocá-las na cena).
+        verts: (V, 2) com os vértices base concatenados; counts: vértices por forma.
+        Com 'key', verts é um único contorno compartilhado por todas (flyweight).
+        'kind' e as colunas podem ser escalares ou arrays (um valor por forma).
+        Retorna as linhas criadas.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        n = len(counts)
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 2)
+        first = self.rows_used
+        rows = np.arange(first, first + n)
+        self.rows_used += n
+        self._grow_rows(self.rows_used)
+        if self.keep_handles:
+            self.handles.extend([None] * n)
+
+        if key is not None and n and len(verts):
+            vstart = self._intern(key, verts)
+            entry = self.shared[vstart]
+            entry[2] += n
+            self.vstart[rows] = vstart
+            self.vcount[rows] = entry[1]
+        else:
+            vstart = self._reserve_verts(len(verts))
+            self.verts[vstart:vstart + len(verts)] = verts
+            self.vstart[rows] = vstart + np.cumsum(counts) - counts
+            self.vcount[rows] = counts
+
+        self.x[rows] = x
+        self.y[rows] = y
+        self.rotation[rows] = rotation
+        self.scale_x[rows] = scale_x
+        self.scale_y[rows] = scale_y
+        self.color[rows] = color
+        self.kind[rows] = kind
+        self.alive[rows] = True
+        if ordered:
+            keys = self._next_z + np.arange(n)
+            self.z[rows] = keys
+            self._next_z += n
+            self.order.extend_sorted(keys.tolist(), rows.tolist())
+        return rows
+
+    @classmethod
+    def from_columns(cls, n, columns):
+        """
+        Cria um store usando diretamente os arrays dados (sem copiá-los),
+        p.ex. views de um arquivo mapeado em memória (scenefile.py).
+        As linhas já ficam na cena, na ordem em que aparecem.
+        """
+        st = cls(capacity=0, vertex_capacity=0)
+        for name in ('x', 'y', 'rotation', 'scale_x', 'scale_y', 'color',
+                     'kind', 'vstart', 'vcount'):
+            setattr(st, name, columns[name])
+        st.z = np.arange(n, dtype=np.float64)
+        st.alive = np.ones(n, dtype=bool)
+        st.capacity = n
+        st.rows_used = n
+        st.verts = columns['verts']
+        st.vused = len(st.verts)
+        st.handles = [None] * n
+        st.order = OrderList.from_sorted(range(n), range(n))
+        st._next_z = float(n)
+        return st
+
+    # ------------------------------------------------------------------
+    # Cena (sequência na ordem de desenho)
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        handle = self.handle
+        for row in self.order:
+            yield handle(row)
+
+    def __reversed__(self):
+        handle = self.handle
+        for row in reversed(self.order):
+            yield handle(row)
+
+    def __getitem__(self, i):
+        return self.handle(self.order[i])
+
+    def __contains__(self, s):
+        return getattr(s, '_store', None) is self
+
+    def __bool__(self):
+        return bool(self.order)
+
+    def append(self, s):
+        if s._store is not self:
+            self.adopt(s)
+        self.z[s._row] = self._next_z
+        self._next_z += 1
+        self.order.add(float(self.z[s._row]), s._row)
+
+    def insert_at_z(self, s, z):
+        """Coloca s na cena com a chave z dada"""
+        z = float(z)
+        if s._store is not self:
+            self.adopt(s)
+        self.z[s._row] = z
+        self._next_z = max(self._next_z, z + 1)
+        self.order.add(z, s._row)
+
+    def set_z(self, s, z):
+        """Muda a chave z de uma forma que já está na cena"""
+        self.order.remove(float(self.z[s._row]), s._row)
+        self.insert_at_z(s, z)
+
+    def raise_to_top(self, s):
+        """Leva s para o fim da ordem de desenho (frente)"""
+        self.set_z(s, self._next_z)
+
+    def lower_to_bottom(self, s):
+        """Leva s para o começo da ordem de desenho (fundo)"""
+        self.set_z(s, self.order.first_key() - 1.0)
+
+    def index(self, s):
+        """Posição de s na ordem de desenho"""
+        return self.order.index(float(self.z[s._row]), s._row)
+
+    def neighbor(self, s, step):
+        """Forma vizinha na ordem (step=+1 à frente, -1 atrás) ou None"""
+        found = self.order.neighbor(float(self.z[s._row]), s._row, step)
+        return None if found is None else self.handle(found[1])
+
+    def swap_z(self, a, b):
+        """Troca as chaves z de duas formas da cena"""
+        za, zb = float(self.z[a._row]), float(self.z[b._row])
+        self.order.remove(za, a._row)
+        self.order.remove(zb, b._row)
+        self.z[a._row], self.z[b._row] = zb, za
+        self.order.add(zb, a._row)
+        self.order.add(za, b._row)
+
+    def remove(self, s):
+        """Tira s da cena; o handle continua válido (volta para o store solto)"""
+        if s._store is not self:
+            raise ValueError('forma não está neste store')
+        self.order.remove(float(self.z[s._row]), s._row)
+        loose.adopt(s)
+
+    def clear(self):
+        # Handles já criados continuam válidos fora da cena: suas linhas
+        # são copiadas em lote para o store das formas soltas
+        if self.keep_handles:
+            live = [s for s in self.handles if s is not None]
+            if live:
+                rows = np.array([s._row for s in live], dtype=np.int64)
+                verts, counts = self.gather_vertices(rows)
+                new_rows = loose.bulk_insert(
+                    self.kind[rows], verts, counts, self.x[rows], self.y[rows],
+                    self.rotation[rows], self.scale_x[rows], self.scale_y[rows],
+                    self.color[rows], ordered=False)
+                for s, row in zip(live, new_rows.tolist()):
+                    s._store, s._row = loose, row
+        self.__init__(keep_handles=self.keep_handles)
+
+    def rows(self):
+        """Linhas da cena na ordem de desenho (array somente leitura)"""
+        return self.order.rows()
+
+    # ------------------------------------------------------------------
+    # Operações em lote (vetorizadas)
+    # ------------------------------------------------------------------
+    def matrices(self, rows):
+        """Matrizes afins 2x3 das linhas dadas: array (k, 2, 3)"""
+        a = np.radians(self.rotation[rows])
+        ca = np.cos(a)
+        sa = np.sin(a)
+        sx = self.scale_x[rows]
+        sy = self.scale_y[rows]
+        m = np.empty((len(a), 2, 3))
+        m[:, 0, 0] = ca * sx
+        m[:, 0, 1] = -sa * sy
+        m[:, 0, 2] = self.x[rows]
+        m[:, 1, 0] = sa * sx
+        m[:, 1, 1] = ca * sy
+        m[:, 1, 2] = self.y[rows]
+        return m
+
+    def world_vertices(self, rows):
+        """
+        Vértices de mundo das linhas dadas, concatenados.
+        Retorna (verts (V, 2), starts, counts) com os trechos de cada linha.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        base, counts = self.gather_vertices(rows)
+        starts = np.cumsum(counts) - counts
+        m = self.matrices(rows).reshape(-1, 6)
+        if len(counts) and (counts == counts[0]).all():
+            # Caso comum (todas com o mesmo nº de vértices): broadcasting sem repetir a matriz
+            m = m[:, None, :]
+            b = base.reshape(len(counts), -1, 2)
+        else:
+            m = np.repeat(m, counts, axis=0)
+            b = base
+        bx = b[..., 0]
+        by = b[..., 1]
+        out = np.empty(b.shape)
+        out[..., 0] = m[..., 0] * bx + m[..., 1] * by + m[..., 2]
+        out[..., 1] = m[..., 3] * bx + m[..., 4] * by + m[..., 5]
+        return out.reshape(-1, 2), starts, counts
+
+    def world_bounds(self, rows):
+        """AABBs de mundo (k, 4) = (minx, maxx, miny, maxy) das linhas dadas"""
+        verts, starts, counts = self.world_vertices(rows)
+        out = np.zeros((len(starts), 4))
+        ok = counts > 0
+        if ok.any():
+            s = starts[ok]
+            out[ok, 0] = np.minimum.reduceat(verts[:, 0], s)
+            out[ok, 1] = np.maximum.reduceat(verts[:, 0], s)
+            out[ok, 2] = np.minimum.reduceat(verts[:, 1], s)
+            out[ok, 3] = np.maximum.reduceat(verts[:, 1], s)
+        # Tipos analíticos (ex.: Circle) têm AABB exato próprio
+        rows = np.asarray(rows, dtype=np.int64)
+        for cls in KINDS:
+            exact = getattr(cls, 'world_bounds_many', None)
+            if exact is None:
+                continue
+            mask = self.kind[rows] == cls.kind
+            if mask.any():
+                out[mask] = exact(self, rows[mask])
+        return out
+
+    def translate(self, rows, dx, dy):
+        """Translada várias linhas de uma vez"""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.x[rows] += dx
+        self.y[rows] += dy
+        self._touched(rows)
+
+    def rows_of(self, shapes):
+        """Linhas (array) das formas dadas, que precisam estar neste store"""
+        return np.fromiter((s._row for s in shapes), dtype=np.int64, count=len(shapes))
+
+    def transforms(self, rows):
+        """Colunas (k, 5) = (x, y, rotation, scale_x, scale_y) das linhas dadas"""
+        return np.column_stack((self.x[rows], self.y[rows], self.rotation[rows],
+                                self.scale_x[rows], self.scale_y[rows]))
+
+    def set_transforms(self, rows, values):
+        """Inverso de transforms(): grava (k, 5) colunas de uma vez"""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.x[rows], self.y[rows], self.rotation[rows], self.scale_x[rows], \
+            self.scale_y[rows] = np.asarray(values, dtype=np.float64).T
+        self._touched(rows)
+
+    def apply_affine(self, rows, m, base=None):
+        """
+        Aplica a transformação de mundo m (2x3) às linhas dadas, partindo das
+        colunas 'base' (k, 5) (as atuais se None): a posição é transformada e os
+        eixos locais de cada forma dão a nova rotação e escala. Cisalhamento não
+        é representável; a direção do eixo x local é preservada.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if base is None:
+            base = self.transforms(rows)
+        x, y, rot, sx, sy = base.T
+        a = np.radians(rot)
+        ca, sa = np.cos(a), np.sin(a)
+        (m00, m01, tx), (m10, m11, ty) = m
+        ux, uy = m00 * ca + m01 * sa, m10 * ca + m11 * sa    # eixo x local levado por m
+        vx, vy = -m00 * sa + m01 * ca, -m10 * sa + m11 * ca  # eixo y local levado por m
+        self.x[rows] = m00 * x + m01 * y + tx
+        self.y[rows] = m10 * x + m11 * y + ty
+        self.rotation[rows] = np.degrees(np.arctan2(uy, ux)) % 360
+        self.scale_x[rows] = sx * np.hypot(ux, uy)
+        self.scale_y[rows] = sy * np.hypot(vx, vy)
+        self._touched(rows)
+
+    def _touched(self, rows):
+        # Invalida os caches dos handles já criados e avisa os listeners, uma
+        # vez para o lote todo (arrastar um grupo grande não chama N listeners)
+        if not self.keep_handles:
+            return
+        handles = self.handles
+        group = [s for s in map(handles.__getitem__, rows.tolist()) if s is not None]
+        if not group:
+            return
+        for s in group:
+            s._drop_caches()
+        for fn in touched_listeners:
+            fn(self, group)
+
+    def nbytes(self):
+        """Memória ocupada pelas colunas e pelo array de vértices"""
+        cols = [getattr(self, n) for n in self.COLUMNS]
+        cols += [self.color, self.kind, self.vstart, self.vcount, self.alive, self.verts]
+        return sum(c.nbytes for c in cols)
+
+
+# Formas que ainda não entraram (ou já saíram) da cena
+loose = ShapeStore(capacity=64, vertex_capacity=256, keep_handles=False)
+
+
+def benchmark(n=1_000_000):
+    """Mede memória e operações em lote com n retângulos (python store.py [n])"""
+    import time
+    import tracemalloc
+
+    rect = np.array([(-0.15, -0.1), (0.15, -0.1), (0.15, 0.1), (-0.15, 0.1)])
+    rng = np.random.default_rng(0)
+    cols = dict(x=rng.uniform(-10, 10, n), y=rng.uniform(-10, 10, n),
+                rotation=rng.uniform(0, 360, n))
+    verts = np.tile(rect, (n, 1))
+    counts = np.full(n, 4)
+
+    # Memória: tudo o que o store aloca (colunas, vértices e a lista de ordem)
+    tracemalloc.start()
+    st = ShapeStore(keep_handles=False)
+    st.bulk_insert(0, verts, counts, **cols)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    st = ShapeStore(keep_handles=False)
+    t0 = time.perf_counter()
+    rows = st.bulk_insert(0, verts, counts, **cols)
+    t_insert = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    st.translate(rows, 0.5, -0.25)
+    t_translate = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    verts, _, _ = st.world_vertices(rows)
+    t_world = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    st.world_bounds(rows)
+    t_bounds = time.perf_counter() - t0
+
+    print(f'{n} formas, {len(verts)} vértices')
+    print(f'  inserção em lote:     {t_insert * 1000:8.1f} ms')
+    print(f'  memória (store):      {current / n:8.1f} bytes/forma (pico {peak / 2**20:.0f} MiB)')
+    print(f'  translação em lote:   {t_translate * 1000:8.1f} ms')
+    print(f'  vértices de mundo:    {t_world * 1000:8.1f} ms')
+    print(f'  AABBs de mundo:       {t_bounds * 1000:8.1f} ms')
+
+    # Primitivas das teclas 1/2/3 (um terço de cada): vértices próprios x
+    # geometria compartilhada por chave (flyweight)
+    h = 0.2 * np.sqrt(3) / 2
+    a = 2 * np.pi * np.arange(48) / 48
+    bases = {'tri': np.array([(-0.1, -h / 3), (0.1, -h / 3), (0.0, 2 * h / 3)]), 'rect': rect,
+             'circle': np.column_stack((np.cos(a), np.sin(a))) * 0.15}
+    sizes = {name: n // 3 + (i < n % 3) for i, name in enumerate(bases)}
+    used = {}
+    for shared in (False, True):
+        tracemalloc.start()
+        st = ShapeStore(keep_handles=False)
+        for name, base in bases.items():
+            k = sizes[name]
+            verts = base if shared else np.tile(base, (k, 1))
+            st.bulk_insert(0, verts, np.full(k, len(base)), key=name if shared else None,
+                           x=rng.uniform(-10, 10, k), y=rng.uniform(-10, 10, k))
+            del verts
+        used[shared] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del st
+    print(f'{n} primitivas (triângulos, retângulos e círculos de 48 segmentos)')
+    print(f'  vértices próprios:    {used[False] / n:8.1f} bytes/forma ({used[False] / 2**20:.0f} MiB)')
+    print(f'  geometria compart.:   {used[True] / n:8.1f} bytes/forma ({used[True] / 2**20:.0f} MiB)')
+    print(f'  economia:             {(1 - used[True] / used[False]) * 100:8.1f} %')
+
+
+if __name__ == '__main__':
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
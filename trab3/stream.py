@@ -0,0 +1,208 @@
+# stream.py
+# Carga progressiva da cena: uma thread lê as formas em partes (de um
+# gerador) e o laço principal as acrescenta a state.shapes entre quadros,
+# gastando no máximo state.stream_budget segundos por quadro. A janela
+# responde desde o primeiro quadro (pan/zoom já funcionam) e a cena vai
+# aparecendo enquanto carrega.
+
+import queue
+import threading
+import time
+import numpy as np
+import state
+import scene
+from store import ShapeStore
+
+COLUMNS = ('x', 'y', 'rotation', 'scale_x', 'scale_y', 'color')
+_DONE = object()
+
+
+def columns_from_shapes(shapes):
+    """Converte uma sequência de formas (fora da cena) para o dict de colunas"""
+    counts = np.array([len(s.base_vertices) for s in shapes], dtype=np.int64)
+    chunk = {
+        'kind': np.array([s.kind for s in shapes], dtype=np.int8),
+        'verts': np.concatenate([s.base_vertices for s in shapes]) if shapes else np.zeros((0, 2)),
+        'counts': counts,
+        'color': np.array([s.color for s in shapes], dtype=np.float64).reshape(-1, 3),
+    }
+    for name in ('x', 'y', 'rotation', 'scale_x', 'scale_y'):
+        chunk[name] = np.array([getattr(s, name) for s in shapes], dtype=np.float64)
+    return chunk
+
+
+def _piece(chunk, a, b):
+    """Formas [a, b) de uma parte"""
+    counts = chunk['counts']
+    starts = np.cumsum(counts) - counts
+    v0 = int(starts[a]) if a < len(counts) else 0
+    v1 = int(starts[b - 1] + counts[b - 1]) if b > a else v0
+    out = {'kind': chunk['kind'][a:b], 'verts': chunk['verts'][v0:v1], 'counts': counts[a:b]}
+    for name in COLUMNS:
+        out[name] = chunk[name][a:b]
+    return out
+
+
+def _ms(t):
+    return None if t is None else t * 1000
+
+
+class StreamLoader:
+    def __init__(self):
+        self._stop = None
+        self._reset()
+
+    def _reset(self):
+        self.active = False
+        self.target = None      # ShapeStore sendo preenchido
+        self.total = None       # nº de formas esperado (se conhecido)
+        self.loaded = 0
+        self.error = None
+        self._queue = None
+        self._pending = None    # parte atual e quantas formas dela já entraram
+        self._offset = 0
+        # Formas/s que cabem num quadro (média móvel), medido do acréscimo até o
+        # fim do quadro: inclui o trabalho dos caches da ordem (batch, índice)
+        self.rate = None
+        self._frame_start = None
+        self._frame_added = 0
+        self.started = 0.0
+        self.first_frame = None    # s até o primeiro quadro depois do início
+        self.first_content = None  # s até o primeiro quadro com formas
+        self.finished = None       # s até a última forma entrar
+        self._last_report = 0.0
+
+    def start(self, source, total=None, maxsize=8):
+        """
+        Troca a cena por uma vazia (desfazível) e começa a ler 'source', um
+        iterável de partes: dicts de colunas (scenefile.iter_chunks) ou
+        sequências de formas
+        """
+        self.cancel()
+        self._reset()
+        scene.replace_shapes(ShapeStore())
+        self.target = state.shapes
+        self.total = total
+        self.active = True
+        self.started = time.perf_counter()
+        self._queue = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        threading.Thread(target=self._read, args=(source, self._queue, self._stop),
+                         daemon=True).start()
+
+    @staticmethod
+    def _read(source, q, stop):
+        # Thread de leitura: só monta as partes (nada de state/scene aqui)
+        try:
+            for chunk in source:
+                if stop.is_set():
+                    return
+                if not isinstance(chunk, dict):
+                    chunk = columns_from_shapes(list(chunk))
+                q.put(chunk)
+        except Exception as e:  # erro de leitura: vira a mensagem da carga
+            q.put(e)
+        q.put(_DONE)
+
+    def cancel(self):
+        if self._stop is not None:
+            self._stop.set()
+            # Libera a thread se ela estiver bloqueada na fila cheia
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+        self.active = False
+
+    def step(self, budget=None):
+        """Acrescenta formas até esgotar o orçamento do quadro; retorna quantas entraram"""
+        if not self.active:
+            return 0
+        if state.shapes is not self.target:
+            # A cena foi trocada (desfazer, nova carga, limpar): abandona esta carga
+            self.cancel()
+            return 0
+        budget = state.stream_budget if budget is None else budget
+        t0 = time.perf_counter()
+        # Cota do quadro pelo ritmo medido (acréscimo + quadro), ao menos 64 formas
+        quota = max(64, int(self.rate * budget)) if self.rate is not None else 256
+        added = 0
+        while added < quota:
+            if self._pending is None:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE or isinstance(item, Exception):
+                    self.error = None if item is _DONE else str(item)
+                    self._finish()
+                    break
+                self._pending, self._offset = item, 0
+            n = min(len(self._pending['counts']) - self._offset, quota - added)
+            a = self._offset
+            scene.append_columns(**_piece(self._pending, a, a + n))
+            self._offset += n
+            self.loaded += n
+            added += n
+            if self._offset >= len(self._pending['counts']):
+                self._pending = None
+            if time.perf_counter() - t0 >= budget:
+                break
+        if added:
+            self._frame_start, self._frame_added = t0, added
+        now = time.perf_counter()
+        if self.active and now - self._last_report >= 0.5:
+            self._last_report = now
+            print(self.progress_text())
+        return added
+
+    def _finish(self):
+        self.active = False
+        self.finished = time.perf_counter() - self.started
+        if self.error:
+            print('Erro na carga:', self.error)
+        print('Carga:', self.summary())
+        state.needs_redraw = True
+
+    def frame_rendered(self):
+        """Chamado pelo laço depois de cada quadro (marca o tempo até o primeiro quadro)"""
+        if self.target is None:
+            return
+        now = time.perf_counter()
+        if self._frame_added:
+            r = self._frame_added / max(now - self._frame_start, 1e-6)
+            self.rate = r if self.rate is None else 0.7 * self.rate + 0.3 * r
+            self._frame_added = 0
+        t = now - self.started
+        if self.first_frame is None:
+            self.first_frame = t
+        if self.first_content is None and self.loaded:
+            self.first_content = t
+
+    def progress(self):
+        """Fração carregada (None se o total não é conhecido)"""
+        if not self.total:
+            return None if self.active else 1.0
+        return min(self.loaded / self.total, 1.0)
+
+    def progress_text(self):
+        elapsed = time.perf_counter() - self.started
+        if self.total:
+            return f'Carregando: {self.loaded}/{self.total} formas ({100 * self.progress():.0f}%, {elapsed:.1f} s)'
+        return f'Carregando: {self.loaded} formas ({elapsed:.1f} s)'
+
+    def summary(self):
+        return {
+            'shapes': self.loaded,
+            'total': self.total,
+            'active': self.active,
+            'error': self.error,
+            'first_frame_ms': _ms(self.first_frame),
+            'first_content_ms': _ms(self.first_content),
+            'load_s': self.finished,
+            'shapes_per_s': self.loaded / self.finished if self.finished else None,
+        }
+
+
+loader = StreamLoader()
@@ -0,0 +1,121 @@
+# test_batch.py
+# Mudanças pontuais da ordem de desenho (levar para frente/fundo, trocar com a
+# vizinha, mudar z, criar e apagar formas, desfazer) são aplicadas nos arrays
+# do ShapeBatch sem reconstruí-lo; o resultado tem de ser o mesmo da
+# reconstrução completa. Partes da carga em partes crescem os arrays da
+# ordem no lugar (capacidade dobrada).
+# Uso (a partir de trab3/):  python -m pytest -q test_batch.py
+
+import random
+
+import numpy as np
+import pytest
+
+import state
+import scene
+import shapes
+import batch
+import history
+import rendering
+from conftest import random_shape
+
+
+@pytest.fixture(autouse=True)
+def vbo_scene(fresh_scene, monkeypatch):
+    monkeypatch.setattr(state, 'use_vbo', True)
+
+
+def check_order():
+    b = batch.batch
+    b.sync()
+    b._upload()
+    st = list(state.shapes)
+    assert b.order_shapes == st
+    assert b.order_pos == {s: i for i, s in enumerate(st)}
+    assert b.firsts.tolist() == [b.slots[s][0] for s in st]
+    assert b.counts.tolist() == [b.slots[s][1] for s in st]
+    assert np.allclose(b.bounds, state.shapes.world_bounds(state.shapes.rows()))
+    assert set(b.slots) == set(st)
+    assert set(b.adaptive) == {s for s in st if s.adaptive}
+    assert b.filled == [s for s in st if hasattr(s, 'mesh')]
+    for s in st:
+        first, count = b.slots[s]
+        assert np.allclose(b.data[first:first + count, 0:2], s.outline_vertices(b.lod_ppu))
+
+
+def z_op(rng):
+    live = list(state.shapes)
+    s = rng.choice(live)
+    op = rng.random()
+    if op < 0.2:
+        scene.bring_to_front(s)
+    elif op < 0.35:
+        scene.send_to_back(s)
+    elif op < 0.5:
+        scene.step_z(s, rng.choice((-1, 1)))
+    elif op < 0.6:
+        a, b = rng.sample(live, 2)
+        scene.swap_z(a, b)
+    elif op < 0.7:
+        scene.set_z(s, rng.uniform(-50, 50))
+    elif op < 0.8:
+        scene.add_shape(random_shape(rng, polygon_vertices=(6, 40)))
+    elif op < 0.9:
+        scene.remove_shape(s)
+    else:
+        history.undo()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_z_changes_do_not_rebuild(seed):
+    rng = random.Random(seed)
+    for _ in range(80):
+        scene.add_shape(random_shape(rng, polygon_vertices=(6, 40)))
+    rendering.render(None)
+    rebuilds = batch.batch.rebuilds
+    for step in range(150):
+        z_op(rng)
+        if step % 3 == 0:  # às vezes várias mudanças entre dois quadros
+            rendering.render(None)
+            check_order()
+    rendering.render(None)
+    check_order()
+    assert batch.batch.rebuilds == rebuilds
+
+
+def test_replace_rebuilds():
+    rng = random.Random(1)
+    for _ in range(10):
+        scene.add_shape(random_shape(rng))
+    rendering.render(None)
+    rebuilds = batch.batch.rebuilds
+    scene.clear()
+    scene.add_shape(random_shape(rng))
+    rendering.render(None)
+    check_order()
+    assert batch.batch.rebuilds == rebuilds + 1
+
+
+def test_streamed_chunks_grow_in_place():
+    # Partes da carga em partes entre mudanças de z: os arrays da ordem
+    # crescem dobrando a capacidade, sem realocar a cada parte
+    rng = random.Random(3)
+    for _ in range(5):
+        scene.add_shape(random_shape(rng))
+    rendering.render(None)
+    b = batch.batch
+    rebuilds = b.rebuilds
+    capacities = set()
+    square = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float64) * 0.05
+    for _ in range(40):
+        n = rng.randrange(1, 200)
+        scene.append_columns(shapes.Rectangle.kind, np.tile(square, (n, 1)), np.full(n, 4),
+                             x=np.array([rng.uniform(-2, 2) for _ in range(n)]),
+                             y=np.array([rng.uniform(-2, 2) for _ in range(n)]))
+        z_op(rng)
+        rendering.render(None)
+        capacities.add(len(b._firsts))
+        assert len(b._firsts) >= b.order_len == len(state.shapes)
+    check_order()
+    assert b.rebuilds == rebuilds
+    assert len(capacities) <= 4  # 1024 -> 2048 -> 4096 -> 8192
@@ -0,0 +1,154 @@
+# test_history.py
+# Desfazer/refazer contra o checksum do estado (recording.state_checksum):
+# operações aleatórias (criar, apagar, mover/girar/escalar, ordem z, ações em
+# grupo, limpar a cena); desfazer tudo volta ao estado inicial e refazer tudo
+# volta ao final, passando por cada estado intermediário. Com o limite de
+# memória do histórico baixo, desfazer para no estado mais antigo guardado.
+# Uso (a partir de trab3/):  python -m pytest -q test_history.py
+
+import random
+
+import pytest
+
+import state
+import scene
+import history
+import recording
+from conftest import random_shape
+
+pytestmark = pytest.mark.usefixtures('fresh_scene')
+
+
+def transform(rng, s):
+    history.begin_transform(s)
+    s.x += rng.uniform(-0.2, 0.2)
+    s.y += rng.uniform(-0.2, 0.2)
+    s.rotation += rng.uniform(-90, 90)
+    s.scale_x *= rng.uniform(0.5, 2)
+    s.scale_y *= rng.uniform(0.5, 2)
+    history.end_transform()
+
+
+def group_transform(rng, group):
+    st = state.shapes
+    history.begin_transform(group)
+    st.translate(st.rows_of(group), rng.uniform(-0.2, 0.2), rng.uniform(-0.2, 0.2))
+    history.end_transform()
+
+
+def random_op(rng):
+    """Uma ação do usuário (vira uma entrada do histórico, ou nenhuma)"""
+    live = list(state.shapes)
+    op = rng.random()
+    if op < 0.25 or len(live) < 3:
+        scene.add_shape(random_shape(rng))
+    elif op < 0.35:
+        scene.remove_shape(rng.choice(live))
+    elif op < 0.5:
+        transform(rng, rng.choice(live))
+    elif op < 0.55:
+        group_transform(rng, rng.sample(live, min(len(live), rng.randrange(2, 6))))
+    elif op < 0.62:
+        scene.bring_to_front(rng.choice(live))
+    elif op < 0.68:
+        scene.send_to_back(rng.choice(live))
+    elif op < 0.75:
+        scene.step_z(rng.choice(live), rng.choice((-1, 1)))
+    elif op < 0.8:
+        scene.set_z(rng.choice(live), rng.uniform(-50, 50))
+    elif op < 0.95:
+        # Várias operações numa única entrada (como clique + arrasto)
+        history.begin_group()
+        for _ in range(rng.randrange(1, 4)):
+            kind = rng.random()
+            live = list(state.shapes)
+            if kind < 0.3 or not live:
+                scene.add_shape(random_shape(rng))
+            elif kind < 0.5:
+                scene.remove_shape(rng.choice(live))
+            elif kind < 0.8:
+                s = rng.choice(live)
+                scene.bring_to_front(s)
+                transform(rng, s)
+            else:
+                scene.step_z(rng.choice(live), 1)
+        history.end_group()
+    else:
+        scene.clear()
+
+
+def run(rng, steps):
+    """Aplica 'steps' ações; retorna os checksums depois de cada entrada do histórico"""
+    checksums = [recording.state_checksum()]
+    for _ in range(steps):
+        before = len(history._history.undo_stack) + history._history.dropped
+        random_op(rng)
+        if len(history._history.undo_stack) + history._history.dropped != before:
+            checksums.append(recording.state_checksum())
+        else:
+            assert recording.state_checksum() == checksums[-1]  # nada mudou
+    return checksums
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_undo_redo_everything(seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        scene.add_shape(random_shape(rng))
+    history._history.clear()
+    checksums = run(rng, 120)
+    assert history._history.dropped == 0
+
+    # Cada desfazer passa pelo estado anterior, até o inicial
+    for expected in reversed(checksums[:-1]):
+        assert history.undo()
+        assert recording.state_checksum() == expected
+    assert not history.undo()
+    # Cada refazer passa pelo estado seguinte, até o final
+    for expected in checksums[1:]:
+        assert history.redo()
+        assert recording.state_checksum() == expected
+    assert not history.redo()
+
+    # Desfazer no meio e fazer outra coisa descarta o que havia para refazer
+    for _ in range(5):
+        history.undo()
+    scene.add_shape(random_shape(rng))
+    assert not history.redo()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_undo_after_trim(monkeypatch, seed):
+    rng = random.Random(100 + seed)
+    # Cabe só uma parte das entradas: as mais antigas são descartadas
+    monkeypatch.setattr(state, 'history_budget', 20_000)
+    checksums = run(rng, 150)
+    h = history._history
+    assert h.dropped > 0
+    assert h.total <= state.history_budget or len(h.undo_stack) == 1
+    assert len(checksums) == h.dropped + len(h.undo_stack) + 1
+
+    # Desfazer tudo para no estado depois da última entrada descartada
+    kept = checksums[h.dropped:]
+    for expected in reversed(kept[:-1]):
+        assert history.undo()
+        assert recording.state_checksum() == expected
+    assert not history.undo()
+    for expected in kept[1:]:
+        assert history.redo()
+        assert recording.state_checksum() == expected
+    assert not history.redo()
+
+
+def test_undo_clears_selection_caches():
+    import selection
+    rng = random.Random(7)
+    for _ in range(4):
+        scene.add_shape(random_shape(rng))
+    group = list(state.shapes)[:3]
+    selection.set_group(group)
+    selection.bounds()  # AABB do grupo em cache
+    transform(rng, group[0])
+    assert history.undo()
+    assert state.selected is None and state.group == []
+    assert selection._bounds is None and not selection._members
@@ -0,0 +1,159 @@
+# test_mesh.py
+# Teste de ponto pela malha (triangulate + TriangleBVH) contra o ray casting
+# de utils.point_in_polygon, em polígonos aleatórios simples, com vértices
+# colineares e com auto-interseção. Pontos exatamente na borda ficam de fora:
+# lá a malha inclui a borda e o ray casting não tem regra fixa.
+# Uso (a partir de trab3/):  python -m pytest -q test_mesh.py
+
+import numpy as np
+import pytest
+
+import mesh
+from mesh import PolygonMesh, TriangleBVH, triangulate
+from utils import point_in_polygon
+
+
+def star_polygon(rng, n):
+    """Polígono simples: um ângulo por setor em volta da origem (nenhum vão
+    passa de meia volta), raios aleatórios"""
+    angles = (np.arange(n) + rng.uniform(0.05, 0.95, n)) * (2 * np.pi / n)
+    radii = rng.uniform(0.2, 1.0, n)
+    return np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+
+
+def comb_polygon(rng, teeth):
+    """Polígono simples não convexo em forma de pente (muitas orelhas ruins)"""
+    pts = [(0.0, 0.0)]
+    for i in range(teeth):
+        h = rng.uniform(0.3, 1.0)
+        pts += [(i + 0.25, 0.1), (i + 0.25, h), (i + 0.75, h), (i + 0.75, 0.1)]
+    pts += [(teeth, 0.0), (teeth, -0.5), (0.0, -0.5)]
+    return np.array(pts)
+
+
+def with_collinear(rng, poly):
+    """Insere pontos no meio das arestas (vértices colineares)"""
+    out = []
+    for a, b in zip(poly, np.roll(poly, -1, axis=0)):
+        out.append(a)
+        for t in np.sort(rng.uniform(0.1, 0.9, rng.integers(0, 3))):
+            out.append(a + t * (b - a))
+    return np.array(out)
+
+
+def random_polygon(rng, n):
+    """Vértices em ordem aleatória: em geral se auto-intersecta"""
+    return rng.uniform(-1, 1, size=(n, 2))
+
+
+def segments_cross(p, q, r, s):
+    def orient(a, b, c):
+        return np.sign((b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0]))
+    return (orient(p, q, r) * orient(p, q, s) < 0) and (orient(r, s, p) * orient(r, s, q) < 0)
+
+
+def self_intersects(poly):
+    """Força bruta: algum par de arestas não vizinhas se cruza propriamente"""
+    n = len(poly)
+    edges = [(poly[i], poly[(i + 1) % n]) for i in range(n)]
+    for i in range(n):
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1:
+                continue
+            if segments_cross(*edges[i], *edges[j]):
+                return True
+    return False
+
+
+def sample_points(rng, poly, n):
+    lo, hi = poly.min(axis=0), poly.max(axis=0)
+    pad = 0.1 * (hi - lo)
+    return rng.uniform(lo - pad, hi + pad, size=(n, 2))
+
+
+def assert_same_as_ray_casting(poly, pts):
+    m = PolygonMesh(poly)
+    assert m.simple
+    verts = [tuple(p) for p in poly.tolist()]
+    for x, y in pts.tolist():
+        assert m.contains(x, y) == point_in_polygon(x, y, verts), (x, y)
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_simple_polygons(seed):
+    rng = np.random.default_rng(seed)
+    for n in (3, 5, 12, 40, 150):
+        poly = star_polygon(rng, n)
+        assert_same_as_ray_casting(poly, sample_points(rng, poly, 300))
+        # Sentido horário também
+        assert_same_as_ray_casting(poly[::-1], sample_points(rng, poly, 100))
+    poly = comb_polygon(rng, int(rng.integers(2, 12)))
+    assert_same_as_ray_casting(poly, sample_points(rng, poly, 400))
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_collinear_vertices(seed):
+    rng = np.random.default_rng(200 + seed)
+    for poly in (star_polygon(rng, int(rng.integers(3, 60))),
+                 comb_polygon(rng, int(rng.integers(2, 8))),
+                 np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float64)):
+        poly = with_collinear(rng, poly)
+        assert_same_as_ray_casting(poly, sample_points(rng, poly, 300))
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_self_intersecting_polygons(seed):
+    rng = np.random.default_rng(400 + seed)
+    for n in (4, 6, 10, 25, 60):
+        poly = random_polygon(rng, n)
+        m = PolygonMesh(poly)
+        if self_intersects(poly):
+            # A malha não serve: Polygon.contains volta para a regra par-ímpar
+            assert not m.simple
+        else:
+            assert_same_as_ray_casting(poly, sample_points(rng, poly, 200))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_edges_cross(seed):
+    rng = np.random.default_rng(600 + seed)
+    for poly in (random_polygon(rng, int(rng.integers(4, 40))),
+                 star_polygon(rng, int(rng.integers(4, 80))),
+                 comb_polygon(rng, int(rng.integers(2, 8)))):
+        expected = self_intersects(poly)
+        assert mesh.edges_cross(poly) == expected
+        assert mesh.edges_cross(poly, budget=3) == expected  # vários lotes de pares
+
+
+def test_polygon_contains_self_intersecting():
+    # Acima de MESH_MIN_VERTICES o Polygon usa a malha só se ela for simples
+    import shapes
+    rng = np.random.default_rng(5)
+    pts = random_polygon(rng, shapes.Polygon.MESH_MIN_VERTICES + 8)
+    p = shapes.Polygon([tuple(q) for q in pts.tolist()])
+    p.x, p.y, p.rotation, p.scale_x = 0.3, -0.2, 30.0, 1.5
+    world = [tuple(q) for q in p.transformed_vertices().tolist()]
+    for x, y in sample_points(rng, np.array(world), 500).tolist():
+        assert bool(p.contains(x, y)) == point_in_polygon(x, y, world)
+
+
+@pytest.mark.parametrize('flips', [False, True])
+def test_delaunay_flips_keep_coverage(monkeypatch, flips):
+    # Os flips mudam os triângulos mas não a área coberta
+    monkeypatch.setattr(mesh, 'FLIP_MIN_VERTICES', 3 if flips else 10**9)
+    rng = np.random.default_rng(7)
+    poly = with_collinear(rng, star_polygon(rng, 80))
+    assert_same_as_ray_casting(poly, sample_points(rng, poly, 500))
+
+
+def test_bvh_all_triangles():
+    # Cada triângulo é achado pelo seu centro, e nada fora do conjunto
+    rng = np.random.default_rng(1)
+    poly = star_polygon(rng, 200)
+    tris, simple = triangulate(poly)
+    assert simple and len(tris) == len(poly) - 2
+    bvh = TriangleBVH(poly, tris)
+    for cx, cy in poly[tris].mean(axis=1).tolist():
+        assert bvh.contains(cx, cy)
+    assert not bvh.contains(5.0, 5.0)
+    assert not TriangleBVH(poly, np.zeros((0, 3), dtype=np.uint32)).contains(0.0, 0.0)
@@ -0,0 +1,136 @@
+# test_raster.py
+# Rasterizador em software: a imagem de uma cena conhecida tem o contorno, o
+# preenchimento translúcido e o fundo nas cores certas; o PNG gravado tem
+# assinatura, IHDR e CRCs válidos e os pixels de volta; export_many registra
+# o erro de cada arquivo sem perder as outras miniaturas.
+# Uso (a partir de trab3/):  python -m pytest -q test_raster.py
+
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+import shapes
+import raster
+import scenefile
+from store import ShapeStore
+
+W = H = 100
+
+
+def square_scene(color=(1.0, 0.0, 0.0)):
+    # Lados sobre centros de pixels (colunas/linhas 30 e 70 na câmera padrão):
+    # o contorno cobre esses pixels por inteiro
+    st = ShapeStore()
+    p = shapes.Polygon([(-0.39, -0.41), (0.41, -0.41), (0.41, 0.39), (-0.39, 0.39)])
+    p.color = color
+    st.append(p)
+    return st
+
+
+def test_render_to_array():
+    st = square_scene()
+    img = raster.render(st, W, H, (1.0, (0.0, 0.0)), grid=False, fill=False, show_selection=False)
+    assert img.shape == (H, W, 3) and img.dtype == np.uint8
+    assert (img[5, 5] == 255).all()            # fundo
+    assert (img[50, 50] == 255).all()          # dentro, sem preenchimento
+    for r, c in ((50, 30), (50, 70), (30, 50), (70, 50)):
+        assert img[r, c].tolist() == [255, 0, 0]   # os quatro lados
+    # Só o contorno foi pintado: nada fora da faixa dos lados
+    touched = (img != 255).any(axis=2)
+    rows, cols = np.nonzero(touched)
+    assert rows.min() >= 29 and rows.max() <= 71 and cols.min() >= 29 and cols.max() <= 71
+    assert not touched[35:66, 35:66].any()
+
+    filled = raster.render(st, W, H, (1.0, (0.0, 0.0)), grid=False, fill=True, show_selection=False)
+    a = raster.FILL_ALPHA
+    expected = np.round(255 * np.array([1.0, 1 - a, 1 - a]))
+    assert np.abs(filled[50, 50].astype(int) - expected).max() <= 1
+    assert filled[50, 30].tolist() == [255, 0, 0]
+    assert (filled[5, 5] == 255).all()
+
+    # Câmera: com zoom 2 os lados caem na divisa entre dois pixels (colunas
+    # 10|11 e 90|91), que ficam com metade da cobertura cada (anti-aliasing)
+    zoomed = raster.render(st, W, H, (2.0, (0.0, 0.0)), grid=False, fill=False, show_selection=False)
+    for c in (10, 11, 90, 91):
+        assert np.abs(zoomed[50, c].astype(int) - (255, 128, 128)).max() <= 1
+    assert (zoomed[50, 12:90] == 255).all()
+    # Fora da vista: imagem em branco
+    away = raster.render(st, W, H, (1.0, (5.0, 5.0)), grid=False, fill=True, show_selection=False)
+    assert (away == 255).all()
+
+
+def read_png(path):
+    data = path.read_bytes()
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, at = [], 8
+    while at < len(data):
+        length, = struct.unpack('>I', data[at:at + 4])
+        tag, body = data[at + 4:at + 8], data[at + 8:at + 8 + length]
+        crc, = struct.unpack('>I', data[at + 8 + length:at + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xffffffff, tag
+        chunks.append((tag, body))
+        at += 12 + length
+    return chunks
+
+
+@pytest.mark.parametrize('size', [(1, 1), (37, 13), (W, H)])
+def test_png_signature_and_ihdr(tmp_path, size):
+    w, h = size
+    img = np.random.default_rng(w).integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+    path = tmp_path / 'x.png'
+    raster.write_png(path, img)
+    chunks = read_png(path)
+    assert [tag for tag, _ in chunks] == [b'IHDR', b'IDAT', b'IEND']
+    ihdr = chunks[0][1]
+    assert len(ihdr) == 13
+    # largura, altura, 8 bits, RGB (2), compressão, filtro e entrelaçamento 0
+    assert struct.unpack('>IIBBBBB', ihdr) == (w, h, 8, 2, 0, 0, 0)
+    raw = np.frombuffer(zlib.decompress(chunks[1][1]), dtype=np.uint8).reshape(h, 1 + 3 * w)
+    assert (raw[:, 0] == 0).all()
+    assert (raw[:, 1:].reshape(h, w, 3) == img).all()
+    assert chunks[2][1] == b''
+
+
+def test_export_many_records_errors(tmp_path):
+    good = tmp_path / 'boa.trb3'
+    scenefile.save(good, square_scene())
+    bad = tmp_path / 'ruim.trb3'
+    bad.write_bytes(b'isto nao e uma cena')
+    missing = tmp_path / 'nao_existe.trb3'
+    out = tmp_path / 'png'
+
+    paths = [str(good), str(bad), str(missing)]
+    for processes in (1, 2):
+        results = raster.export_many(paths, str(out), W, H, processes=processes, grid=False)
+        assert [r[0] for r in results] == paths
+        assert results[0] == (str(good), 1, None)
+        assert results[1][1] == 0 and 'cena' in results[1][2]
+        assert results[2][1] == 0 and results[2][2]
+        assert (out / 'boa.png').exists()
+        assert not (out / 'ruim.png').exists() and not (out / 'nao_existe.png').exists()
+        tags = [tag for tag, _ in read_png(out / 'boa.png')]
+        assert tags == [b'IHDR', b'IDAT', b'IEND']
+
+
+def test_export_many_unexpected_error(tmp_path, monkeypatch):
+    # Falha fora de OSError/SceneFileError: fica só no registro daquele arquivo
+    paths = []
+    for name in ('a', 'b'):
+        path = tmp_path / f'{name}.trb3'
+        scenefile.save(path, square_scene())
+        paths.append(str(path))
+    real = raster.render
+
+    def render(st, *args, **kwargs):
+        if len(st) and st.x[0] == 0.0 and render.calls == 0:
+            render.calls += 1
+            raise ValueError('quebrou')
+        return real(st, *args, **kwargs)
+
+    render.calls = 0
+    monkeypatch.setattr(raster, 'render', render)
+    results = raster.export_many(paths, str(tmp_path / 'png'), 16, 16, processes=1)
+    assert results[0] == (paths[0], 0, 'ValueError: quebrou')
+    assert results[1] == (paths[1], 1, None)
@@ -0,0 +1,147 @@
+# test_scenefile.py
+# Arquivo de cena binário: gravar e ler de volta (inteiro, em partes e só o
+# cabeçalho) devolve as mesmas formas na mesma ordem; arquivos truncados ou
+# adulterados viram SceneFileError antes de qualquer forma ser montada.
+# Uso (a partir de trab3/):  python -m pytest -q test_scenefile.py
+
+import random
+
+import numpy as np
+import pytest
+
+import state
+import scene
+import scenefile
+from scenefile import SceneFileError
+from conftest import random_shape
+
+pytestmark = pytest.mark.usefixtures('fresh_scene')
+
+COLUMNS = ('kind', 'x', 'y', 'rotation', 'scale_x', 'scale_y', 'color')
+
+
+def build(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        s = random_shape(rng, polygon_vertices=(6, 40))
+        s.scale_x, s.scale_y = rng.uniform(0.5, 2), rng.choice((-1, 1)) * rng.uniform(0.5, 2)
+        scene.add_shape(s)
+    # Ordem de desenho diferente da ordem das linhas
+    for s in rng.sample(list(state.shapes), n // 4):
+        scene.send_to_back(s)
+
+
+def columns_of(st):
+    rows = st.rows()
+    out = {name: getattr(st, name)[rows] for name in COLUMNS}
+    out['verts'], out['counts'] = st.gather_vertices(rows)
+    return out
+
+
+def assert_same(a, b):
+    for name in COLUMNS + ('verts', 'counts'):
+        # A cor é gravada em float32
+        assert np.allclose(a[name], b[name], rtol=1e-6, atol=1e-7), name
+
+
+@pytest.mark.parametrize('n', [0, 1, 57])
+def test_round_trip(tmp_path, n):
+    build(n)
+    path = tmp_path / 'cena.trb3'
+    saved = scenefile.save(path, state.shapes)
+    expected = columns_of(state.shapes)
+    assert saved == (n, len(expected['verts']))
+    assert scenefile.count(path) == n
+
+    loaded = scenefile.load(path)
+    assert len(loaded) == n
+    assert_same(columns_of(loaded), expected)
+
+    # Em partes (como a carga em partes): mesmas colunas concatenadas
+    parts = list(scenefile.iter_chunks(path, chunk=5))
+    assert len(parts) == -(-n // 5)
+    if parts:
+        joined = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+        assert_same(joined, expected)
+
+    # Ler, instalar e gravar de novo dá o mesmo arquivo
+    scene.install(loaded)
+    again = tmp_path / 'de_novo.trb3'
+    scenefile.save(again, state.shapes)
+    assert again.read_bytes() == path.read_bytes()
+
+
+def _entry(data, name):
+    # Posição no arquivo da entrada do diretório do bloco 'name'
+    nblocks = scenefile.HEADER.unpack_from(data, 0)[2]
+    for i in range(nblocks):
+        at = scenefile.HEADER.size + i * scenefile.ENTRY.size
+        if scenefile.ENTRY.unpack_from(data, at)[0].rstrip(b'\0') == name.encode():
+            return at
+    raise KeyError(name)
+
+
+def _set_entry(data, block, **changes):
+    at = _entry(data, block)
+    fields = dict(zip(('name', 'dtype', 'offset', 'nbytes'), scenefile.ENTRY.unpack_from(data, at)))
+    fields.update(changes)
+    scenefile.ENTRY.pack_into(data, at, *fields.values())
+
+
+def _block(data, name):
+    at = _entry(data, name)
+    _, dtype, off, nbytes = scenefile.ENTRY.unpack_from(data, at)
+    return np.frombuffer(data, dtype=dtype.rstrip(b'\0').decode(), count=nbytes // 8, offset=off)
+
+
+def _header(data, **changes):
+    fields = dict(zip(('magic', 'version', 'nblocks', 'n', 'nverts'),
+                      scenefile.HEADER.unpack_from(data, 0)))
+    fields.update(changes)
+    scenefile.HEADER.pack_into(data, 0, *fields.values())
+
+
+def _swap_vstart(data):
+    vstart = _block(data, 'vstart')
+    vstart[[0, 1]] = vstart[[1, 0]]
+
+
+def _negative_vcount(data):
+    _block(data, 'vcount')[2] = -4
+
+
+def _overlapping(data):
+    _block(data, 'vstart')[3] -= 1
+
+
+CORRUPTIONS = {
+    'vazio': lambda data: data.__delitem__(slice(None)),
+    'cabeçalho truncado': lambda data: data.__delitem__(slice(10, None)),
+    'magic errado': lambda data: data.__setitem__(slice(0, 8), b'NOTSCENE'),
+    'versão futura': lambda data: _header(data, version=scenefile.VERSION + 1),
+    'diretório fora do arquivo': lambda data: _header(data, nblocks=10**6),
+    'blocos truncados': lambda data: data.__delitem__(slice(len(data) - 100, None)),
+    'tipo inválido': lambda data: _set_entry(data, 'x', dtype=b'<f4'),
+    'tipo ilegível': lambda data: _set_entry(data, 'x', dtype=b'zz'),
+    'tamanho errado': lambda data: _set_entry(data, 'y', nbytes=8),
+    'bloco ausente': lambda data: _set_entry(data, 'verts', name=b'outro'),
+    'nº de formas errado': lambda data: _header(data, n=58),
+    'vértices fora de ordem': _swap_vstart,
+    'nº de vértices negativo': _negative_vcount,
+    'trechos sobrepostos': _overlapping,
+}
+
+
+@pytest.mark.parametrize('corruption', CORRUPTIONS)
+def test_corrupt_file(tmp_path, corruption):
+    build(20)
+    path = tmp_path / 'cena.trb3'
+    scenefile.save(path, state.shapes)
+    data = bytearray(path.read_bytes())
+    CORRUPTIONS[corruption](data)
+    path.write_bytes(bytes(data))
+    with pytest.raises(SceneFileError):
+        scenefile.load(path)
+    with pytest.raises(SceneFileError):
+        next(scenefile.iter_chunks(path))
+
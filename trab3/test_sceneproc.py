@@ -0,0 +1,131 @@
+# test_sceneproc.py
+# Processamento em lote de cenas: o pré-filtro de Akl–Toussaint não muda o
+# fecho convexo, a normalização das escalas negativas mantém a matriz de
+# mundo de cada forma e um arquivo corrompido vira um registro de erro sem
+# interromper as outras cenas.
+# Uso (a partir de trab3/):  python -m pytest -q test_sceneproc.py
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+import scenefile
+import sceneproc
+from store import ShapeStore
+from utils import convex_hull
+from conftest import random_shape
+
+
+def clouds(rng):
+    yield rng.uniform(-1, 1, size=(500, 2))
+    yield rng.normal(size=(2000, 2)) * (3.0, 0.2)
+    a = rng.uniform(0, 2 * np.pi, 300)
+    yield np.column_stack((np.cos(a), np.sin(a)))  # todos no fecho
+    pts = rng.integers(-3, 4, size=(400, 2)).astype(np.float64)
+    yield pts  # muitos repetidos e colineares
+    yield np.column_stack((np.linspace(0, 1, 50), np.linspace(0, 2, 50)))  # só uma reta
+    yield rng.uniform(-1, 1, size=(6, 2))  # poucos: sem pré-filtro
+    pts = rng.uniform(-1, 1, size=(100, 2))
+    pts[::7] = np.nan
+    pts[3] = (np.inf, 0.0)
+    yield pts  # vértices não finitos ficam de fora
+    yield np.zeros((0, 2))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_hull_prefilter_matches_convex_hull(seed):
+    rng = np.random.default_rng(seed)
+    for pts in clouds(rng):
+        finite = pts[np.isfinite(pts).all(axis=1)]
+        assert sceneproc.scene_hull(pts) == convex_hull([tuple(p) for p in finite.tolist()])
+
+
+def test_hull_prefilter_discards_interior(monkeypatch):
+    # O fecho exato recebe só os pontos fora do quadrilátero dos extremos
+    seen = []
+    monkeypatch.setattr(sceneproc, 'convex_hull', lambda pts: seen.append(len(pts)) or convex_hull(pts))
+    rng = np.random.default_rng(9)
+    sceneproc.scene_hull(rng.uniform(-1, 1, size=(10_000, 2)))
+    assert seen and seen[0] < 10_000 * 0.6  # o quadrado inscrito tem metade da área
+
+
+def flipped_store(rng, n=60):
+    st = ShapeStore()
+    r = random.Random(int(rng.integers(1 << 30)))
+    for i in range(n):
+        s = random_shape(r)
+        s.rotation = rng.uniform(-720, 720)
+        sx, sy = rng.uniform(0.2, 3, 2)
+        # Todas as combinações de sinal, inclusive as duas negativas
+        s.scale_x, s.scale_y = sx * (-1) ** (i % 2), sy * (-1) ** (i // 2 % 2)
+        st.append(s)
+    return st
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_normalize_keeps_world_matrix(seed):
+    rng = np.random.default_rng(100 + seed)
+    st = flipped_store(rng)
+    rows = st.rows()
+    matrices, verts = st.matrices(rows), st.world_vertices(rows)[0]
+    bounds = st.world_bounds(rows)
+    both = (st.scale_x[rows] < 0) & (st.scale_y[rows] < 0)
+    mirrored = (st.scale_x[rows] < 0) ^ (st.scale_y[rows] < 0)
+    assert both.any()
+
+    changed = sceneproc.normalize_transforms(st, rows)
+    assert changed >= both.sum()
+    assert np.allclose(st.matrices(rows), matrices)
+    assert np.allclose(st.world_vertices(rows)[0], verts)
+    assert np.allclose(st.world_bounds(rows), bounds)
+    assert ((st.rotation[rows] >= 0) & (st.rotation[rows] < 360)).all()
+    assert not ((st.scale_x[rows] < 0) & (st.scale_y[rows] < 0)).any()
+    # Uma escala negativa só (espelhamento) não tem como sair
+    assert (((st.scale_x[rows] < 0) ^ (st.scale_y[rows] < 0)) == mirrored).all()
+    # De novo não muda nada
+    assert sceneproc.normalize_transforms(st, rows) == 0
+
+
+def write_scene(path, n, seed):
+    rng = np.random.default_rng(seed)
+    scenefile.save(path, flipped_store(rng, n))
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_corrupt_file_is_an_error_record(tmp_path, processes):
+    good = tmp_path / 'boa.trb3'
+    write_scene(good, 30, 1)
+    bad = tmp_path / 'ruim.trb3'
+    data = bytearray(good.read_bytes())
+    data[:8] = b'XXXXXXXX'
+    bad.write_bytes(bytes(data))
+    truncated = tmp_path / 'truncada.trb3'
+    truncated.write_bytes(good.read_bytes()[:200])
+    missing = tmp_path / 'nao_existe.trb3'
+
+    for path in (bad, truncated, missing):
+        record = sceneproc.process_scene(str(path))
+        assert set(record) == {'path', 'error'} and record['path'] == str(path)
+
+    out = tmp_path / 'resultados.jsonl'
+    paths = [str(good), str(bad), str(truncated), str(missing)]
+    totals = sceneproc.run(paths, str(out), processes=processes, chunksize=1)
+    records = {r['path']: r for r in map(json.loads, out.read_text().splitlines())}
+    assert set(records) == set(paths)
+    assert totals['scenes'] == 4 and totals['errors'] == 3
+    ok = records[str(good)]
+    assert 'error' not in ok and ok['shapes'] == 30 and ok['hull']
+
+
+def test_unexpected_failure_is_an_error_record(tmp_path, monkeypatch):
+    path = tmp_path / 'cena.trb3'
+    write_scene(path, 5, 2)
+
+    def boom(st, rows):
+        raise RuntimeError('falhou')
+
+    monkeypatch.setattr(sceneproc, 'validate', boom)
+    record = sceneproc._job((str(path), None))
+    assert record == {'path': str(path), 'error': 'RuntimeError: falhou'}
@@ -0,0 +1,112 @@
+# test_shapes.py
+# Circle analítico (elipse girada, com escala diferente em x e y): o teste de
+# ponto bate com o contorno tesselado bem fino, o AABB contém o contorno e
+# encosta nele em cada lado (até o erro da corda), e o AABB em lote do store
+# é o mesmo da forma. circle_segments respeita o erro máximo pedido.
+# Uso (a partir de trab3/):  python -m pytest -q test_shapes.py
+
+import math
+
+import numpy as np
+import pytest
+
+import shapes
+from shapes import circle_segments
+from store import ShapeStore
+from utils import points_in_polygon
+
+
+def ellipse(rng, flip=False):
+    c = shapes.Circle(rng.uniform(0.05, 0.5))
+    c.x, c.y = rng.uniform(-2, 2), rng.uniform(-2, 2)
+    c.rotation = rng.uniform(0, 360)
+    c.scale_x = rng.uniform(0.2, 3.0)
+    c.scale_y = rng.uniform(0.2, 3.0) * (-1 if flip else 1)
+    return c
+
+
+def fine_outline(c):
+    # Contorno com o máximo de segmentos (ppu enorme)
+    verts = c.outline_vertices(1e9)
+    assert len(verts) == 1024
+    return verts
+
+
+def chord_error(c):
+    # Maior distância entre o contorno tesselado e a elipse
+    r = c.radius * max(abs(c.scale_x), abs(c.scale_y))
+    return r * (1 - math.cos(math.pi / 1024))
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('flip', [False, True])
+def test_contains_matches_outline(seed, flip):
+    rng = np.random.default_rng(seed)
+    c = ellipse(rng, flip)
+    outline = fine_outline(c)
+    minx, maxx, miny, maxy = c.bounding_box_world()
+    pts = rng.uniform((minx - 0.1, miny - 0.1), (maxx + 0.1, maxy + 0.1), size=(2000, 2))
+    # Fora da faixa do erro da corda os dois testes têm de concordar
+    m = np.linalg.inv(np.vstack((c.transform_matrix(), (0, 0, 1))))
+    base = pts @ m[:2, :2].T + m[:2, 2]
+    level = np.hypot(base[:, 0], base[:, 1]) / c.radius
+    rel = chord_error(c) / (c.radius * min(abs(c.scale_x), abs(c.scale_y)))
+    clear = np.abs(level - 1) > 2 * rel + 1e-9
+    assert clear.sum() > 1500
+    expected = points_in_polygon(pts[clear], outline)
+    got = np.array([c.contains(x, y) for x, y in pts[clear].tolist()])
+    assert (got == expected).all()
+    assert all(isinstance(c.contains(x, y), bool) for x, y in pts[:10].tolist())
+
+
+def test_degenerate_ellipse_contains_nothing():
+    c = shapes.Circle(0.3)
+    c.scale_y = 0.0
+    assert not c.contains(0.0, 0.0)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_bbox_is_tight(seed):
+    rng = np.random.default_rng(100 + seed)
+    c = ellipse(rng, flip=bool(seed % 2))
+    outline = fine_outline(c)
+    minx, maxx, miny, maxy = c.bounding_box_world()
+    lo, hi = outline.min(axis=0), outline.max(axis=0)
+    tol = chord_error(c) + 1e-12
+    # Contém o contorno...
+    assert minx <= lo[0] + 1e-12 and maxx >= hi[0] - 1e-12
+    assert miny <= lo[1] + 1e-12 and maxy >= hi[1] - 1e-12
+    # ...e encosta nele (não é o AABB folgado do círculo de raio máximo)
+    assert lo[0] - minx <= tol and maxx - hi[0] <= tol
+    assert lo[1] - miny <= tol and maxy - hi[1] <= tol
+
+
+def test_world_bounds_many_matches_shape():
+    rng = np.random.default_rng(7)
+    st = ShapeStore()
+    circles = [ellipse(rng, flip=bool(i % 3 == 0)) for i in range(40)]
+    for c in circles:
+        st.append(c)
+    rows = st.rows_of(circles)
+    assert np.allclose(st.world_bounds(rows), [c.bounding_box_world() for c in circles])
+
+
+def test_circle_segments_error_bound():
+    previous = 0
+    for radius_px in np.geomspace(0.1, 1e6, 200):
+        n = circle_segments(radius_px)
+        assert n & (n - 1) == 0 and 8 <= n <= 1024
+        assert n >= previous  # nunca diminui com o raio
+        previous = n
+        if 8 < n < 1024:
+            assert radius_px * (1 - math.cos(math.pi / n)) <= 0.25
+            # A metade dos segmentos não bastaria (pela aproximação da corda
+            # usada em circle_segments: erro ~ R * ângulo² / 2)
+            assert radius_px * (2 * math.pi / n) ** 2 / 2 > 0.25
+
+
+def test_outline_follows_zoom():
+    c = shapes.Circle(0.5)
+    c.scale_x, c.scale_y = 2.0, 0.5
+    for ppu in (1, 10, 100, 1000, 1e5):
+        assert len(c.outline_vertices(ppu)) == circle_segments(0.5 * 2.0 * ppu)
@@ -0,0 +1,103 @@
+# test_spatial.py
+# GridIndex sobre as linhas do store: a montagem vetorizada (insert_many) dá
+# as mesmas células que a inserção forma a forma, sem criar handles; depois
+# de mover, apagar e reordenar, as consultas (ponto e retângulo) batem com a
+# busca exaustiva em todas as formas.
+# Uso (a partir de trab3/):  python -m pytest -q test_spatial.py
+
+import random
+
+import numpy as np
+import pytest
+
+import state
+import scene
+import shapes
+from spatial import GridIndex
+from store import ShapeStore
+from conftest import random_shape
+
+pytestmark = pytest.mark.usefixtures('fresh_scene')
+
+
+def snapshot(index):
+    return ({k: set(v) for k, v in index.cells.items()}, set(index.large), len(index))
+
+
+def bulk_store(rng, n):
+    # Retângulos em colunas (como scenefile.load), alguns grandes o bastante
+    # para irem para 'large'
+    st = ShapeStore()
+    half = np.array([rng.choice((0.05, 0.3, 6.0)) for _ in range(n)])
+    verts = np.stack([np.column_stack((-half, -half)), np.column_stack((half, -half)),
+                      np.column_stack((half, half)), np.column_stack((-half, half))], axis=1)
+    st.bulk_insert(shapes.Rectangle.kind, verts.reshape(-1, 2), np.full(n, 4),
+                   x=np.array([rng.uniform(-3, 3) for _ in range(n)]),
+                   y=np.array([rng.uniform(-3, 3) for _ in range(n)]),
+                   rotation=np.array([rng.uniform(0, 360) for _ in range(n)]))
+    return st
+
+
+def test_insert_many_matches_insert():
+    rng = random.Random(0)
+    st = bulk_store(rng, 300)
+    scene.install(st)
+    assert all(h is None for h in st.handles)  # nenhum handle criado
+    assert scene.index.large
+    bulk = snapshot(scene.index)
+    one_by_one = GridIndex(st)
+    for s in st:
+        one_by_one.insert(s)
+    assert snapshot(one_by_one) == bulk
+
+
+def brute_topmost(wx, wy):
+    for s in reversed(state.shapes):
+        if s.contains(wx, wy):
+            return s
+    return None
+
+
+def brute_in(rect):
+    minx, maxx, miny, maxy = rect
+    out = set()
+    for s in state.shapes:
+        bminx, bmaxx, bminy, bmaxy = s.bounding_box_world()
+        if bminx <= maxx and bmaxx >= minx and bminy <= maxy and bmaxy >= miny:
+            out.add(s)
+    return out
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_queries_match_brute_force(seed):
+    rng = random.Random(seed)
+    scene.install(bulk_store(rng, 150))
+    for _ in range(60):
+        scene.add_shape(random_shape(rng))
+    st = state.shapes
+    for _ in range(40):
+        s = rng.choice(list(st))
+        op = rng.random()
+        if op < 0.3:
+            s.x += rng.uniform(-1, 1)
+        elif op < 0.5:
+            group = rng.sample(list(st), 20)
+            st.translate(st.rows_of(group), rng.uniform(-1, 1), rng.uniform(-1, 1))
+        elif op < 0.7:
+            scene.remove_shape(s)
+        elif op < 0.85:
+            scene.bring_to_front(s)
+        else:
+            scene.add_shape(random_shape(rng))
+    loose = shapes.Rectangle()  # fora da cena: ignorada pelo índice
+    loose.x = 1.0
+    assert loose not in scene.index
+    assert len(scene.index) == len(st)
+
+    for _ in range(300):
+        wx, wy = rng.uniform(-4, 4), rng.uniform(-4, 4)
+        assert scene.shape_at(wx, wy) is brute_topmost(wx, wy)
+    for _ in range(30):
+        x0, y0 = rng.uniform(-4, 4), rng.uniform(-4, 4)
+        rect = (x0, x0 + rng.uniform(0, 3), y0, y0 + rng.uniform(0, 3))
+        assert set(scene.index.candidates_in(rect)) == brute_in(rect)
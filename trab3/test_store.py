@@ -0,0 +1,92 @@
+# test_store.py
+# Operações em lote do ShapeStore (translate, set_transforms, apply_affine)
+# avisam os listeners uma vez por lote (store.touched_listeners): o índice
+# espacial, o VBO em lote, o AABB da seleção e o gizmo têm de ficar iguais ao
+# que a atualização forma a forma daria.
+# Uso (a partir de trab3/):  python -m pytest -q test_store.py
+
+import random
+
+import numpy as np
+import pytest
+
+import state
+import scene
+import store
+import batch
+import picking
+import selection
+import rendering
+import spatial
+from conftest import random_shape
+
+
+@pytest.fixture(autouse=True)
+def vbo_scene(fresh_scene, monkeypatch):
+    monkeypatch.setattr(state, 'use_vbo', True)
+
+
+def build(rng, n):
+    # Polígonos de 40 vértices passam de LOD_MIN_VERTICES: contorno
+    # adaptativo (caminho por forma)
+    for _ in range(n):
+        scene.add_shape(random_shape(rng, polygon_vertices=(6, 40)))
+
+
+def check_consistent():
+    b = batch.batch
+    b.sync()
+    b._upload()
+    for s in state.shapes:
+        first, count = b.slots[s]
+        assert np.allclose(b.data[first:first + count, 0:2], s.outline_vertices(b.lod_ppu))
+        assert np.allclose(b.bounds[b.order_pos[s]], s.bounding_box_world())
+        index = scene.index
+        cells = np.floor(np.array(s.bounding_box_world()) / index.cell_size)
+        assert index.ranges[s._row].tolist() == cells.tolist()
+        assert index.where[s._row] == (spatial.LARGE if s._row in index.large else spatial.CELLS)
+    assert not b.moved and not b.dirty
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_bulk_operations_match_per_shape(seed):
+    rng = random.Random(seed)
+    build(rng, 200)
+    rendering.render(None)
+    st = state.shapes
+    group = rng.sample(list(st), 60)
+    selection.set_group(group)
+    selection.bounds()
+    picking.gizmo(group[0])
+    calls = []
+    store.touched_listeners.append(lambda st, g: calls.append(len(g)))
+    try:
+        rows = st.rows_of(group)
+        st.translate(rows, 0.7, -0.3)
+        assert selection._bounds is None and picking._gizmo is None
+        check_consistent()
+        st.apply_affine(rows, ((0.0, -1.5, 0.2), (1.5, 0.0, 0.1)))
+        check_consistent()
+        before = st.transforms(rows)
+        st.set_transforms(rows, before * [1, 1, 1, 2, 0.5])
+        check_consistent()
+        st.set_transforms(rows, before)
+        rendering.render(None)
+        check_consistent()
+    finally:
+        store.touched_listeners.pop()
+    assert calls == [60, 60, 60, 60]
+
+
+def test_bulk_invalidates_layer_cache_only_for_other_shapes():
+    import layers
+    rng = random.Random(9)
+    build(rng, 20)
+    st = state.shapes
+    cache = layers.cache
+    cache.valid, cache.active = True, frozenset(st[i] for i in range(5))
+    st.translate(st.rows_of([st[i] for i in range(5)]), 0.1, 0.0)
+    assert cache.valid
+    st.translate(st.rows_of([st[i] for i in range(4, 8)]), 0.1, 0.0)
+    assert not cache.valid
+    cache.active = frozenset()
@@ -0,0 +1,88 @@
+# test_utils.py
+# As versões em lote de point_in_polygon (points_in_polygon,
+# point_in_polygons) têm de dar exatamente o resultado da versão escalar.
+# Uso (a partir de trab3/):  python -m pytest -q test_utils.py
+
+import numpy as np
+import pytest
+
+import utils
+
+
+def random_polygon(rng, n):
+    """Polígono aleatório (não necessariamente simples) com vértices numa grade
+    grossa: repete coordenadas, o que gera arestas horizontais e verticais"""
+    return [tuple(p) for p in rng.integers(-4, 5, size=(n, 2)) * 0.25]
+
+
+def star_polygon(rng, n):
+    """Polígono simples em estrela em volta da origem"""
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+    radii = rng.uniform(0.3, 1.0, n)
+    return list(zip(radii * np.cos(angles), radii * np.sin(angles)))
+
+
+def sample_points(rng, vertices, n):
+    """Pontos aleatórios, os próprios vértices, pontos médios das arestas e
+    pontos na altura de cada vértice (o raio passa pelo vértice)"""
+    v = np.asarray(vertices, dtype=np.float64)
+    mids = (v + np.roll(v, -1, axis=0)) / 2
+    same_y = np.column_stack([rng.uniform(-1.2, 1.2, len(v)), v[:, 1]])
+    grid = rng.integers(-5, 6, size=(n, 2)) * 0.25
+    return np.concatenate([rng.uniform(-1.2, 1.2, size=(n, 2)), v, mids, same_y, grid])
+
+
+def scalar(points, vertices):
+    return np.array([utils.point_in_polygon(x, y, vertices) for x, y in points], dtype=bool)
+
+
+POLYGONS = [
+    [(0, 0), (1, 0), (1, 1), (0, 1)],                     # quadrado: arestas horizontais
+    [(0, 0), (2, 0), (2, 1), (1, 1), (1, 2), (0, 2)],     # L
+    [(0, 0), (1, 0), (2, 0), (2, 1), (1, 1), (0, 1)],     # vértices colineares
+    [(0, 0), (1, 1), (0, 1), (1, 0)],                     # gravata (auto-interseção)
+    [(0, 0), (1, 0), (0.5, 1)],
+]
+
+
+@pytest.mark.parametrize('vertices', POLYGONS)
+def test_points_in_polygon_fixed(vertices):
+    rng = np.random.default_rng(0)
+    pts = sample_points(rng, vertices, 200)
+    expected = scalar(pts, vertices)
+    assert np.array_equal(utils.points_in_polygon(pts, vertices), expected)
+    assert np.array_equal(utils.points_in_polygon(pts, vertices, block=7), expected)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_points_in_polygon_random(seed):
+    rng = np.random.default_rng(seed)
+    for make in (random_polygon, star_polygon):
+        vertices = make(rng, int(rng.integers(3, 30)))
+        pts = sample_points(rng, vertices, 300)
+        expected = scalar(pts, vertices)
+        # Sem blocos (bloco maior que pontos x arestas) e com vários blocos,
+        # inclusive de um ponto só (bloco menor que o número de arestas)
+        for block in (1 << 20, 5 * len(vertices) + 3, 1):
+            got = utils.points_in_polygon(pts, vertices, block=block)
+            assert np.array_equal(got, expected), block
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_point_in_polygons_random(seed):
+    rng = np.random.default_rng(100 + seed)
+    polygons = [random_polygon(rng, int(rng.integers(3, 15))) for _ in range(15)]
+    polygons += [star_polygon(rng, int(rng.integers(3, 15))) for _ in range(15)]
+    polygons += POLYGONS
+    pts = np.concatenate([sample_points(rng, p, 5) for p in polygons[::4]])
+    for x, y in pts:
+        expected = [utils.point_in_polygon(x, y, p) for p in polygons]
+        assert utils.point_in_polygons(x, y, polygons).tolist() == expected
+
+
+def test_point_in_polygons_flat_empty():
+    verts = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    got = utils.point_in_polygons_flat(0.5, 0.5, verts, [0, 4, 0], [4, 0, 0])
+    assert got.tolist() == [True, False, False]
+    assert utils.point_in_polygons(0.5, 0.5, []).shape == (0,)
+    assert utils.points_in_polygon([(0.5, 0.5)], []).tolist() == [False]
@@ -0,0 +1,134 @@
+# test_zorder.py
+# OrderList contra uma lista ordenada simples: operações aleatórias (inserir,
+# remover, levar para a frente/fundo, trocar) com LOAD pequeno para forçar
+# divisões e junções de blocos; depois de cada uma confere a ordem toda.
+# Uso (a partir de trab3/):  python -m pytest -q test_zorder.py
+
+import bisect
+import random
+
+import numpy as np
+import pytest
+
+import zorder
+from zorder import OrderList
+
+
+class Reference:
+    """Mesma semântica da OrderList: chaves iguais ficam na ordem de inserção"""
+
+    def __init__(self):
+        self.keys = []
+        self.rows = []
+
+    def add(self, z, row):
+        j = bisect.bisect_right(self.keys, z)
+        self.keys.insert(j, z)
+        self.rows.insert(j, row)
+
+    def remove(self, z, row):
+        j = bisect.bisect_left(self.keys, z)
+        while self.rows[j] != row:
+            j += 1
+        del self.keys[j], self.rows[j]
+
+
+def check(order, ref, z_of):
+    assert len(order) == len(ref.rows)
+    assert bool(order) == bool(ref.rows)
+    assert list(order) == ref.rows
+    assert list(reversed(order)) == ref.rows[::-1]
+    rows = order.rows()
+    assert rows.tolist() == ref.rows
+    assert order.rows() is rows  # cache até a próxima mudança
+    assert not rows.flags.writeable
+    if not ref.rows:
+        return
+    assert order.first_key() == ref.keys[0]
+    assert order.last_key() == ref.keys[-1]
+    for i in {0, len(ref.rows) - 1, len(ref.rows) // 2, random.randrange(len(ref.rows))}:
+        assert order[i] == ref.rows[i]
+        assert order[i - len(ref.rows)] == ref.rows[i]
+    for i, row in enumerate(ref.rows):
+        assert order.index(z_of[row], row) == i
+    # Nenhum bloco vazio nem maior que 2*LOAD
+    sizes = [len(b) for b in order._rows]
+    assert all(0 < n <= 2 * zorder.LOAD for n in sizes)
+    assert order._maxes == [b[-1] for b in order._keys]
+
+
+@pytest.mark.parametrize('load', [1, 2, 4, 8])
+@pytest.mark.parametrize('seed', range(5))
+def test_random_operations(monkeypatch, load, seed):
+    monkeypatch.setattr(zorder, 'LOAD', load)
+    random.seed(seed)
+    order, ref = OrderList(), Reference()
+    z_of = {}
+
+    def add(z, row):
+        z_of[row] = z
+        order.add(z, row)
+        ref.add(z, row)
+
+    def remove(row):
+        order.remove(z_of[row], row)
+        ref.remove(z_of[row], row)
+        return z_of.pop(row)
+
+    # Começa com um lote já ordenado, como bulk_insert/from_columns
+    start = random.randrange(0, 40)
+    order.extend_sorted([float(i) for i in range(start)], range(start))
+    for i in range(start):
+        z_of[i] = float(i)
+        ref.add(float(i), i)
+    next_row = start
+    check(order, ref, z_of)
+
+    for _ in range(400):
+        op = random.random()
+        live = ref.rows
+        if op < 0.35 or len(live) < 2:
+            # Chaves inteiras em faixa pequena: muitas repetidas
+            add(float(random.randrange(-20, 60)), next_row)
+            next_row += 1
+        elif op < 0.55:
+            remove(random.choice(live))
+        elif op < 0.7:
+            row = random.choice(live)
+            top = ref.keys[-1]
+            remove(row)
+            add(top + 1.0, row)
+        elif op < 0.8:
+            row = random.choice(live)
+            bottom = ref.keys[0]
+            remove(row)
+            add(bottom - 1.0, row)
+        elif op < 0.9:
+            a, b = random.sample(live, 2)
+            za, zb = remove(a), remove(b)
+            add(zb, a)
+            add(za, b)
+        else:
+            row = random.choice(live)
+            direction = random.choice((-1, 1))
+            j = ref.rows.index(row) + direction
+            expected = (ref.keys[j], ref.rows[j]) if 0 <= j < len(live) else None
+            assert order.neighbor(z_of[row], row, direction) == expected
+        check(order, ref, z_of)
+
+    # Esvazia tudo: as junções não podem deixar blocos vazios
+    for row in list(ref.rows):
+        remove(row)
+        check(order, ref, z_of)
+    assert order._keys == [] and order._rows == [] and order._maxes == []
+
+
+def test_getitem_out_of_range():
+    order = OrderList.from_sorted([0.0, 1.0], [5, 6])
+    with pytest.raises(IndexError):
+        order[2]
+    with pytest.raises(IndexError):
+        order[-3]
+    with pytest.raises(ValueError):
+        order.remove(1.0, 5)
+    assert isinstance(order.rows(), np.ndarray)
@@ -2,6 +2,7 @@
 # Funções utilitárias de geometria e matemática.
 
 import math
+import numpy as np
 
 def point_in_polygon(x, y, vertices):
     # Ray casting (funciona para polígonos simples)
@@ -17,6 +18,78 @@ def point_in_polygon(x, y, vertices):
     return inside
 
 
+def _polygon_edges(vertices):
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    w = np.roll(v, -1, axis=0)
+    return v[:, 0], v[:, 1], w[:, 0], w[:, 1]
+
+
+def points_in_polygon(points, vertices, block=1 << 20):
+    """
+    Versão em lote de point_in_polygon: testa N pontos contra um polígono.
+    Retorna um array booleano (N,). Mesma regra de ray casting (e mesmo
+    1e-12 nas arestas horizontais) da versão escalar.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    inside = np.zeros(len(pts), dtype=bool)
+    x0, y0, x1, y1 = _polygon_edges(vertices)
+    if len(x0) == 0:
+        return inside
+    dx = x1 - x0
+    dy = y1 - y0 + 1e-12
+    # Processa em blocos para limitar a memória da matriz pontos x arestas
+    step = max(1, block // len(x0))
+    for i in range(0, len(pts), step):
+        px = pts[i:i + step, 0:1]
+        py = pts[i:i + step, 1:2]
+        crosses = (y0 > py) != (y1 > py)
+        xinters = dx * (py - y0) / dy + x0
+        hits = crosses & (px < xinters)
+        inside[i:i + step] = np.count_nonzero(hits, axis=1) & 1
+    return inside
+
+
+def point_in_polygons_flat(x, y, verts, starts, counts):
+    """
+    Testa um ponto contra vários polígonos guardados num único array
+    (verts (V, 2); o polígono i ocupa verts[starts[i]:starts[i] + counts[i]]).
+    Retorna um array booleano com um resultado por polígono.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 2)
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    result = np.zeros(len(starts), dtype=bool)
+    valid = counts > 0
+    if not valid.any():
+        return result
+    starts_v = starts[valid]
+    counts_v = counts[valid]
+
+    # Índices das arestas (i -> próximo vértice do mesmo polígono)
+    ids = np.repeat(np.arange(len(starts_v)), counts_v)
+    offs = np.arange(counts_v.sum()) - np.repeat(np.cumsum(counts_v) - counts_v, counts_v)
+    a = starts_v[ids] + offs
+    b = starts_v[ids] + (offs + 1) % counts_v[ids]
+
+    x0, y0 = verts[a, 0], verts[a, 1]
+    x1, y1 = verts[b, 0], verts[b, 1]
+    crosses = (y0 > y) != (y1 > y)
+    xinters = (x1 - x0) * (y - y0) / (y1 - y0 + 1e-12) + x0
+    hits = crosses & (x < xinters)
+    result[valid] = np.bincount(ids, weights=hits, minlength=len(starts_v)).astype(np.int64) & 1
+    return result
+
+
+def point_in_polygons(x, y, polygons):
+    """Testa um ponto contra uma sequência de polígonos; retorna array booleano"""
+    polys = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+    if not polys:
+        return np.zeros(0, dtype=bool)
+    counts = np.array([len(p) for p in polys], dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    return point_in_polygons_flat(x, y, np.concatenate(polys), starts, counts)
+
+
 def rotate_point(px, py, angle_deg):
     a = math.radians(angle_deg)
     ca = math.cos(a)
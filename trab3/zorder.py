@@ -0,0 +1,178 @@
+# zorder.py
+# Ordem de desenho do ShapeStore: linhas ordenadas pela chave z (float).
+# Lista de blocos ordenados (como o SortedList do sortedcontainers): a busca é
+# binária sobre o máximo de cada bloco e depois dentro do bloco, e inserir ou
+# remover só desloca um bloco de até 2*LOAD itens -> O(log n) na prática.
+# Blocos que passam de 2*LOAD são divididos; os que ficam com menos de LOAD/2
+# são juntados ao vizinho.
+
+import bisect
+from itertools import chain
+import numpy as np
+
+LOAD = 512
+
+
+class OrderList:
+    def __init__(self):
+        self._keys = []    # blocos de chaves z (ordenados)
+        self._rows = []    # blocos de linhas, paralelos a _keys
+        self._maxes = []   # maior chave de cada bloco
+        self._len = 0
+        self._array = None # cache de rows() até a próxima mudança
+
+    @classmethod
+    def from_sorted(cls, keys, rows):
+        """Monta a ordem a partir de chaves já ordenadas (sem busca)"""
+        order = cls()
+        order.extend_sorted(keys, rows)
+        return order
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __iter__(self):
+        return chain.from_iterable(self._rows)
+
+    def __reversed__(self):
+        return chain.from_iterable(reversed(b) for b in reversed(self._rows))
+
+    def __getitem__(self, i):
+        """Linha na posição i (as pontas são O(1))"""
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('posição fora da ordem')
+        if i == self._len - 1:
+            return self._rows[-1][-1]
+        for block in self._rows:
+            if i < len(block):
+                return block[i]
+            i -= len(block)
+
+    def index(self, z, row):
+        """Posição da linha 'row' (chave z) na ordem de desenho"""
+        i, j = self._locate(z, row)
+        return sum(len(b) for b in self._rows[:i]) + j
+
+    def first_key(self):
+        return self._keys[0][0]
+
+    def last_key(self):
+        return self._keys[-1][-1]
+
+    # --- localização ---
+    def _locate(self, z, row):
+        """(bloco, posição) da linha 'row' com chave z"""
+        i = bisect.bisect_left(self._maxes, z)
+        while i < len(self._keys):
+            keys, rows = self._keys[i], self._rows[i]
+            j = bisect.bisect_left(keys, z)
+            # Chaves repetidas: procura a linha entre as iguais (raro)
+            while j < len(keys) and keys[j] == z:
+                if rows[j] == row:
+                    return i, j
+                j += 1
+            if j < len(keys):
+                break
+            i += 1
+        raise ValueError(f'linha {row} com z={z} não está na ordem')
+
+    # --- mudanças ---
+    def add(self, z, row):
+        self._array = None
+        self._len += 1
+        if not self._keys:
+            self._keys.append([z])
+            self._rows.append([row])
+            self._maxes.append(z)
+            return
+        i = bisect.bisect_right(self._maxes, z)
+        if i == len(self._maxes):
+            i -= 1
+        keys, rows = self._keys[i], self._rows[i]
+        j = bisect.bisect_right(keys, z)
+        keys.insert(j, z)
+        rows.insert(j, row)
+        self._maxes[i] = keys[-1]
+        if len(keys) > 2 * LOAD:
+            self._split(i)
+
+    def _split(self, i):
+        """Divide o bloco i ao meio"""
+        keys, rows = self._keys[i], self._rows[i]
+        half = len(keys) // 2
+        self._keys[i:i + 1] = [keys[:half], keys[half:]]
+        self._rows[i:i + 1] = [rows[:half], rows[half:]]
+        self._maxes[i:i + 1] = [keys[half - 1], keys[-1]]
+
+    def _merge(self, i):
+        """Junta o bloco i (pequeno) ao vizinho e divide de novo se ficou grande"""
+        if len(self._keys) == 1:
+            if not self._keys[0]:
+                del self._keys[0], self._rows[0], self._maxes[0]
+            return
+        if i == len(self._keys) - 1:
+            i -= 1
+        self._keys[i:i + 2] = [self._keys[i] + self._keys[i + 1]]
+        self._rows[i:i + 2] = [self._rows[i] + self._rows[i + 1]]
+        self._maxes[i:i + 2] = [self._keys[i][-1]]
+        if len(self._keys[i]) > 2 * LOAD:
+            self._split(i)
+
+    def extend_sorted(self, keys, rows):
+        """Acrescenta no fim chaves ordenadas e >= a todas as existentes"""
+        keys, rows = list(keys), list(rows)
+        if not keys:
+            return
+        self._array = None
+        self._len += len(keys)
+        start = 0
+        if self._keys and len(self._keys[-1]) < LOAD:
+            start = LOAD - len(self._keys[-1])
+            self._keys[-1].extend(keys[:start])
+            self._rows[-1].extend(rows[:start])
+            self._maxes[-1] = self._keys[-1][-1]
+        for k in range(start, len(keys), LOAD):
+            self._keys.append(keys[k:k + LOAD])
+            self._rows.append(rows[k:k + LOAD])
+            self._maxes.append(self._keys[-1][-1])
+
+    def remove(self, z, row):
+        i, j = self._locate(z, row)
+        self._array = None
+        self._len -= 1
+        keys, rows = self._keys[i], self._rows[i]
+        del keys[j]
+        del rows[j]
+        if keys:
+            self._maxes[i] = keys[-1]
+        if not keys or len(keys) < LOAD // 2:
+            self._merge(i)
+
+    def neighbor(self, z, row, step):
+        """(z, linha) vizinha na ordem: step=+1 a da frente, -1 a de trás; None nas pontas"""
+        i, j = self._locate(z, row)
+        j += step
+        if j < 0:
+            if i == 0:
+                return None
+            i -= 1
+            j = len(self._keys[i]) - 1
+        elif j >= len(self._keys[i]):
+            if i == len(self._keys) - 1:
+                return None
+            i += 1
+            j = 0
+        return self._keys[i][j], self._rows[i][j]
+
+    def rows(self):
+        """Array com as linhas de trás para frente (em cache até a próxima mudança)"""
+        if self._array is None:
+            self._array = np.fromiter(chain.from_iterable(self._rows), dtype=np.int64,
+                                      count=self._len)
+            self._array.flags.writeable = False
+        return self._array